@@ -0,0 +1,268 @@
+"""
+Benchmark each stage of the packing pipeline on a synthetic repository.
+
+Generates a deterministic repository (see synthetic_repo.py) and times the walk,
+ignore filtering, binary detection, decoding, content transforms, tree rendering
+and output writing separately, followed by sanitize_files() and pack() end to
+end. Each stage reports its best time over the repeats and its peak traced
+memory from one extra run under tracemalloc.
+
+Results are printed and optionally written as JSON. Given a baseline written by
+an earlier run, stages slower or larger than the baseline by more than the
+threshold are reported as regressions and the exit status is 1.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--files 1000] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from synthetic_repo import add_spec_arguments, generate_repository, spec_from_args
+from repopack.config import merge_configs
+from repopack.output_generator import generate_output
+from repopack.packager import pack
+from repopack.utils.file_handler import is_binary, read_file, sanitize_files, transform_content
+from repopack.utils.ignore_utils import create_ignore_matcher
+from repopack.utils.logger import logger
+from repopack.utils.tree_generator import generate_tree_string
+
+# Slowdowns smaller than this are treated as timer noise, whatever the threshold
+MIN_REGRESSION_SECONDS = 0.005
+
+# Stage name and function; each function takes the results of the stages before it
+Stage = Tuple[str, Callable[[Dict[str, Any]], Any]]
+
+
+def walk_files(root_dir: str) -> List[str]:
+    """List every file below a directory, without ignore matching."""
+    file_paths: List[str] = []
+    for current_dir, _, file_names in os.walk(root_dir):
+        rel_dir = os.path.relpath(current_dir, root_dir)
+        prefix = "" if rel_dir == os.curdir else rel_dir + os.sep
+        file_paths.extend(prefix + file_name for file_name in file_names)
+    return file_paths
+
+
+def make_stages(root_dir: str, output_dir: str, config: Dict[str, Any]) -> List[Stage]:
+    """
+    Build the benchmarked stages, in pipeline order.
+
+    Args:
+        root_dir (str): The synthetic repository.
+        output_dir (str): Directory the output files are written to.
+        config (Dict[str, Any]): The configuration to pack with.
+
+    Returns:
+        List[Stage]: The stages; each result is stored under the stage name for later stages.
+    """
+
+    def ignore_filter(results: Dict[str, Any]) -> List[str]:
+        matcher = create_ignore_matcher(root_dir, config)
+        return [path for path in results["walk"] if not matcher.is_ignored(path)]
+
+    def binary_check(results: Dict[str, Any]) -> List[str]:
+        return [
+            path for path in results["ignore_filter"] if not is_binary(os.path.join(root_dir, path))
+        ]
+
+    def decode(results: Dict[str, Any]) -> List[Tuple[str, str]]:
+        decoded = []
+        for path in results["binary_check"]:
+            content = read_file(os.path.join(root_dir, path), config, path)
+            if content is not None:
+                decoded.append((path, content[0]))
+        return decoded
+
+    def transform(results: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [
+            {"path": path, "content": transform_content(content, path, config)}
+            for path, content in results["decode"]
+        ]
+
+    def tree_render(results: Dict[str, Any]) -> str:
+        return generate_tree_string(results["ignore_filter"])
+
+    def output_write(results: Dict[str, Any]) -> None:
+        generate_output(
+            root_dir,
+            config,
+            iter(results["transform"]),
+            results["ignore_filter"],
+            os.path.join(output_dir, "stage-output.txt"),
+            results["tree_render"],
+        )
+
+    def sanitize(results: Dict[str, Any]) -> int:
+        return sum(1 for _ in sanitize_files(results["ignore_filter"], root_dir, config))
+
+    def pack_all(results: Dict[str, Any]) -> Dict[str, Any]:
+        return pack(root_dir, config, os.path.join(output_dir, "pack-output.txt"))
+
+    return [
+        ("walk", lambda results: walk_files(root_dir)),
+        ("ignore_filter", ignore_filter),
+        ("binary_check", binary_check),
+        ("decode", decode),
+        ("transform", transform),
+        ("tree_render", tree_render),
+        ("output_write", output_write),
+        ("sanitize_files", sanitize),
+        ("pack", pack_all),
+    ]
+
+
+def run_stages(stages: List[Stage], repeat: int, measure_memory: bool) -> Dict[str, Any]:
+    """
+    Time each stage and measure its peak memory.
+
+    Args:
+        stages (List[Stage]): The stages, in pipeline order.
+        repeat (int): The number of timed runs of each stage; the best is reported.
+        measure_memory (bool): Whether to run each stage once more under tracemalloc.
+
+    Returns:
+        Dict[str, Any]: The best time in seconds ('seconds') and peak traced memory in bytes
+            ('peak_bytes', None unless measured) by stage name.
+    """
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Any] = {}
+    for name, stage in stages:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[name] = stage(results)
+            best = min(best, time.perf_counter() - start)
+
+        peak: Optional[int] = None
+        if measure_memory:
+            tracemalloc.start()
+            try:
+                stage(results)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        timings[name] = {"seconds": round(best, 6), "peak_bytes": peak}
+    return timings
+
+
+def compare_to_baseline(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    Find the stages that regressed against a baseline.
+
+    Args:
+        current (Dict[str, Any]): The results of this run.
+        baseline (Dict[str, Any]): The results of the baseline run.
+        threshold (float): The tolerated relative increase, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: A description of each regression; empty if there are none.
+    """
+    regressions: List[str] = []
+    if current["spec"] != baseline.get("spec"):
+        regressions.append("repository specification differs from the baseline")
+        return regressions
+
+    for name, stage in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        seconds, base_seconds = stage["seconds"], base["seconds"]
+        if (
+            seconds > base_seconds * (1 + threshold)
+            and seconds - base_seconds > MIN_REGRESSION_SECONDS
+        ):
+            regressions.append(f"{name}: {base_seconds:.4f}s -> {seconds:.4f}s")
+        peak, base_peak = stage.get("peak_bytes"), base.get("peak_bytes")
+        if peak is not None and base_peak and peak > base_peak * (1 + threshold):
+            regressions.append(f"{name}: peak {base_peak} -> {peak} bytes")
+    return regressions
+
+
+def print_results(current: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """Print a table of stage timings, with the change from the baseline if given."""
+    print(f"{'stage':<16} {'seconds':>10} {'peak MiB':>10} {'vs base':>9}")
+    for name, stage in current["stages"].items():
+        peak = stage["peak_bytes"]
+        peak_text = f"{peak / 2**20:>10.2f}" if peak is not None else f"{'-':>10}"
+        change = ""
+        base = (baseline or {}).get("stages", {}).get(name)
+        if base and base["seconds"]:
+            change = f"{(stage['seconds'] / base['seconds'] - 1) * 100:>+8.1f}%"
+        print(f"{name:<16} {stage['seconds']:>10.4f} {peak_text} {change:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the packing pipeline stages")
+    add_spec_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--jobs", type=int, default=1, help="Workers for sanitize_files/pack")
+    parser.add_argument(
+        "--remove-comments", action="store_true", help="Include comment removal in transforms"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory measurement")
+    parser.add_argument("--repo-dir", help="Generate the repository here and keep it")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results from an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Tolerated relative regression"
+    )
+    args = parser.parse_args()
+
+    logger.logger.setLevel(logging.WARNING)
+    spec = spec_from_args(args)
+    config = merge_configs(
+        {},
+        {
+            "cache": {"enabled": False},
+            "processing": {"jobs": args.jobs},
+            "output": {"remove_comments": args.remove_comments},
+        },
+    )
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        root_dir = args.repo_dir or os.path.join(work_dir, "repo")
+        output_dir = os.path.join(work_dir, "output")
+        os.makedirs(output_dir)
+        repository = generate_repository(root_dir, spec)
+        stages = make_stages(root_dir, output_dir, config)
+        current = {
+            "spec": dict(spec.to_dict(), jobs=args.jobs, remove_comments=args.remove_comments),
+            "repository": repository,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "stages": run_stages(stages, args.repeat, not args.no_memory),
+        }
+
+    baseline: Optional[Dict[str, Any]] = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_results(current, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(current, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
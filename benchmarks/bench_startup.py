@@ -0,0 +1,185 @@
+"""
+Benchmark the startup time of the command-line interface.
+
+Runs 'python -X importtime -m repopack --version' in fresh interpreters and
+reports the best wall time, the cumulative import time of repopack.cli and the
+slowest modules it imports. Startup fails the check if it exceeds the time
+budget, imports a module that should only be loaded on first use, or, given a
+baseline written by an earlier run, is slower than the baseline by more than
+the threshold; the exit status is then 1.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 10] [--budget-ms 100]
+        [--output results.json] [--baseline baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+# Modules deferred until a command needs them; importing any at startup is a regression
+DEFERRED_MODULES = [
+    "chardet",
+    "pathspec",
+    "halo",
+    "colorama",
+    "http.server",
+    "multiprocessing",
+    "repopack.packager",
+    "repopack.server",
+]
+
+# Slowdowns smaller than this are treated as timer noise, whatever the threshold
+MIN_REGRESSION_MS = 5.0
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse the report written by 'python -X importtime'.
+
+    Args:
+        stderr (str): The interpreter's standard error.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Self and cumulative import time in microseconds by module.
+    """
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules
+
+
+def measure_startup(repeat: int) -> Dict[str, Any]:
+    """
+    Run 'repopack --version' in fresh interpreters and keep the fastest run.
+
+    Args:
+        repeat (int): The number of runs.
+
+    Returns:
+        Dict[str, Any]: The best wall time ('wall_ms') and the import times of that run
+            ('modules', self and cumulative microseconds by module).
+    """
+    best_wall = float("inf")
+    best_modules: Dict[str, Tuple[int, int]] = {}
+    command = [sys.executable, "-X", "importtime", "-m", "repopack", "--version"]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        wall = time.perf_counter() - start
+        if wall < best_wall:
+            best_wall = wall
+            best_modules = parse_importtime(completed.stderr)
+    return {"wall_ms": round(best_wall * 1e3, 3), "modules": best_modules}
+
+
+def measure_interpreter(repeat: int) -> float:
+    """
+    Measure the wall time of starting an interpreter that does nothing, for reference.
+
+    Args:
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The best wall time in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1e3, 3)
+
+
+def check_startup(
+    current: Dict[str, Any], budget_ms: float, baseline: Any, threshold: float
+) -> List[str]:
+    """
+    Find the ways startup regressed.
+
+    Args:
+        current (Dict[str, Any]): The results of this run.
+        budget_ms (float): The maximum wall time in milliseconds.
+        baseline (Any): The results of a baseline run, or None.
+        threshold (float): The tolerated relative increase over the baseline, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: A description of each regression; empty if there are none.
+    """
+    regressions = [f"{name} imported at startup" for name in current["deferred_imported"]]
+    if current["wall_ms"] > budget_ms:
+        regressions.append(f"startup {current['wall_ms']:.1f}ms over budget of {budget_ms:.1f}ms")
+    if baseline is not None:
+        for key in ("wall_ms", "cli_import_ms"):
+            value, base = current[key], baseline.get(key)
+            if base and value > base * (1 + threshold) and value - base > MIN_REGRESSION_MS:
+                regressions.append(f"{key}: {base:.1f}ms -> {value:.1f}ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the command-line startup time")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs; the fastest is reported")
+    parser.add_argument(
+        "--budget-ms", type=float, default=100.0, help="Maximum wall time of 'repopack --version'"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules to list")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results from an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Tolerated relative regression"
+    )
+    args = parser.parse_args()
+
+    startup = measure_startup(args.repeat)
+    modules = startup["modules"]
+    current = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "interpreter_ms": measure_interpreter(args.repeat),
+        "wall_ms": startup["wall_ms"],
+        "cli_import_ms": round(modules.get("repopack.cli", (0, 0))[1] / 1e3, 3),
+        "deferred_imported": [name for name in DEFERRED_MODULES if name in modules],
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1e3, 3)}
+            for name, (self_us, _) in sorted(modules.items(), key=lambda item: -item[1][0])[
+                : args.top
+            ]
+        ],
+    }
+
+    print(f"interpreter only    {current['interpreter_ms']:>8.1f} ms")
+    print(f"repopack --version  {current['wall_ms']:>8.1f} ms")
+    print(f"import repopack.cli {current['cli_import_ms']:>8.1f} ms")
+    print("slowest modules (self time):")
+    for module in current["slowest_modules"]:
+        print(f"  {module['module']:<40} {module['self_ms']:>8.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    regressions = check_startup(current, args.budget_ms, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark file tree construction in repopack.utils.tree_generator.
+
+Builds trees from synthetic path lists of increasing size, for both a single flat
+directory and a nested layout, and reports the time per path. Construction should
+scale linearly, so the time per path should stay roughly constant as the count grows.
+
+Usage:
+    python benchmarks/bench_tree_generator.py [--max-paths 1000000]
+"""
+
+import argparse
+import time
+from typing import List
+from repopack.utils.tree_generator import generate_file_tree
+
+
+def make_flat_paths(count: int) -> List[str]:
+    """Generate paths that all live in one directory, like generated protobufs."""
+    return [f"generated/file_{i}.pb.py" for i in range(count)]
+
+
+def make_nested_paths(count: int, fan_out: int = 10) -> List[str]:
+    """Generate paths spread over a three-level directory tree."""
+    return [
+        f"pkg_{i % fan_out}/mod_{(i // fan_out) % fan_out}/sub_{(i // fan_out**2) % fan_out}/f_{i}.py"
+        for i in range(count)
+    ]
+
+
+def time_tree(paths: List[str]) -> float:
+    """Return the seconds taken to build a tree from the paths."""
+    start = time.perf_counter()
+    generate_file_tree(paths)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generate_file_tree scaling")
+    parser.add_argument("--max-paths", type=int, default=1_000_000, help="Largest path count")
+    args = parser.parse_args()
+
+    print(f"{'layout':<8} {'paths':>10} {'seconds':>10} {'us/path':>10}")
+    count = 1_000
+    while count <= args.max_paths:
+        for layout, make_paths in (("flat", make_flat_paths), ("nested", make_nested_paths)):
+            paths = make_paths(count)
+            seconds = time_tree(paths)
+            print(f"{layout:<8} {count:>10} {seconds:>10.3f} {seconds / count * 1e6:>10.2f}")
+        count *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Generate deterministic synthetic repositories for benchmarking.
+
+The same specification and seed always produce the same tree, byte for byte, so
+timings taken on different machines or commits describe the same workload.
+
+Usage:
+    python benchmarks/synthetic_repo.py DIRECTORY [--files 1000] [--depth 3] [--fan-out 4]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from typing import Any, Dict, List
+
+# Text file extensions and lines typical of each, including comments to strip
+TEXT_LINES: Dict[str, List[str]] = {
+    ".py": [
+        "import os",
+        "# Resolve the path relative to the package",
+        "def handler_{n}(value):",
+        '    """Handle value {n}."""',
+        "    return value * {n}  # scale",
+        'URL_{n} = "https://example.com/#section-{n}"',
+        "class Model{n}:",
+        "    count = {n}",
+    ],
+    ".js": [
+        "// Export the handler",
+        "const re{n} = /\\/\\/+/g;",
+        "function handler{n}(value) { return value / {n}; }",
+        "/* Cached for {n} seconds */",
+        "export const url{n} = 'https://example.com/{n}';",
+    ],
+    ".css": [
+        "/* Layout for block {n} */",
+        ".block-{n} { margin: {n}px; }",
+        '.icon-{n}::before { content: "/* {n} */"; }',
+    ],
+    ".html": [
+        "<!-- Section {n} -->",
+        '<div class="block-{n}">Item {n}</div>',
+        '<p>Paragraph {n} with <a href="/page/{n}">a link</a>.</p>',
+    ],
+    ".md": [
+        "# Heading {n}",
+        "Some prose describing item {n} in a little more detail.",
+        "- Bullet point {n}",
+    ],
+    ".json": [
+        '  "key_{n}": {n},',
+        '  "name_{n}": "value {n}",',
+    ],
+}
+
+# Characters that are valid Latin-1 but never valid UTF-8 once encoded as Latin-1
+NON_UTF8_TEXT = "café naïve façade résumé {n}"
+
+# Upper bound on the size of a single generated file
+MAX_FILE_SIZE = 4 * 1024 * 1024
+
+
+class RepoSpec:
+    """The parameters of a synthetic repository."""
+
+    __slots__ = (
+        "files",
+        "depth",
+        "fan_out",
+        "mean_size",
+        "size_sigma",
+        "binary_ratio",
+        "non_utf8_ratio",
+        "ignore_density",
+        "seed",
+    )
+
+    def __init__(
+        self,
+        files: int = 1000,
+        depth: int = 3,
+        fan_out: int = 4,
+        mean_size: int = 4096,
+        size_sigma: float = 1.0,
+        binary_ratio: float = 0.05,
+        non_utf8_ratio: float = 0.05,
+        ignore_density: int = 4,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initialize a RepoSpec.
+
+        Args:
+            files (int): The number of files, not counting ignore files. Defaults to 1000.
+            depth (int): The number of directory levels below the root. Defaults to 3.
+            fan_out (int): The number of subdirectories of each directory above the deepest
+                level. Defaults to 4.
+            mean_size (int): The mean file size in bytes. Defaults to 4096.
+            size_sigma (float): The spread of the log-normal file size distribution; 0 makes
+                every file mean_size bytes. Defaults to 1.0.
+            binary_ratio (float): The fraction of binary files. Defaults to 0.05.
+            non_utf8_ratio (float): The fraction of Latin-1 encoded text files. Defaults to 0.05.
+            ignore_density (int): The number of patterns in the .gitignore file of each
+                directory; 0 writes no ignore files. Defaults to 4.
+            seed (int): The random seed. Defaults to 0.
+        """
+        self.files: int = files
+        self.depth: int = depth
+        self.fan_out: int = fan_out
+        self.mean_size: int = mean_size
+        self.size_sigma: float = size_sigma
+        self.binary_ratio: float = binary_ratio
+        self.non_utf8_ratio: float = non_utf8_ratio
+        self.ignore_density: int = ignore_density
+        self.seed: int = seed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the parameters as a dictionary.
+
+        Returns:
+            Dict[str, Any]: The parameters by name.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def make_directories(spec: RepoSpec) -> List[str]:
+    """
+    List the directories of a complete tree with the given depth and fan-out.
+
+    Args:
+        spec (RepoSpec): The repository specification.
+
+    Returns:
+        List[str]: Directory paths relative to the root, starting with '' for the root.
+    """
+    directories = [""]
+    level = [""]
+    for _ in range(spec.depth):
+        level = [f"{parent}d{i}/" for parent in level for i in range(spec.fan_out)]
+        directories.extend(level)
+    return directories
+
+
+def make_ignore_patterns(rng: random.Random, count: int) -> List[str]:
+    """
+    Generate a mix of literal, suffix, directory and wildcard ignore patterns.
+
+    Args:
+        rng (random.Random): The random number generator.
+        count (int): The number of patterns.
+
+    Returns:
+        List[str]: The patterns, some of which match generated files.
+    """
+    patterns: List[str] = []
+    for _ in range(count):
+        n = rng.randrange(16)
+        kind = rng.randrange(4)
+        if kind == 0:
+            patterns.append(f"*.gen{n}")
+        elif kind == 1:
+            patterns.append(f"file_{n}.md")
+        elif kind == 2:
+            patterns.append(f"build{n}/")
+        else:
+            patterns.append(f"**/tmp_{n}*")
+    return patterns
+
+
+def make_text(rng: random.Random, extension: str, size: int) -> str:
+    """
+    Generate text of roughly the given size in the style of a file type.
+
+    Args:
+        rng (random.Random): The random number generator.
+        extension (str): The file extension, a key of TEXT_LINES.
+        size (int): The approximate size in characters.
+
+    Returns:
+        str: The generated text.
+    """
+    templates = TEXT_LINES[extension]
+    lines: List[str] = []
+    length = 0
+    while length < size:
+        line = rng.choice(templates).replace("{n}", str(rng.randrange(1000)))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def generate_repository(root_dir: str, spec: RepoSpec) -> Dict[str, Any]:
+    """
+    Write a synthetic repository.
+
+    Args:
+        root_dir (str): The directory to write to; created if missing.
+        spec (RepoSpec): The repository specification.
+
+    Returns:
+        Dict[str, Any]: The number of files of each kind and their total size in bytes.
+    """
+    rng = random.Random(spec.seed)
+    directories = make_directories(spec)
+    for directory in directories:
+        os.makedirs(os.path.join(root_dir, directory), exist_ok=True)
+        if spec.ignore_density:
+            with open(os.path.join(root_dir, directory, ".gitignore"), "w") as f:
+                f.write("\n".join(make_ignore_patterns(rng, spec.ignore_density)) + "\n")
+
+    extensions = sorted(TEXT_LINES)
+    mu = math.log(max(spec.mean_size, 1)) - spec.size_sigma**2 / 2
+    summary = {"text_files": 0, "binary_files": 0, "non_utf8_files": 0, "total_bytes": 0}
+    for i in range(spec.files):
+        directory = directories[rng.randrange(len(directories))]
+        size = min(int(rng.lognormvariate(mu, spec.size_sigma)), MAX_FILE_SIZE)
+        kind = rng.random()
+        if kind < spec.binary_ratio:
+            name = f"file_{i}.bin"
+            data = b"\0" + rng.getrandbits(size * 8).to_bytes(size, "little") if size else b"\0"
+            summary["binary_files"] += 1
+        elif kind < spec.binary_ratio + spec.non_utf8_ratio:
+            name = f"file_{i}.txt"
+            lines = (NON_UTF8_TEXT.replace("{n}", str(n)) for n in range(size // 30 + 1))
+            data = "\n".join(lines).encode("latin-1")
+            summary["non_utf8_files"] += 1
+        else:
+            extension = extensions[rng.randrange(len(extensions))]
+            # A few files per pattern kind, so ignore patterns have something to match
+            if rng.random() < 0.05:
+                extension = f".gen{rng.randrange(16)}"
+                name = f"file_{i}{extension}"
+                data = make_text(rng, ".md", size).encode("utf-8")
+            else:
+                name = f"file_{i}{extension}"
+                data = make_text(rng, extension, size).encode("utf-8")
+            summary["text_files"] += 1
+        with open(os.path.join(root_dir, directory, name), "wb") as f:
+            f.write(data)
+        summary["total_bytes"] += len(data)
+    return summary
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add an option for each repository parameter to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to extend.
+    """
+    defaults = RepoSpec()
+    parser.add_argument("--files", type=int, default=defaults.files, help="Number of files")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="Directory depth")
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out, help="Subdirectories")
+    parser.add_argument(
+        "--mean-size", type=int, default=defaults.mean_size, help="Mean file size in bytes"
+    )
+    parser.add_argument(
+        "--size-sigma", type=float, default=defaults.size_sigma, help="Log-normal size spread"
+    )
+    parser.add_argument(
+        "--binary-ratio", type=float, default=defaults.binary_ratio, help="Binary file fraction"
+    )
+    parser.add_argument(
+        "--non-utf8-ratio",
+        type=float,
+        default=defaults.non_utf8_ratio,
+        help="Latin-1 text file fraction",
+    )
+    parser.add_argument(
+        "--ignore-density",
+        type=int,
+        default=defaults.ignore_density,
+        help="Patterns per directory .gitignore",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+
+
+def spec_from_args(args: argparse.Namespace) -> RepoSpec:
+    """
+    Build a repository specification from parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Arguments parsed with the options of add_spec_arguments().
+
+    Returns:
+        RepoSpec: The specification.
+    """
+    return RepoSpec(
+        files=args.files,
+        depth=args.depth,
+        fan_out=args.fan_out,
+        mean_size=args.mean_size,
+        size_sigma=args.size_sigma,
+        binary_ratio=args.binary_ratio,
+        non_utf8_ratio=args.non_utf8_ratio,
+        ignore_density=args.ignore_density,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic repository")
+    parser.add_argument("directory", help="Directory to write the repository to")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    summary = generate_repository(args.directory, spec_from_args(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,57 @@
-from .packager import pack
-from .cli import run_cli
+from importlib import import_module
+from typing import Any, List
 from .version import __version__
 
 # Define the public API of the package
-__all__: list[str] = ["pack", "run_cli", "__version__"]
+__all__: list[str] = [
+    "pack",
+    "pack_repository",
+    "pack_batch",
+    "PackResult",
+    "FileRecord",
+    "run_cli",
+    "__version__",
+]
 
-# Type hints for imported objects
+# Module providing each public name, imported on first access so that importing
+# the package (or running 'repopack --version') does not load the whole pipeline
+LAZY_ATTRIBUTES: dict[str, str] = {
+    "pack": ".packager",
+    "pack_repository": ".packager",
+    "pack_batch": ".batch",
+    "PackResult": ".result",
+    "FileRecord": ".result",
+    "run_cli": ".cli",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import a public name from its module on first access.
+
+    Args:
+        name (str): The attribute name.
+
+    Returns:
+        Any: The public object.
+
+    Raises:
+        AttributeError: If the name is not part of the public API.
+    """
+    if name not in LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+# Type hints for lazily imported objects
 pack: callable
+pack_repository: callable
+pack_batch: callable
 run_cli: callable
 __version__: str
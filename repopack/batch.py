@@ -0,0 +1,204 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .config import deep_merge, merge_configs
+from .exceptions import ConfigurationError, RepopackError
+from .packager import pack
+from .utils.file_handler import create_executor, get_worker_count
+from .utils.logger import logger
+
+# A roots file line: a directory, optionally followed by a JSON object of config overrides
+ROOT_LINE_PATTERN = re.compile(r"^(.*?)(?:\s+(\{.*\}))?\s*$")
+
+
+def read_roots_file(roots_path: str) -> List[Dict[str, Any]]:
+    """
+    Read the directories to pack from a roots file.
+
+    Each non-empty line names a directory, relative to the roots file's directory
+    unless absolute, optionally followed by a JSON object of configuration overrides
+    for that directory. Lines starting with '#' are comments.
+
+    Args:
+        roots_path (str): The path to the roots file.
+
+    Returns:
+        List[Dict[str, Any]]: Targets with the 'root' directory and its 'config' overrides.
+
+    Raises:
+        ConfigurationError: If a line's overrides are not a valid JSON object.
+        IOError: If the roots file cannot be read.
+    """
+    base_dir = os.path.dirname(os.path.abspath(roots_path))
+    targets: List[Dict[str, Any]] = []
+    with open(roots_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            match = ROOT_LINE_PATTERN.match(line)
+            root, overrides = match.group(1), match.group(2)
+            try:
+                config = json.loads(overrides) if overrides else {}
+            except ValueError as e:
+                raise ConfigurationError(
+                    f"Invalid overrides on line {line_number} of {roots_path}: {str(e)}"
+                )
+            if not isinstance(config, dict):
+                raise ConfigurationError(
+                    f"Overrides on line {line_number} of {roots_path} must be a JSON object"
+                )
+            targets.append({"root": os.path.join(base_dir, root), "config": config})
+    return targets
+
+
+def pack_root(root_dir: str, config: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+    """
+    Pack one directory of a batch, recording failures instead of raising them.
+
+    Args:
+        root_dir (str): The root directory to pack.
+        config (Dict[str, Any]): The merged configuration for the directory.
+        output_path (str): The path to the output file.
+
+    Returns:
+        Dict[str, Any]: The directory's entry in the batch report.
+    """
+    start = time.perf_counter()
+    report: Dict[str, Any] = {"root": root_dir, "output": output_path}
+    try:
+        if not os.path.isdir(root_dir):
+            raise RepopackError(f"Not a directory: {root_dir}")
+        result = pack(root_dir, config, output_path)
+    except RepopackError as e:
+        report.update(status="error", error=str(e))
+    else:
+        report.update(
+            status="ok",
+            total_files=result["total_files"],
+            total_characters=result["total_characters"],
+            total_tokens=result.get("total_tokens"),
+            skipped_files=len(result.get("skipped_files", [])),
+            truncated_files=len(result.get("truncated_files", [])),
+        )
+    report["elapsed"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def get_output_name(root_dir: str, config: Dict[str, Any], used_names: Set[str]) -> str:
+    """
+    Get a unique output file name for a directory written to a shared output directory.
+
+    Args:
+        root_dir (str): The root directory being packed.
+        config (Dict[str, Any]): The merged configuration for the directory.
+        used_names (Set[str]): Names already taken; the returned name is added to it.
+
+    Returns:
+        str: The directory's name with the extension of its configured output file,
+            suffixed with a number if another directory has the same name.
+    """
+    _, extension = os.path.splitext(config["output"]["file_path"])
+    stem = os.path.basename(os.path.normpath(root_dir)) or "root"
+    name = stem + extension
+    counter = 2
+    while name in used_names:
+        name = f"{stem}-{counter}{extension}"
+        counter += 1
+    used_names.add(name)
+    return name
+
+
+def pack_batch(
+    targets: List[Dict[str, Any]],
+    file_config: Optional[Dict[str, Any]] = None,
+    jobs: int = 0,
+    output_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Pack many directories in one process, spreading them across a worker pool.
+
+    Directories are packed in parallel, each with serial file processing unless its
+    overrides set 'processing.jobs', so the pool is not oversubscribed. Work shared
+    between directories, such as compiled ignore patterns, encoding overrides and
+    tokenizers, is reused within each worker process. A failure in one directory
+    is recorded in the report and does not stop the others.
+
+    Args:
+        targets (List[Dict[str, Any]]): Directories to pack, each with a 'root' path and
+            optional 'config' overrides applied on top of file_config.
+        file_config (Optional[Dict[str, Any]]): Configuration shared by every directory.
+        jobs (int): Number of directories packed in parallel; 0 for one per CPU.
+        output_dir (Optional[str]): Directory receiving every output file, named after the
+            packed directories. Defaults to writing each output file inside its directory
+            at the configured output path.
+
+    Returns:
+        Dict[str, Any]: The batch report, with one entry per directory under 'roots' in the
+            order of targets, and totals over the directories packed successfully.
+    """
+    start = time.perf_counter()
+    base_config = merge_configs(file_config or {}, {"processing": {"jobs": jobs}})
+    workers = min(get_worker_count(base_config), max(len(targets), 1))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    reports: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+    tasks: List[Tuple[int, str, Dict[str, Any], str]] = []
+    used_names: Set[str] = set()
+    for index, target in enumerate(targets):
+        root_dir = os.path.abspath(target["root"])
+        try:
+            overrides = deep_merge({"processing": {"jobs": 1}}, target.get("config") or {})
+            config = merge_configs(file_config or {}, overrides)
+        except ConfigurationError as e:
+            reports[index] = {"root": root_dir, "status": "error", "error": str(e)}
+            continue
+        if output_dir:
+            output_path = os.path.join(output_dir, get_output_name(root_dir, config, used_names))
+        else:
+            output_path = os.path.join(root_dir, config["output"]["file_path"])
+        tasks.append((index, root_dir, config, os.path.abspath(output_path)))
+
+    logger.info(f"Packing {len(tasks)} directories with {workers} workers")
+    if workers == 1:
+        for index, root_dir, config, output_path in tasks:
+            reports[index] = pack_root(root_dir, config, output_path)
+    else:
+        with create_executor(base_config, workers) as executor:
+            futures: List[Tuple[int, Future]] = [
+                (index, executor.submit(pack_root, root_dir, config, output_path))
+                for index, root_dir, config, output_path in tasks
+            ]
+            for index, future in futures:
+                reports[index] = future.result()
+
+    packed = [report for report in reports if report["status"] == "ok"]
+    token_counts = [
+        report["total_tokens"] for report in packed if report["total_tokens"] is not None
+    ]
+    return {
+        "roots": reports,
+        "total_roots": len(reports),
+        "failed_roots": len(reports) - len(packed),
+        "total_files": sum(report["total_files"] for report in packed),
+        "total_characters": sum(report["total_characters"] for report in packed),
+        "total_tokens": sum(token_counts) if token_counts else None,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+
+def write_report(report: Dict[str, Any], report_path: str) -> None:
+    """
+    Write a batch report as JSON.
+
+    Args:
+        report (Dict[str, Any]): The report returned by pack_batch().
+        report_path (str): The path to the report file.
+    """
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
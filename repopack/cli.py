@@ -2,21 +2,169 @@ import argparse
 import logging
 import os
 import sys
-from typing import Dict, Any
-from .packager import pack
-from .config import load_config, merge_configs
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from .config import load_config, merge_configs, parse_size
 from .exceptions import RepopackError, ConfigurationError
-from .utils.cli_output import print_summary, print_completion
+from .utils.cli_output import print_batch_summary, print_summary, print_completion
 from .utils.logger import logger
+from .utils.profiler import profiler, write_stats_json
 from .utils.spinner import Spinner
 from .version import __version__
 
+# The packing pipeline is imported by the commands that run it, so that
+# 'repopack --version' and argument errors do not pay for loading it
+if TYPE_CHECKING:
+    from .session import PackSession
+
+
+def size_argument(value: str) -> int:
+    """
+    Parse a size command-line argument such as '512K' or '10MB'.
+
+    Args:
+        value (str): The argument value.
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a valid size.
+    """
+    try:
+        return parse_size(value)
+    except ConfigurationError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def write_profile(profile_config: Dict[str, Any], pack_result: Dict[str, Any]) -> None:
+    """
+    Write the profiler's trace and statistics files, if configured, and stop profiling.
+
+    Args:
+        profile_config (Dict[str, Any]): The 'profile' configuration section.
+        pack_result (Dict[str, Any]): The statistics returned by pack().
+    """
+    if not profiler.enabled:
+        return
+    profiler.disable()
+    try:
+        if profile_config.get("trace_path"):
+            profiler.write_trace(profile_config["trace_path"])
+            logger.info(f"Profile trace written to {profile_config['trace_path']}")
+        if profile_config.get("stats_path"):
+            write_stats_json(profile_config["stats_path"], pack_result)
+            logger.info(f"Statistics written to {profile_config['stats_path']}")
+    except OSError as e:
+        logger.warning(f"Could not write profiling output: {str(e)}")
+
+
+def run_serve_cli(argv: List[str]) -> None:
+    """
+    Entry point for 'repopack serve', which answers pack requests from warm sessions.
+
+    Args:
+        argv (List[str]): The command-line arguments after 'serve'.
+    """
+    from .server import DEFAULT_MAX_SESSIONS, serve
+
+    parser = argparse.ArgumentParser(
+        prog="repopack serve",
+        description="Serve pack requests over a local HTTP endpoint or a Unix socket",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument(
+        "--token-file",
+        help="Write the token TCP clients must send to this file instead of logging it",
+    )
+    parser.add_argument("-c", "--config", help="Path to a custom config file")
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=DEFAULT_MAX_SESSIONS,
+        help="Maximum number of warm root directories to keep in memory",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args(argv)
+
+    logger.set_verbose(args.verbose)
+
+    try:
+        config: Dict[str, Any] = load_config(args.config)
+    except (ConfigurationError, IOError) as e:
+        logger.error(f"Configuration file error: {str(e)}")
+        sys.exit(1)
+
+    try:
+        serve(config, args.host, args.port, args.socket, args.max_sessions, args.token_file)
+    except OSError as e:
+        logger.error(f"Cannot start the server: {str(e)}")
+        sys.exit(1)
+
+
+def run_batch_cli(argv: List[str]) -> None:
+    """
+    Entry point for 'repopack batch', which packs every directory listed in a roots file.
+
+    Args:
+        argv (List[str]): The command-line arguments after 'batch'.
+    """
+    from .batch import pack_batch, read_roots_file, write_report
+
+    parser = argparse.ArgumentParser(
+        prog="repopack batch",
+        description="Pack many directories in one run, in parallel",
+    )
+    parser.add_argument(
+        "roots_file",
+        help="File listing one directory per line, each optionally followed by a JSON object "
+        "of config overrides",
+    )
+    parser.add_argument("-c", "--config", help="Path to a custom config file")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=0,
+        help="Directories packed in parallel (0 for one per CPU)",
+    )
+    parser.add_argument(
+        "--output-dir", help="Write every output file to this directory, named after its directory"
+    )
+    parser.add_argument("--report", help="Write the aggregate statistics as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args(argv)
+
+    logger.set_verbose(args.verbose)
+
+    try:
+        config: Dict[str, Any] = load_config(args.config)
+        targets = read_roots_file(args.roots_file)
+    except (ConfigurationError, IOError) as e:
+        logger.error(f"Error reading batch configuration: {str(e)}")
+        sys.exit(1)
+
+    report = pack_batch(targets, config, args.jobs, args.output_dir)
+    if args.report:
+        write_report(report, args.report)
+    print_batch_summary(report)
+    if report["failed_roots"]:
+        sys.exit(1)
+
 
 def run_cli() -> None:
     """
     Main entry point for the RepopackPy CLI.
     Parses command-line arguments, loads and merges configurations, and executes the packing process.
     """
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        run_serve_cli(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        run_batch_cli(sys.argv[2:])
+        return
+
     # Set up argument parser
     parser = argparse.ArgumentParser(
         description="RepopackPy - Pack your repository into a single AI-friendly file"
@@ -35,12 +183,113 @@ def run_cli() -> None:
         action="store_true",
         help="Add line numbers to each line in the output",
     )
+    parser.add_argument(
+        "--output-remove-comments",
+        action="store_true",
+        help="Remove comments from Python, C-family, JavaScript, HTML and CSS files",
+    )
     parser.add_argument(
         "--output-style",
         choices=["plain", "xml"],
         default="plain",
         help="Specify the output style (plain or xml)",
     )
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="Number of parallel workers (0 for one per CPU)"
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        help="Worker pool type for file processing (thread or process)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the persistent content cache"
+    )
+    parser.add_argument(
+        "--max-file-size",
+        type=size_argument,
+        help="Skip files larger than this size (e.g. 512K, 10MB)",
+    )
+    parser.add_argument(
+        "--max-total-size",
+        type=size_argument,
+        help="Leave out files that would take the total size past this limit (e.g. 100MB)",
+    )
+    parser.add_argument(
+        "--count-tokens", action="store_true", help="Count tokens in the packed files"
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Only pack the highest-ranked files that fit in this many tokens",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=["estimate", "bpe"],
+        help="Tokenizer used for token counts (estimate or bpe)",
+    )
+    parser.add_argument(
+        "--vocab-file", help="Local tiktoken-format vocab file for the bpe tokenizer"
+    )
+    parser.add_argument(
+        "--from-git",
+        action="store_true",
+        help="Pack the files tracked in the git index instead of walking the directory",
+    )
+    parser.add_argument(
+        "--git-ref",
+        help="Pack the files of a git commit, branch or tag from the object store "
+        "(implies --from-git)",
+    )
+    parser.add_argument(
+        "--since", help="Only pack files added, modified or renamed since this git ref"
+    )
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Only pack files with uncommitted changes (same as --since HEAD)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rewrite the output whenever files change",
+    )
+    parser.add_argument(
+        "--split-size",
+        type=size_argument,
+        help="Split the output into shards of at most this size (e.g. 100K), with a manifest",
+    )
+    parser.add_argument(
+        "--split-by",
+        choices=["chars", "bytes", "tokens"],
+        help="Unit of --split-size (chars, bytes or tokens)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=["gzip", "bz2", "xz", "zstd"],
+        help="Compress the output while writing it (zstd needs the zstandard package)",
+    )
+    parser.add_argument("--compress-level", type=int, help="Compression level for --compress")
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Write files identical to an earlier file as a reference to it",
+    )
+    parser.add_argument(
+        "--dedup-hash",
+        choices=["fast", "sha256"],
+        help="Content hash used by --dedup (fast or sha256)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="TRACE_JSON",
+        help="Write a Chrome/Perfetto trace of the packing stages to this file",
+    )
+    parser.add_argument(
+        "--stats-json",
+        metavar="STATS_JSON",
+        help="Write packing statistics, stage timings and counters as JSON to this file",
+    )
     args = parser.parse_args()
 
     # Set verbosity level
@@ -70,9 +319,78 @@ def run_cli() -> None:
     if args.output_show_line_numbers:
         cli_config["output"] = cli_config.get("output", {})
         cli_config["output"]["show_line_numbers"] = True
+    if args.output_remove_comments:
+        cli_config["output"] = cli_config.get("output", {})
+        cli_config["output"]["remove_comments"] = True
     if args.output_style:
         cli_config["output"] = cli_config.get("output", {})
         cli_config["output"]["style"] = args.output_style
+    if args.jobs is not None:
+        cli_config["processing"] = cli_config.get("processing", {})
+        cli_config["processing"]["jobs"] = args.jobs
+    if args.executor:
+        cli_config["processing"] = cli_config.get("processing", {})
+        cli_config["processing"]["executor"] = args.executor
+    if args.no_cache:
+        cli_config["cache"] = {"enabled": False}
+    if args.max_file_size is not None:
+        cli_config["processing"] = cli_config.get("processing", {})
+        cli_config["processing"]["max_file_size"] = args.max_file_size
+    if args.max_total_size is not None:
+        cli_config["processing"] = cli_config.get("processing", {})
+        cli_config["processing"]["max_total_size"] = args.max_total_size
+    if args.count_tokens:
+        cli_config["tokens"] = cli_config.get("tokens", {})
+        cli_config["tokens"]["enabled"] = True
+    if args.token_budget is not None:
+        cli_config["tokens"] = cli_config.get("tokens", {})
+        cli_config["tokens"]["budget"] = args.token_budget
+    if args.tokenizer:
+        cli_config["tokens"] = cli_config.get("tokens", {})
+        cli_config["tokens"]["tokenizer"] = args.tokenizer
+    if args.vocab_file:
+        cli_config["tokens"] = cli_config.get("tokens", {})
+        cli_config["tokens"]["vocab_file"] = args.vocab_file
+    if args.from_git:
+        cli_config["git"] = cli_config.get("git", {})
+        cli_config["git"]["from_git"] = True
+    if args.git_ref:
+        cli_config["git"] = cli_config.get("git", {})
+        cli_config["git"]["from_git"] = True
+        cli_config["git"]["ref"] = args.git_ref
+    if args.since:
+        cli_config["git"] = cli_config.get("git", {})
+        cli_config["git"]["since"] = args.since
+    if args.changed_only:
+        cli_config["git"] = cli_config.get("git", {})
+        cli_config["git"]["changed_only"] = True
+    if args.watch:
+        cli_config["watch"] = cli_config.get("watch", {})
+        cli_config["watch"]["enabled"] = True
+    if args.split_size is not None:
+        cli_config["split"] = cli_config.get("split", {})
+        cli_config["split"]["max_size"] = args.split_size
+    if args.split_by:
+        cli_config["split"] = cli_config.get("split", {})
+        cli_config["split"]["unit"] = args.split_by
+    if args.compress:
+        cli_config["compression"] = cli_config.get("compression", {})
+        cli_config["compression"]["format"] = args.compress
+    if args.compress_level is not None:
+        cli_config["compression"] = cli_config.get("compression", {})
+        cli_config["compression"]["level"] = args.compress_level
+    if args.dedup:
+        cli_config["dedup"] = cli_config.get("dedup", {})
+        cli_config["dedup"]["enabled"] = True
+    if args.dedup_hash:
+        cli_config["dedup"] = cli_config.get("dedup", {})
+        cli_config["dedup"]["hash"] = args.dedup_hash
+    if args.profile:
+        cli_config["profile"] = cli_config.get("profile", {})
+        cli_config["profile"]["trace_path"] = args.profile
+    if args.stats_json:
+        cli_config["profile"] = cli_config.get("profile", {})
+        cli_config["profile"]["stats_path"] = args.stats_json
 
     # Merge configurations
     try:
@@ -90,25 +408,58 @@ def run_cli() -> None:
     else:
         final_output_path = os.path.join(os.getcwd(), merged_config["output"]["file_path"])
 
+    from .output_generator import get_manifest_path
+    from .packager import pack
+    from .session import PackSession
+    from .utils.compression import get_compressed_path
+
     # Initialize spinner for visual feedback
     spinner = Spinner("Packing files...")
+    session: Optional["PackSession"] = None
+    profile_config: Dict[str, Any] = merged_config.get("profile", {})
+    if profile_config.get("trace_path") or profile_config.get("stats_path"):
+        profiler.enable()
     try:
         spinner.start()
-        # Execute packing process
-        pack_result: Dict[str, Any] = pack(
-            os.path.abspath(args.directory), merged_config, final_output_path
-        )
+        # Execute packing process, keeping the state in memory when watching
+        if merged_config.get("watch", {}).get("enabled"):
+            session = PackSession(os.path.abspath(args.directory), merged_config, final_output_path)
+            pack_result: Dict[str, Any] = session.pack()
+        else:
+            pack_result = pack(os.path.abspath(args.directory), merged_config, final_output_path)
         spinner.succeed("Packing completed successfully!")
 
         # Print summary and completion message
+        output_display: str = get_compressed_path(
+            merged_config["output"]["file_path"], merged_config
+        )
+        if isinstance(pack_result.get("shards"), list):
+            output_display = (
+                f"{get_manifest_path(output_display)} ({len(pack_result['shards'])} shards)"
+            )
         print_summary(
             pack_result["total_files"],
             pack_result["total_characters"],
-            merged_config["output"]["file_path"],
+            output_display,
             pack_result["file_char_counts"],
             merged_config["output"]["top_files_length"],
+            pack_result.get("skipped_files"),
+            pack_result.get("truncated_files"),
+            pack_result.get("total_tokens"),
+            pack_result.get("token_excluded_files"),
+            pack_result.get("duplicate_files"),
+            pack_result.get("dedup_bytes_saved"),
+            pack_result.get("comment_bytes_removed"),
         )
         print_completion()
+        write_profile(profile_config, pack_result)
+
+        if session is not None:
+            logger.info("Watching for changes, press Ctrl+C to stop")
+            try:
+                session.watch()
+            except KeyboardInterrupt:
+                logger.info("Stopped watching")
     except RepopackError as e:
         spinner.fail(f"Error during packing: {str(e)}")
         logger.error(str(e))
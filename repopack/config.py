@@ -1,8 +1,25 @@
+import copy
 import json
+import re
 from typing import Dict, Any, Optional
 from .exceptions import ConfigurationError
 
 
+# Multipliers for size suffixes accepted by parse_size
+SIZE_UNITS: Dict[str, int] = {
+    "": 1,
+    "b": 1,
+    "k": 1024,
+    "kb": 1024,
+    "m": 1024**2,
+    "mb": 1024**2,
+    "g": 1024**3,
+    "gb": 1024**3,
+}
+
+# List settings that a configuration replaces instead of extending
+REPLACED_LIST_KEYS = {"default_encodings"}
+
 # Default configuration for RepopackPy
 DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
     "output": {
@@ -19,6 +36,63 @@ DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
         "use_default_patterns": True,
         "custom_patterns": [],
     },
+    "processing": {
+        "jobs": 0,
+        "executor": "thread",
+        "mmap_threshold": 1024 * 1024,
+        "max_file_size": 0,
+        "max_total_size": 0,
+    },
+    "cache": {
+        "enabled": True,
+        # Empty for a database per directory in the user's cache directory
+        "path": "",
+        "max_size": 256 * 1024 * 1024,
+    },
+    "encoding": {
+        "default_encodings": ["utf-8"],
+        "overrides": {},
+        "detection_sample_size": 64 * 1024,
+    },
+    "tokens": {
+        "enabled": False,
+        "tokenizer": "estimate",
+        "vocab_file": "",
+        "budget": 0,
+        "priority": [],
+        "rank_by": "size",
+    },
+    "git": {
+        "from_git": False,
+        "ref": "",
+        "since": "",
+        "changed_only": False,
+    },
+    "watch": {
+        "enabled": False,
+        "debounce": 0.2,
+        "poll_interval": 0.5,
+        "backend": "auto",
+    },
+    "split": {
+        "max_size": 0,
+        "unit": "chars",
+    },
+    "compression": {
+        "format": "",
+        "level": None,
+        "threads": 0,
+    },
+    "dedup": {
+        "enabled": False,
+        # 'fast' is xxHash with the 'fast-hash' extra (pip install repopack[fast-hash]),
+        # BLAKE2b otherwise; 'sha256' is also accepted
+        "hash": "fast",
+    },
+    "profile": {
+        "trace_path": "",
+        "stats_path": "",
+    },
 }
 
 
@@ -61,9 +135,10 @@ def merge_configs(file_config: Dict[str, Any], cli_config: Dict[str, Any]) -> Di
         ConfigurationError: If there's an error during the merging process.
     """
     try:
-        merged = DEFAULT_CONFIG.copy()
-        merged = deep_merge(merged, file_config)
-        merged = deep_merge(merged, cli_config)
+        # Copy deeply so that merging never mutates the defaults or the given configurations
+        merged = copy.deepcopy(DEFAULT_CONFIG)
+        merged = deep_merge(merged, copy.deepcopy(file_config))
+        merged = deep_merge(merged, copy.deepcopy(cli_config))
         return merged
     except Exception as e:
         raise ConfigurationError(f"Error merging configurations: {str(e)}")
@@ -73,6 +148,8 @@ def deep_merge(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
     """
     Recursively merge two dictionaries.
 
+    Lists are extended, except for the settings in REPLACED_LIST_KEYS, which are replaced.
+
     Args:
         dict1 (Dict[str, Any]): First dictionary to merge.
         dict2 (Dict[str, Any]): Second dictionary to merge.
@@ -84,7 +161,7 @@ def deep_merge(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
         if key in dict1:
             if isinstance(dict1[key], dict) and isinstance(value, dict):
                 deep_merge(dict1[key], value)
-            elif isinstance(dict1[key], list):
+            elif isinstance(dict1[key], list) and key not in REPLACED_LIST_KEYS:
                 if isinstance(value, list):
                     dict1[key].extend(value)
                 else:
@@ -94,3 +171,22 @@ def deep_merge(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
         else:
             dict1[key] = value
     return dict1
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a human-readable size such as '512K', '10MB' or '1048576' into bytes.
+
+    Args:
+        value (str): The size string; suffixes are binary multiples and case-insensitive.
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ConfigurationError: If the value is not a valid size.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", str(value))
+    if not match or match.group(2).lower() not in SIZE_UNITS:
+        raise ConfigurationError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
@@ -40,8 +40,15 @@ class FileProcessingError(RepopackError):
             file_path (str): The path of the file that caused the error.
             error_message (str): The specific error message.
         """
+        self.file_path: str = file_path
+        self.error_message: str = error_message
         super().__init__(f"Error processing file '{file_path}': {error_message}")
 
+    def __reduce__(self):
+        # Rebuild from the original arguments so the error survives pickling
+        # when it is raised inside a worker process.
+        return (self.__class__, (self.file_path, self.error_message))
+
 
 class OutputGenerationError(RepopackError):
     """Raised when there's an error generating the output."""
@@ -54,3 +61,16 @@ class OutputGenerationError(RepopackError):
             error_message (str): The specific error message related to output generation.
         """
         super().__init__(f"Error generating output: {error_message}")
+
+
+class GitError(RepopackError):
+    """Raised when the git index or object store cannot be read."""
+
+    def __init__(self, error_message: str) -> None:
+        """
+        Initialize the GitError.
+
+        Args:
+            error_message (str): The specific error message related to reading git data.
+        """
+        super().__init__(f"Git error: {error_message}")
@@ -1,66 +1,523 @@
+import io
+import json
 import os
+import posixpath
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Callable, Deque, Dict, Any, Iterable, List, Optional, TextIO, Tuple
 import xml.dom.minidom as minidom
 import xml.etree.ElementTree as ET
-from .exceptions import OutputGenerationError
+from .config import parse_size
+from .exceptions import ConfigurationError, FileProcessingError, OutputGenerationError
+from .utils.compression import get_compressed_path, get_compression_format, open_compressor
+from .utils.file_handler import get_worker_count
+from .utils.tokenizer import EstimateTokenizer, create_tokenizer
+from .utils.profiler import profiler
 from .utils.tree_generator import generate_tree_string
 
 PLAIN_SEPARATOR = "=" * 16
 PLAIN_LONG_SEPARATOR = "=" * 64
 
+# Write buffer size for the output file
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Units that the size of output shards can be measured in
+SPLIT_UNITS = ("chars", "bytes", "tokens")
+
+
+class StrippedWriter:
+    """
+    A write-through wrapper that produces the same text as ``text.strip() + "\n"``.
+
+    Leading whitespace is dropped and trailing whitespace is held back until more
+    non-whitespace text arrives, so a document can be streamed to a file handle
+    without first being built as a single string.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        """
+        Initialize the StrippedWriter.
+
+        Args:
+            stream (TextIO): The text stream to write to.
+        """
+        self.stream: TextIO = stream
+        self.started: bool = False
+        self.pending: str = ""
+
+    def write(self, text: str) -> None:
+        """
+        Write text to the underlying stream.
+
+        Args:
+            text (str): The text to write.
+        """
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return
+            self.started = True
+        if not text:
+            return
+        if text[-1].isspace():
+            body = text.rstrip()
+            if not body:
+                self.pending += text
+                return
+            self.stream.write(self.pending)
+            self.stream.write(body)
+            self.pending = text[len(body) :]
+        else:
+            if self.pending:
+                self.stream.write(self.pending)
+                self.pending = ""
+            self.stream.write(text)
+
+    def close(self) -> None:
+        """Finish the document with a single trailing newline."""
+        self.pending = ""
+        self.stream.write("\n")
+
 
 def generate_output(
     root_dir: str,
     config: Dict[str, Any],
-    sanitized_files: List[Dict[str, str]],
+    sanitized_files: Iterable[Dict[str, str]],
     all_file_paths: List[str],
     output_path: str,
+    tree_string: Optional[str] = None,
 ) -> None:
     """
     Generate the output file based on the specified configuration.
 
+    The output is streamed to a buffered temporary file as sanitized files become
+    available, and moved into place once complete.
+
     Args:
         root_dir (str): The root directory of the repository.
         config (Dict[str, Any]): The configuration dictionary.
-        sanitized_files (List[Dict[str, str]]): List of sanitized file contents.
+        sanitized_files (Iterable[Dict[str, str]]): Sanitized file contents, consumed lazily.
         all_file_paths (List[str]): List of all file paths in the repository.
         output_path (str): The path to the output file.
+        tree_string (Optional[str]): A previously rendered tree of all_file_paths to reuse.
+            Defaults to None.
 
     Raises:
+        ConfigurationError: If the configured compression is unavailable.
         OutputGenerationError: If there's an error during output generation.
+        FileProcessingError: If there's an error processing a file while streaming.
     """
-    common_data = generate_common_data(config, all_file_paths, sanitized_files)
+    try:
+        write_output_file(config, sanitized_files, all_file_paths, output_path, tree_string)
+    except (ConfigurationError, FileProcessingError):
+        raise
+    except Exception as e:
+        raise OutputGenerationError(f"Error generating output: {str(e)}")
+
+
+def write_output_file(
+    config: Dict[str, Any],
+    sanitized_files: Iterable[Dict[str, str]],
+    all_file_paths: List[str],
+    output_path: str,
+    tree_string: Optional[str] = None,
+) -> None:
+    """
+    Write an output document to a buffered temporary file and move it into place.
 
+    If compression is configured, the document is compressed while it is written
+    and the format's suffix is appended to output_path.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+        sanitized_files (Iterable[Dict[str, str]]): Sanitized file contents, consumed lazily.
+        all_file_paths (List[str]): List of all file paths in the repository.
+        output_path (str): The path to the output file.
+        tree_string (Optional[str]): A previously rendered tree of all_file_paths to reuse.
+            Defaults to None.
+    """
+    output_path = get_compressed_path(output_path, config)
+    temp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        if config["output"]["style"] == "xml":
-            output = generate_xml_output(common_data)
+        with profiler.stage("output_write"):
+            if get_compression_format(config):
+                # Compress as the document is rendered, instead of in a second pass over the file
+                with open(temp_path, "wb", buffering=OUTPUT_BUFFER_SIZE) as raw:
+                    with io.TextIOWrapper(open_compressor(raw, config), encoding="utf-8") as f:
+                        render_output(config, sanitized_files, all_file_paths, f, tree_string)
+            else:
+                with open(temp_path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+                    render_output(config, sanitized_files, all_file_paths, f, tree_string)
+            os.replace(temp_path, output_path)
+        if profiler.enabled:
+            profiler.count("bytes_written", os.path.getsize(output_path))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def render_output(
+    config: Dict[str, Any],
+    sanitized_files: Iterable[Dict[str, str]],
+    all_file_paths: List[str],
+    stream: TextIO,
+    tree_string: Optional[str] = None,
+) -> None:
+    """
+    Write the output document in the configured style to a text stream.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+        sanitized_files (Iterable[Dict[str, str]]): Sanitized file contents, consumed lazily.
+        all_file_paths (List[str]): List of all file paths in the repository.
+        stream (TextIO): The text stream to write to.
+        tree_string (Optional[str]): A previously rendered tree of all_file_paths to reuse.
+            Defaults to None.
+    """
+    common_data = generate_common_data(config, all_file_paths, sanitized_files, tree_string)
+    write_output: Callable[[Dict[str, Any], TextIO], None]
+    if config["output"]["style"] == "xml":
+        write_output = write_xml_output
+    else:
+        write_output = write_plain_output
+    write_output(common_data, stream)
+
+
+def get_shard_path(output_path: str, index: int) -> str:
+    """
+    Get the path of an output shard.
+
+    Args:
+        output_path (str): The path of the unsplit output file.
+        index (int): The 1-based shard number.
+
+    Returns:
+        str: The output path with the shard number before the extension.
+    """
+    base, extension = os.path.splitext(output_path)
+    return f"{base}-{index}{extension}"
+
+
+def get_manifest_path(output_path: str) -> str:
+    """
+    Get the path of the manifest listing the shards of an output file.
+
+    Args:
+        output_path (str): The path of the unsplit output file.
+
+    Returns:
+        str: The manifest path.
+    """
+    return f"{os.path.splitext(output_path)[0]}-manifest.json"
+
+
+def create_size_measure(config: Dict[str, Any]) -> Callable[[str], int]:
+    """
+    Create the function measuring text in the configured shard size unit.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Callable[[str], int]: A function returning the size of a text.
+
+    Raises:
+        ConfigurationError: If the unit is unknown.
+    """
+    unit: str = config.get("split", {}).get("unit", "chars")
+    if unit == "chars":
+        return len
+    if unit == "bytes":
+        return lambda text: len(text) if text.isascii() else len(text.encode("utf-8"))
+    if unit == "tokens":
+        tokens_config: Dict[str, Any] = config.get("tokens", {})
+        tokenizer = create_tokenizer(
+            tokens_config.get("tokenizer", EstimateTokenizer.name), tokens_config.get("vocab_file")
+        )
+        return tokenizer.count
+    raise ConfigurationError(
+        f"Unknown split unit: {unit} (expected one of {', '.join(SPLIT_UNITS)})"
+    )
+
+
+class ShardWriter:
+    """
+    Splits the output into shards of a maximum size while files are streamed in.
+
+    Each shard is a complete output document with the full repository structure.
+    Files are placed one directory at a time, so a directory's files share a
+    shard unless they cannot fit in one. A shard is handed to a worker thread to
+    be written as soon as it is full, while the next one fills.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        all_file_paths: List[str],
+        output_path: str,
+        tree_string: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the ShardWriter.
+
+        Args:
+            config (Dict[str, Any]): The configuration dictionary.
+            all_file_paths (List[str]): List of all file paths in the repository.
+            output_path (str): The path of the unsplit output file, which shard paths derive from.
+            tree_string (Optional[str]): A previously rendered tree of all_file_paths to reuse.
+                Defaults to None.
+
+        Raises:
+            ConfigurationError: If the split configuration is invalid, or the maximum size
+                leaves no room for files after the header and repository structure.
+        """
+        split_config: Dict[str, Any] = config.get("split", {})
+        self.config: Dict[str, Any] = config
+        self.all_file_paths: List[str] = all_file_paths
+        self.output_path: str = output_path
+        self.tree_string: str = (
+            tree_string if tree_string is not None else generate_tree_string(all_file_paths)
+        )
+        self.style: str = config["output"]["style"]
+        self.unit: str = split_config.get("unit", "chars")
+        self.max_size: int = parse_size(split_config.get("max_size", 0))
+        self.measure: Callable[[str], int] = create_size_measure(config)
+
+        empty_document = io.StringIO()
+        render_output(config, [], all_file_paths, empty_document, self.tree_string)
+        self.base_size: int = self.measure(empty_document.getvalue())
+        self.capacity: int = self.max_size - self.base_size
+        if self.capacity <= 0:
+            raise ConfigurationError(
+                f"Split size {self.max_size} {self.unit} does not fit the header and repository "
+                f"structure ({self.base_size} {self.unit})"
+            )
+
+        self.current: List[Dict[str, str]] = []
+        self.current_size: int = 0
+        self.group: List[Tuple[Dict[str, str], int]] = []
+        self.group_size: int = 0
+        self.group_dir: Optional[str] = None
+        self.shards: List[Dict[str, Any]] = []
+        self.files: Dict[str, int] = {}
+
+        self.workers: int = get_worker_count(config)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.pending: Deque[Future] = deque()
+
+    def measure_file(self, file: Dict[str, Any]) -> int:
+        """
+        Measure the space a file takes in a shard.
+
+        Args:
+            file (Dict[str, Any]): The sanitized file.
+
+        Returns:
+            int: The size of the file's entry, in the configured unit.
+        """
+        prefix, suffix = get_file_entry_parts(self.style, file["path"])
+        if self.unit == "tokens" and "tokens" in file:
+            content_size = file["tokens"]
         else:
-            output = generate_plain_output(common_data)
+            content_size = self.measure(file["content"])
+        return self.measure(prefix) + content_size + self.measure(suffix)
+
+    def add(self, file: Dict[str, Any]) -> None:
+        """
+        Add a file to the output.
+
+        Args:
+            file (Dict[str, Any]): The sanitized file.
+        """
+        directory = posixpath.dirname(file["path"])
+        if directory != self.group_dir:
+            self.place_group()
+            self.group_dir = directory
+        size = self.measure_file(file)
+        self.group.append((file, size))
+        self.group_size += size
+        # A directory too large for one shard is split anyway; place it without holding it all
+        if self.group_size > self.capacity:
+            self.place_group()
+
+    def place_group(self) -> None:
+        """Place the files of the current directory, starting a new shard if needed."""
+        if not self.group:
+            return
+        if self.current_size + self.group_size > self.capacity and self.group_size <= self.capacity:
+            self.finish_shard()
+        for file, size in self.group:
+            if self.current and self.current_size + size > self.capacity:
+                self.finish_shard()
+            self.current.append(file)
+            self.current_size += size
+        self.group = []
+        self.group_size = 0
+
+    def finish_shard(self) -> None:
+        """Hand the current shard to a worker to be written and start a new one."""
+        index = len(self.shards) + 1
+        shard_path = get_compressed_path(get_shard_path(self.output_path, index), self.config)
+        size = self.base_size + self.current_size
+        self.shards.append(
+            {
+                "path": os.path.basename(shard_path),
+                "files": len(self.current),
+                "size": size,
+                "oversized": size > self.max_size,
+            }
+        )
+        for file in self.current:
+            self.files[file["path"]] = index
+
+        # Bound the number of filled shards held in memory while waiting to be written
+        while len(self.pending) >= self.workers * 2:
+            self.pending.popleft().result()
+        self.pending.append(
+            self.executor.submit(
+                write_output_file,
+                self.config,
+                self.current,
+                self.all_file_paths,
+                shard_path,
+                self.tree_string,
+            )
+        )
+        self.current = []
+        self.current_size = 0
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Write the remaining shard and the manifest, and remove stale shards of a previous run.
+
+        Returns:
+            Dict[str, Any]: The manifest.
+        """
+        self.place_group()
+        if self.current or not self.shards:
+            self.finish_shard()
+        while self.pending:
+            self.pending.popleft().result()
+        self.executor.shutdown(wait=True)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(output)
+        index = len(self.shards) + 1
+        while True:
+            stale_path = get_compressed_path(get_shard_path(self.output_path, index), self.config)
+            if not os.path.exists(stale_path):
+                break
+            os.remove(stale_path)
+            index += 1
+
+        manifest = {
+            "unit": self.unit,
+            "max_size": self.max_size,
+            "shards": self.shards,
+            "files": self.files,
+        }
+        with open(get_manifest_path(self.output_path), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+        return manifest
+
+
+def generate_sharded_output(
+    config: Dict[str, Any],
+    sanitized_files: Iterable[Dict[str, str]],
+    all_file_paths: List[str],
+    output_path: str,
+    tree_string: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Generate the output split into shards of the configured maximum size, with a manifest.
+
+    Shards are numbered files next to output_path, and the manifest maps every
+    packed path to the number of the shard that holds it.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+        sanitized_files (Iterable[Dict[str, str]]): Sanitized file contents, consumed lazily.
+        all_file_paths (List[str]): List of all file paths in the repository.
+        output_path (str): The path of the unsplit output file.
+        tree_string (Optional[str]): A previously rendered tree of all_file_paths to reuse.
+            Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The manifest, with the 'shards' and the shard number of each path
+            under 'files'.
+
+    Raises:
+        ConfigurationError: If the split configuration is invalid.
+        OutputGenerationError: If there's an error during output generation.
+        FileProcessingError: If there's an error processing a file while streaming.
+    """
+    writer = ShardWriter(config, all_file_paths, output_path, tree_string)
+    try:
+        for file in sanitized_files:
+            writer.add(file)
+        return writer.close()
+    except (ConfigurationError, FileProcessingError, OutputGenerationError):
+        raise
     except Exception as e:
         raise OutputGenerationError(f"Error generating output: {str(e)}")
+    finally:
+        writer.executor.shutdown(wait=True)
 
 
 def generate_common_data(
     config: Dict[str, Any],
     all_file_paths: List[str],
-    sanitized_files: List[Dict[str, str]],
+    sanitized_files: Iterable[Dict[str, str]],
+    tree_string: Optional[str] = None,
 ) -> Dict[str, Any]:
     return {
         "generationDate": datetime.now().isoformat(),
-        "treeString": generate_tree_string(all_file_paths),
+        "treeString": (
+            tree_string if tree_string is not None else generate_tree_string(all_file_paths)
+        ),
         "sanitizedFiles": sanitized_files,
         "config": config,
     }
 
 
+def get_file_entry_parts(style: str, file_path: str) -> Tuple[str, str]:
+    """
+    Get the text written before and after a file's content in the output.
+
+    Args:
+        style (str): The output style ('plain' or 'xml').
+        file_path (str): The file path relative to the root directory.
+
+    Returns:
+        Tuple[str, str]: The text before and after the content.
+    """
+    if style == "xml":
+        return f'\n<file path="{file_path}">\n', "\n</file>\n"
+    return f"{PLAIN_SEPARATOR}\nFile: {file_path}\n{PLAIN_SEPARATOR}\n", "\n\n"
+
+
 def generate_plain_output(data: Dict[str, Any]) -> str:
+    buffer = io.StringIO()
+    write_plain_output(data, buffer)
+    return buffer.getvalue()
+
+
+def write_plain_output(data: Dict[str, Any], stream: TextIO) -> None:
+    writer = StrippedWriter(stream)
+    writer.write(generate_plain_header(data))
+    for file in data["sanitizedFiles"]:
+        prefix, suffix = get_file_entry_parts("plain", file["path"])
+        writer.write(prefix)
+        writer.write(file["content"])
+        writer.write(suffix)
+    writer.close()
+
+
+def generate_plain_header(data: Dict[str, Any]) -> str:
     generationDate = data["generationDate"]
     treeString = data["treeString"]
-    sanitizedFiles = data["sanitizedFiles"]
     config = data["config"]
 
     output = f"{PLAIN_LONG_SEPARATOR}\n"
@@ -118,19 +575,30 @@ def generate_plain_output(data: Dict[str, Any]) -> str:
     output += "Repository Files\n"
     output += f"{PLAIN_LONG_SEPARATOR}\n\n"
 
-    for file in sanitizedFiles:
-        output += f"{PLAIN_SEPARATOR}\n"
-        output += f"File: {file['path']}\n"
-        output += f"{PLAIN_SEPARATOR}\n"
-        output += f"{file['content']}\n\n"
-
-    return output.strip() + "\n"
+    return output
 
 
 def generate_xml_output(data: Dict[str, Any]) -> str:
+    buffer = io.StringIO()
+    write_xml_output(data, buffer)
+    return buffer.getvalue()
+
+
+def write_xml_output(data: Dict[str, Any], stream: TextIO) -> None:
+    writer = StrippedWriter(stream)
+    writer.write(generate_xml_header(data))
+    for file in data["sanitizedFiles"]:
+        prefix, suffix = get_file_entry_parts("xml", file["path"])
+        writer.write(prefix)
+        writer.write(file["content"])
+        writer.write(suffix)
+    writer.write("\n</repository_files>\n")
+    writer.close()
+
+
+def generate_xml_header(data: Dict[str, Any]) -> str:
     generationDate = data["generationDate"]
     treeString = data["treeString"]
-    sanitizedFiles = data["sanitizedFiles"]
     config = data["config"]
 
     xml = "<summary>\n\n"
@@ -183,11 +651,4 @@ def generate_xml_output(data: Dict[str, Any]) -> str:
     xml += "</repository_structure>\n\n"
     xml += "<repository_files>\n"
 
-    for file in sanitizedFiles:
-        xml += f"\n<file path=\"{file['path']}\">\n"
-        xml += f"{file['content']}\n"
-        xml += "</file>\n"
-
-    xml += "\n</repository_files>\n"
-
-    return xml.strip() + "\n"
+    return xml
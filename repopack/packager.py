@@ -1,10 +1,74 @@
 import os
-from typing import Dict, Any, List, Callable
-from .exceptions import RepopackError, FileProcessingError, OutputGenerationError
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from .config import merge_configs, parse_size
+from .exceptions import (
+    ConfigurationError,
+    RepopackError,
+    FileProcessingError,
+    OutputGenerationError,
+)
+from .result import FileRecord, PackResult, record_files
+from .utils.content_cache import ContentCache, open_content_cache
+from .utils.dedup import deduplicate_files
 from .utils.file_handler import sanitize_files
-from .utils.ignore_utils import get_all_ignore_patterns, create_ignore_filter
+from .utils.file_walker import filter_git_files, walk_directory
+from .utils.git_reader import find_changed_files
+from .utils.ignore_utils import IgnoreMatcher, create_ignore_matcher
 from .utils.logger import logger
-from .output_generator import generate_output
+from .utils.profiler import profiler
+from .utils.token_budget import select_within_budget
+from .utils.tokenizer import is_counting_enabled
+from .output_generator import generate_output, generate_sharded_output
+
+
+def finish_files(
+    files: Iterable[Dict[str, Any]], root_dir: str, config: Dict[str, Any], stats: Dict[str, Any]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Apply the stages that follow sanitization and complete the pack statistics.
+
+    Files over the token budget are left out and repeated contents are replaced with
+    references to their first occurrence. Once the yielded files are exhausted, stats
+    holds the statistics every way of packing reports: 'skipped_files',
+    'truncated_files' and 'comment_bytes_removed' as set by the size limits,
+    'token_excluded_files', 'total_tokens', 'duplicate_files' and 'dedup_bytes_saved'.
+
+    Args:
+        files (Iterable[Dict[str, Any]]): The sanitized files, in output order.
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+        stats (Dict[str, Any]): Statistics of the size limits, completed in place.
+
+    Yields:
+        Dict[str, Any]: The files to pack.
+    """
+    token_excluded_files: List[str] = []
+    # Fill the token budget greedily; this needs every file's token count up front
+    if config.get("tokens", {}).get("budget"):
+        with profiler.stage("token_budget"):
+            files, token_excluded_files = select_within_budget(list(files), root_dir, config)
+        logger.debug(f"Left out {len(token_excluded_files)} files over the token budget")
+
+    # Write repeated contents once, referring back to the first occurrence
+    dedup_stats: Dict[str, Any] = {}
+    if config.get("dedup", {}).get("enabled"):
+        files = deduplicate_files(files, config, dedup_stats)
+
+    total_tokens = 0
+    for file in files:
+        total_tokens += file.get("tokens") or 0
+        yield file
+
+    stats.setdefault("skipped_files", [])
+    stats.setdefault("truncated_files", [])
+    stats.setdefault("comment_bytes_removed", {})
+    stats["token_excluded_files"] = token_excluded_files
+    stats["total_tokens"] = total_tokens if is_counting_enabled(config) else None
+    stats["duplicate_files"] = dedup_stats.get("duplicate_files", {})
+    stats["dedup_bytes_saved"] = dedup_stats.get("dedup_bytes_saved", 0)
+    profiler.count("files_skipped.max_file_size", len(stats["skipped_files"]))
+    profiler.count("files_skipped.max_total_size", len(stats["truncated_files"]))
+    profiler.count("files_skipped.token_budget", len(token_excluded_files))
 
 
 def pack(root_dir: str, config: Dict[str, Any], output_path: str) -> Dict[str, Any]:
@@ -22,55 +86,145 @@ def pack(root_dir: str, config: Dict[str, Any], output_path: str) -> Dict[str, A
     Raises:
         RepopackError: If there's an error during the packing process.
     """
+    with profiler.stage("pack"):
+        return pack_repository(root_dir, config, output_path).to_dict()
+
+
+def pack_repository(
+    root_dir: str,
+    config: Optional[Dict[str, Any]] = None,
+    output_path: Optional[str] = None,
+    keep_content: bool = False,
+) -> PackResult:
+    """
+    Pack the contents of a directory, returning the packed files and their statistics.
+
+    Files are sanitized once and streamed to the output file if one is given. The
+    returned records only hold the sanitized content when keep_content is set;
+    otherwise it is loaded again from the source when read, keeping memory use
+    independent of the repository size.
+
+    Args:
+        root_dir (str): The root directory to pack.
+        config (Optional[Dict[str, Any]]): The configuration dictionary. Defaults to the
+            default configuration.
+        output_path (Optional[str]): The path to the output file, or None to skip writing it.
+        keep_content (bool): Whether to keep the sanitized content in memory, so rendering
+            the result does not read the files again. Defaults to False.
+
+    Returns:
+        PackResult: The packed files and statistics about them.
+
+    Raises:
+        RepopackError: If there's an error during the packing process.
+    """
+    if config is None:
+        config = merge_configs({}, {})
     logger.debug(f"Starting packing process for directory: {root_dir}")
     logger.debug(f"Configuration: {config}")
 
     try:
-        # Get ignore patterns and create ignore filter
-        ignore_patterns: List[str] = get_all_ignore_patterns(root_dir, config)
-        logger.debug(f"Ignore patterns: {ignore_patterns}")
-        ignore_filter: Callable[[str], bool] = create_ignore_filter(ignore_patterns)
-
-        # Collect all file paths
-        all_file_paths: List[str] = []
-        for root, _, files in os.walk(root_dir):
-            for file in files:
-                file_path: str = os.path.relpath(os.path.join(root, file), root_dir)
-                if ignore_filter(file_path):
-                    all_file_paths.append(file_path)
-                    logger.trace(f"Including file: {file_path}")
-                else:
-                    logger.trace(f"Ignoring file: {file_path}")
-
-        logger.info(f"Total files to process: {len(all_file_paths)}")
-
-        # Sanitize files
-        sanitized_files: List[Dict[str, str]] = sanitize_files(all_file_paths, root_dir, config)
-        logger.debug(f"Sanitized {len(sanitized_files)} files")
-
-        # Count characters in each file
-        file_char_counts: Dict[str, int] = {
-            file["path"]: len(file["content"]) for file in sanitized_files
-        }
-
-        # Generate output
-        logger.debug("Generating output")
-        generate_output(root_dir, config, sanitized_files, all_file_paths, output_path)
-
-        # Calculate statistics
-        total_files: int = len(sanitized_files)
-        total_characters: int = sum(len(file["content"]) for file in sanitized_files)
+        # Compile the ignore patterns; per-directory ignore files are read during the walk
+        with profiler.stage("ignore_matcher"):
+            ignore_matcher: IgnoreMatcher = create_ignore_matcher(root_dir, config)
 
-        logger.info(
-            f"Packing complete. Total files: {total_files}, Total characters: {total_characters}"
+        git_config: Dict[str, Any] = config.get("git", {})
+        with profiler.stage("walk"):
+            if git_config.get("from_git") or git_config.get("ref"):
+                # Enumerate tracked files from the git index or a ref instead of walking
+                all_file_paths, walk_stats = filter_git_files(
+                    root_dir, ignore_matcher, git_config.get("ref") or None
+                )
+            else:
+                # Collect all file paths, pruning ignored directories during the walk
+                all_file_paths, walk_stats = walk_directory(root_dir, ignore_matcher)
+        profiler.count("directories_pruned", walk_stats["pruned_directories"])
+        profiler.count("files_skipped.ignored", walk_stats["ignored_files"])
+        logger.debug(
+            f"Pruned {walk_stats['pruned_directories']} directories and "
+            f"ignored {walk_stats['ignored_files']} files during the walk"
         )
 
-        # Return statistics
-        return {
-            "total_files": total_files,
-            "total_characters": total_characters,
-            "file_char_counts": file_char_counts,
-        }
+        # Only pack files changed since a ref; the tree still shows every file
+        packed_file_paths: List[str] = all_file_paths
+        changed_files: Optional[Dict[str, str]] = None
+        since: str = git_config.get("since") or ("HEAD" if git_config.get("changed_only") else "")
+        if since:
+            with profiler.stage("changed_files"):
+                changed_files = find_changed_files(
+                    root_dir, all_file_paths, since, git_config.get("ref") or None
+                )
+            packed_file_paths = list(changed_files)
+            logger.info(f"Files changed since {since}: {len(packed_file_paths)}")
+
+        logger.info(f"Total files to process: {len(packed_file_paths)}")
+
+        # Sanitize files lazily, counting characters as they are streamed to the output
+        # The cache is keyed by working tree stat data, which does not describe a ref
+        cache: Optional[ContentCache] = (
+            None if git_config.get("ref") else open_content_cache(root_dir, config)
+        )
+        records: List[FileRecord] = []
+        pack_stats: Dict[str, Any] = {}
+        try:
+            files = sanitize_files(packed_file_paths, root_dir, config, cache, pack_stats)
+            sanitized_files: Iterator[Dict[str, Any]] = record_files(
+                finish_files(files, root_dir, config, pack_stats),
+                records,
+                root_dir,
+                config,
+                keep_content,
+            )
+
+            # Generate output, split into shards if a maximum size is configured
+            # Files are sanitized as the output consumes them, so this stage includes both
+            shard_paths: Optional[List[str]] = None
+            with profiler.stage("sanitize_and_output"):
+                if output_path is not None:
+                    logger.debug("Generating output")
+                    if parse_size(config.get("split", {}).get("max_size", 0)):
+                        manifest = generate_sharded_output(
+                            config, sanitized_files, all_file_paths, output_path
+                        )
+                        output_dir = os.path.dirname(output_path)
+                        shard_paths = [
+                            os.path.join(output_dir, shard["path"]) for shard in manifest["shards"]
+                        ]
+                        logger.debug(f"Wrote {len(shard_paths)} output shards")
+                    else:
+                        generate_output(
+                            root_dir, config, sanitized_files, all_file_paths, output_path
+                        )
+
+                # Account for any files the output generator did not consume
+                for _ in sanitized_files:
+                    pass
+        finally:
+            if cache is not None:
+                cache.close()
+        logger.debug(f"Sanitized {len(records)} files")
+        profiler.count("files_packed", len(records))
+
+        result = PackResult(
+            root_dir,
+            config,
+            records,
+            all_file_paths,
+            {
+                "pruned_directories": walk_stats["pruned_directories"],
+                "ignored_files": walk_stats["ignored_files"],
+                **pack_stats,
+                "changed_files": changed_files,
+                "shards": shard_paths,
+            },
+        )
+        logger.info(
+            f"Packing complete. Total files: {result.total_files}, "
+            f"Total characters: {result.total_characters}"
+        )
+        return result
+    except ConfigurationError:
+        raise
     except FileProcessingError as e:
         logger.error(f"Error processing files: {str(e)}")
         raise RepopackError(f"File processing error: {str(e)}") from e
@@ -0,0 +1,279 @@
+import io
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+from .config import parse_size
+from .output_generator import generate_output, generate_sharded_output, render_output
+from .utils.file_handler import sanitize_entry
+
+
+def load_content(root_dir: str, config: Dict[str, Any], file_path: str) -> str:
+    """
+    Read and sanitize a packed file again.
+
+    Args:
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration the file was packed with.
+        file_path (str): The file path relative to root_dir.
+
+    Returns:
+        str: The sanitized content, empty if the file became binary.
+
+    Raises:
+        FileProcessingError: If there's an error processing the file.
+    """
+    return sanitize_entry(file_path, root_dir, config)["content"] or ""
+
+
+class FileRecord:
+    """
+    A packed file.
+
+    The sanitized content is only held when the pack was asked to keep it;
+    otherwise read() loads it again from the source when needed, so a pack
+    result costs a few fields per file rather than the whole repository.
+    """
+
+    __slots__ = (
+        "path",
+        "size",
+        "char_count",
+        "encoding",
+        "tokens",
+        "content",
+        "loader",
+        "duplicate_of",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        size: Optional[int],
+        char_count: int,
+        encoding: Optional[str],
+        tokens: Optional[int] = None,
+        content: Optional[str] = None,
+        loader: Optional[Callable[[str], str]] = None,
+        duplicate_of: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize a FileRecord.
+
+        Args:
+            path (str): The file path relative to the root directory.
+            size (Optional[int]): The size of the source file in bytes, or None if unknown
+                (e.g. when read from a git ref).
+            char_count (int): The number of characters of the sanitized content.
+            encoding (Optional[str]): The encoding the file was decoded with.
+            tokens (Optional[int]): The token count, if tokens were counted. Defaults to None.
+            content (Optional[str]): The sanitized content, if kept. Defaults to None.
+            loader (Optional[Callable[[str], str]]): Function loading the sanitized content of a
+                path when it was not kept. Defaults to None.
+            duplicate_of (Optional[str]): The path of an earlier file with identical content, if
+                the content was replaced by a reference to it. Defaults to None.
+        """
+        self.path: str = path
+        self.size: Optional[int] = size
+        self.char_count: int = char_count
+        self.encoding: Optional[str] = encoding
+        self.tokens: Optional[int] = tokens
+        self.content: Optional[str] = content
+        self.loader: Optional[Callable[[str], str]] = loader
+        self.duplicate_of: Optional[str] = duplicate_of
+
+    def read(self) -> str:
+        """
+        Get the sanitized content of the file.
+
+        Returns:
+            str: The content kept when packing, or else the file's current content, sanitized
+                again.
+
+        Raises:
+            FileProcessingError: If the content was not kept and the file cannot be read.
+        """
+        if self.content is not None or self.loader is None:
+            return self.content or ""
+        return self.loader(self.path)
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.path!r}, char_count={self.char_count})"
+
+
+class PackResult:
+    """
+    The result of packing a directory: the packed files and statistics about them.
+
+    Iterating yields a FileRecord per packed file, in output order. The output
+    document can be rendered to any text stream, returned as bytes or written to
+    a file, as often as needed and independently of whether pack_repository()
+    already wrote it.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        config: Dict[str, Any],
+        files: List[FileRecord],
+        all_file_paths: List[str],
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Initialize a PackResult.
+
+        Args:
+            root_dir (str): The root directory that was packed.
+            config (Dict[str, Any]): The configuration used.
+            files (List[FileRecord]): The packed files, in output order.
+            all_file_paths (List[str]): Every included file path, shown in the directory tree.
+            stats (Optional[Dict[str, Any]]): Further statistics from pack(), such as
+                'skipped_files' or 'changed_files'. Defaults to None.
+        """
+        self.root_dir: str = root_dir
+        self.config: Dict[str, Any] = config
+        self.files: List[FileRecord] = files
+        self.all_file_paths: List[str] = all_file_paths
+        self.stats: Dict[str, Any] = dict(stats or {})
+        self.total_files: int = len(files)
+        self.total_characters: int = sum(record.char_count for record in files)
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def iter_sanitized_files(self) -> Iterator[Dict[str, Any]]:
+        """
+        Load the packed files one at a time in the form the output generator consumes.
+
+        Yields:
+            Dict[str, Any]: Dictionaries with each file's path, content and encoding.
+        """
+        for record in self.files:
+            yield {"path": record.path, "content": record.read(), "encoding": record.encoding}
+
+    def render(self, stream: TextIO) -> None:
+        """
+        Write the output document to a text stream.
+
+        Args:
+            stream (TextIO): The text stream to write to.
+
+        Raises:
+            FileProcessingError: If a file whose content was not kept cannot be read.
+        """
+        render_output(self.config, self.iter_sanitized_files(), self.all_file_paths, stream)
+
+    def to_bytes(self, encoding: str = "utf-8") -> bytes:
+        """
+        Render the output document in memory.
+
+        Args:
+            encoding (str): The encoding of the returned bytes. Defaults to 'utf-8'.
+
+        Returns:
+            bytes: The encoded output document.
+
+        Raises:
+            FileProcessingError: If a file whose content was not kept cannot be read.
+        """
+        buffer = io.BytesIO()
+        stream = io.TextIOWrapper(buffer, encoding=encoding)
+        self.render(stream)
+        stream.flush()
+        data = buffer.getvalue()
+        stream.close()
+        return data
+
+    def write(self, output_path: str) -> None:
+        """
+        Write the output document to a file, replacing it atomically, or to shards and a
+        manifest next to it if a split size is configured.
+
+        Args:
+            output_path (str): The path to the output file.
+
+        Raises:
+            OutputGenerationError: If there's an error during output generation.
+            FileProcessingError: If a file whose content was not kept cannot be read.
+        """
+        if parse_size(self.config.get("split", {}).get("max_size", 0)):
+            generate_sharded_output(
+                self.config, self.iter_sanitized_files(), self.all_file_paths, output_path
+            )
+            return
+        generate_output(
+            self.root_dir,
+            self.config,
+            self.iter_sanitized_files(),
+            self.all_file_paths,
+            output_path,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the statistics in the dictionary form returned by pack().
+
+        Returns:
+            Dict[str, Any]: A dictionary containing statistics about the packed files.
+        """
+        file_token_counts = {
+            record.path: record.tokens for record in self.files if record.tokens is not None
+        }
+        return {
+            "total_files": self.total_files,
+            "total_characters": self.total_characters,
+            "file_char_counts": {record.path: record.char_count for record in self.files},
+            "pruned_directories": self.stats.get("pruned_directories", 0),
+            "ignored_files": self.stats.get("ignored_files", 0),
+            "skipped_files": self.stats.get("skipped_files", []),
+            "truncated_files": self.stats.get("truncated_files", []),
+            "comment_bytes_removed": self.stats.get("comment_bytes_removed", {}),
+            "token_excluded_files": self.stats.get("token_excluded_files", []),
+            "total_tokens": self.stats.get("total_tokens"),
+            "file_token_counts": file_token_counts,
+            "changed_files": self.stats.get("changed_files"),
+            "shards": self.stats.get("shards"),
+            "duplicate_files": self.stats.get("duplicate_files", {}),
+            "dedup_bytes_saved": self.stats.get("dedup_bytes_saved", 0),
+        }
+
+
+def record_files(
+    sanitized_files: Iterator[Dict[str, Any]],
+    records: List[FileRecord],
+    root_dir: str,
+    config: Dict[str, Any],
+    keep_content: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Pass sanitized files through while recording a FileRecord for each.
+
+    Args:
+        sanitized_files (Iterator[Dict[str, Any]]): The sanitized files to pass through.
+        records (List[FileRecord]): List the records are appended to.
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+        keep_content (bool): Whether records hold the content, instead of loading it again
+            when read. Defaults to False.
+
+    Yields:
+        Dict[str, Any]: The sanitized files, unchanged.
+    """
+    loader = partial(load_content, root_dir, config)
+    for file in sanitized_files:
+        records.append(
+            FileRecord(
+                file["path"],
+                file.get("size"),
+                len(file["content"]),
+                file.get("encoding"),
+                file.get("tokens"),
+                # References to duplicates are short, and reading the file again would not
+                # reproduce them
+                file["content"] if keep_content or "duplicate_of" in file else None,
+                loader,
+                file.get("duplicate_of"),
+            )
+        )
+        yield file
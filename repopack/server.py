@@ -0,0 +1,409 @@
+import hmac
+import io
+import json
+import os
+import secrets
+import socketserver
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from .config import merge_configs
+from .exceptions import ConfigurationError, RepopackError
+from .output_generator import render_output
+from .session import PackSession
+from .utils.logger import logger
+from .version import __version__
+
+# Maximum number of warm sessions kept, least recently used first out
+DEFAULT_MAX_SESSIONS = 16
+
+# Maximum accepted request body size in bytes
+MAX_REQUEST_SIZE = 1024 * 1024
+
+# Host header values accepted on TCP, so DNS rebinding cannot reach the server from a web page
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def is_within(root_dir: str, path: str) -> bool:
+    """
+    Check whether a path resolves to a location inside a directory.
+
+    Args:
+        root_dir (str): The directory.
+        path (str): The path to check.
+
+    Returns:
+        bool: True if the path is the directory or below it, after resolving symlinks.
+    """
+    root_dir = os.path.realpath(root_dir)
+    return os.path.commonpath([root_dir, os.path.realpath(path)]) == root_dir
+
+
+def get_host_name(host: str) -> str:
+    """
+    Get the host name from a Host header, without its port.
+
+    Args:
+        host (str): The Host header value, e.g. 'localhost:8765' or '[::1]:8765'.
+
+    Returns:
+        str: The host name, e.g. 'localhost' or '::1'.
+    """
+    if host.startswith("["):
+        return host[1:].split("]", 1)[0]
+    return host.rsplit(":", 1)[0]
+
+
+class PackSnapshot:
+    """The state of a session at the time a request was answered."""
+
+    __slots__ = (
+        "root_dir",
+        "config",
+        "output_path",
+        "files",
+        "file_paths",
+        "tree_string",
+        "result",
+    )
+
+    def __init__(
+        self, session: PackSession, files: List[Dict[str, Any]], result: Dict[str, Any]
+    ) -> None:
+        """
+        Initialize the PackSnapshot.
+
+        Args:
+            session (PackSession): The up-to-date session, locked by the caller.
+            files (List[Dict[str, Any]]): The sanitized files to pack.
+            result (Dict[str, Any]): Statistics about the files, as returned by pack().
+        """
+        self.root_dir: str = session.root_dir
+        self.config: Dict[str, Any] = session.config
+        self.output_path: str = session.output_path
+        self.files: List[Dict[str, Any]] = files
+        self.file_paths: List[str] = session.file_paths
+        self.tree_string: Optional[str] = session.tree_string
+        self.result: Dict[str, Any] = result
+
+
+class PackServer:
+    """
+    Packs directories on request, keeping a warm session per root and configuration.
+
+    Each session holds the compiled ignore matcher, the sanitized contents and the
+    rendered tree of its root. Before a request is answered the session is brought
+    up to date by comparing recorded stat data, so only files whose modification
+    time, size or inode changed are read again.
+    """
+
+    def __init__(
+        self, file_config: Dict[str, Any], max_sessions: int = DEFAULT_MAX_SESSIONS
+    ) -> None:
+        """
+        Initialize the PackServer.
+
+        Args:
+            file_config (Dict[str, Any]): Configuration loaded from a file, applied to every
+                request before the request's own overrides.
+            max_sessions (int): Maximum number of warm sessions to keep.
+        """
+        self.file_config: Dict[str, Any] = file_config
+        self.max_sessions: int = max_sessions
+        self.sessions: "OrderedDict[Tuple[str, str], PackSession]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_session(self, root_dir: str, overrides: Optional[Dict[str, Any]] = None) -> PackSession:
+        """
+        Get the warm session for a root directory and configuration, creating it if needed.
+
+        Args:
+            root_dir (str): The root directory to pack.
+            overrides (Optional[Dict[str, Any]]): Configuration overrides for this request.
+
+        Returns:
+            PackSession: The session.
+
+        Raises:
+            ConfigurationError: If the root directory does not exist, the configuration is
+                invalid, or the overrides move the output file outside the root directory.
+        """
+        root_dir = os.path.abspath(root_dir)
+        if not os.path.isdir(root_dir):
+            raise ConfigurationError(f"Not a directory: {root_dir}")
+        config = merge_configs(self.file_config, overrides or {})
+        output_path = os.path.join(root_dir, config["output"]["file_path"])
+        # Requests may only write inside the directory they pack
+        if "file_path" in (overrides or {}).get("output", {}) and not is_within(
+            root_dir, output_path
+        ):
+            raise ConfigurationError(f"Output file outside the root directory: {output_path}")
+        key = (root_dir, json.dumps(config, sort_keys=True, default=str))
+
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = PackSession(root_dir, config, output_path)
+                self.sessions[key] = session
+                while len(self.sessions) > self.max_sessions:
+                    _, evicted = self.sessions.popitem(last=False)
+                    logger.debug(f"Evicted warm session for {evicted.root_dir}")
+            self.sessions.move_to_end(key)
+        return session
+
+    def snapshot(self, root_dir: str, overrides: Optional[Dict[str, Any]] = None) -> PackSnapshot:
+        """
+        Bring the session of a root up to date and select the files to pack.
+
+        Requests for the same session are serialized; the snapshot does not change
+        when the session is updated later, so it can be rendered without the lock.
+
+        Args:
+            root_dir (str): The root directory to pack.
+            overrides (Optional[Dict[str, Any]]): Configuration overrides for this request.
+
+        Returns:
+            PackSnapshot: The files to pack and statistics about them.
+
+        Raises:
+            RepopackError: If the directory cannot be packed.
+        """
+        session = self.get_session(root_dir, overrides)
+        with session.lock:
+            session.refresh()
+            files, result = session.collect()
+            return PackSnapshot(session, files, result)
+
+    def pack(self, root_dir: str, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Pack a root directory to its configured output file.
+
+        The output is written while the session is locked, so concurrent requests for
+        the same session write in turn and the last file written is the newest.
+
+        Args:
+            root_dir (str): The root directory to pack.
+            overrides (Optional[Dict[str, Any]]): Configuration overrides for this request.
+
+        Returns:
+            Dict[str, Any]: Statistics about the packed files, as returned by pack().
+
+        Raises:
+            RepopackError: If the directory cannot be packed.
+        """
+        session = self.get_session(root_dir, overrides)
+        with session.lock:
+            session.refresh()
+            return session.write()
+
+
+class PackRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles pack requests over HTTP.
+
+    'GET /health' reports the number of warm sessions. 'POST /pack' takes a JSON
+    object with the 'root' directory, optional 'config' overrides, and 'response'
+    set to 'stats' (the default, also writing the output file) or 'output' (the
+    packed document, streamed in the response body without writing a file).
+
+    Requests must not carry an Origin header, so web pages cannot send them; over
+    TCP they must also name a local Host and, when the server has a token, carry it
+    as 'Authorization: Bearer <token>'. Pack requests must be sent as JSON.
+    """
+
+    server_version = f"RepopackPy/{__version__}"
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def send_json(self, status: int, data: Dict[str, Any]) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): The HTTP status code.
+            data (Dict[str, Any]): The response object.
+        """
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def check_access(self) -> bool:
+        """
+        Check that a request comes from an authorized local client, answering it if not.
+
+        Returns:
+            bool: True if the request may be handled.
+        """
+        if self.headers.get("Origin") is not None:
+            self.send_json(403, {"error": "Cross-origin requests are not allowed"})
+            return False
+        if isinstance(self.client_address, tuple):
+            if get_host_name(self.headers.get("Host") or "") not in LOCAL_HOSTS:
+                self.send_json(403, {"error": "Requests must be addressed to localhost"})
+                return False
+        token: Optional[str] = self.server.token
+        if token is not None:
+            authorization = self.headers.get("Authorization") or ""
+            if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+                self.send_json(401, {"error": "Missing or invalid token"})
+                return False
+        return True
+
+    def do_GET(self) -> None:
+        if not self.check_access():
+            return
+        if self.path != "/health":
+            self.send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        pack_server: PackServer = self.server.pack_server
+        self.send_json(200, {"status": "ok", "sessions": len(pack_server.sessions)})
+
+    def do_POST(self) -> None:
+        if not self.check_access():
+            return
+        if self.path != "/pack":
+            self.send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip()
+        if content_type.lower() != "application/json":
+            self.send_json(415, {"error": "Requests must be sent as application/json"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_SIZE:
+            self.send_json(413, {"error": "Request too large"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            root_dir = request["root"]
+            overrides = request.get("config") or {}
+            response = request.get("response", "stats")
+            if response not in ("stats", "output"):
+                raise ValueError(f"Unknown response type: {response}")
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": f"Invalid request: {str(e)}"})
+            return
+
+        pack_server: PackServer = self.server.pack_server
+        try:
+            if response == "stats":
+                self.send_json(200, pack_server.pack(root_dir, overrides))
+                return
+            snapshot = pack_server.snapshot(root_dir, overrides)
+        except ConfigurationError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except RepopackError as e:
+            logger.error(f"Error packing {root_dir}: {str(e)}")
+            self.send_json(500, {"error": str(e)})
+            return
+
+        # The connection closes after the response, so the body needs no length
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.end_headers()
+        stream = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=False)
+        try:
+            render_output(
+                snapshot.config, snapshot.files, snapshot.file_paths, stream, snapshot.tree_string
+            )
+            stream.flush()
+        finally:
+            stream.detach()
+
+
+class UnixPackHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A threading HTTP server listening on a Unix socket."""
+
+    daemon_threads = True
+
+
+def create_server(
+    pack_server: PackServer,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    socket_path: Optional[str] = None,
+    token: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """
+    Create an HTTP server for a PackServer, on a Unix socket or a local TCP port.
+
+    A TCP server always requires a token, generated if not given; a Unix socket is
+    only accessible to its owner, so it requires one only if given.
+
+    Args:
+        pack_server (PackServer): The server state that answers requests.
+        host (str): The address to listen on. Defaults to localhost.
+        port (int): The TCP port to listen on; 0 picks a free port.
+        socket_path (Optional[str]): A Unix socket path to listen on instead of TCP.
+        token (Optional[str]): The token clients must send.
+
+    Returns:
+        socketserver.BaseServer: The bound server, not yet serving, with its token as
+            'token'.
+    """
+    server: socketserver.BaseServer
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixPackHTTPServer(socket_path, PackRequestHandler)
+        os.chmod(socket_path, 0o600)
+    else:
+        server = ThreadingHTTPServer((host, port), PackRequestHandler)
+        server.daemon_threads = True
+        token = token or secrets.token_urlsafe(32)
+    server.pack_server = pack_server
+    server.token = token
+    return server
+
+
+def serve(
+    file_config: Dict[str, Any],
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[str] = None,
+    max_sessions: int = DEFAULT_MAX_SESSIONS,
+    token_file: Optional[str] = None,
+) -> None:
+    """
+    Serve pack requests until interrupted.
+
+    Args:
+        file_config (Dict[str, Any]): Configuration loaded from a file.
+        host (str): The address to listen on. Defaults to localhost.
+        port (int): The TCP port to listen on.
+        socket_path (Optional[str]): A Unix socket path to listen on instead of TCP.
+        max_sessions (int): Maximum number of warm sessions to keep.
+        token_file (Optional[str]): File to write the TCP token to, readable only by its
+            owner; the token is logged if not given.
+    """
+    server = create_server(PackServer(file_config, max_sessions), host, port, socket_path)
+    address = socket_path or "http://{}:{}".format(*server.server_address[:2])
+    logger.info(f"Serving pack requests on {address}")
+    if server.token is not None:
+        if token_file:
+            descriptor = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w") as f:
+                f.write(server.token + "\n")
+            logger.info(f"Token written to {token_file}")
+        else:
+            logger.info(f"Token: {server.token}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,477 @@
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .exceptions import ConfigurationError, RepopackError
+from .config import parse_size
+from .output_generator import generate_output, generate_sharded_output, get_manifest_path
+from .packager import finish_files
+from .utils.compression import get_compressed_path
+from .utils.file_handler import (
+    SizeLimits,
+    add_comment_bytes,
+    run_ordered,
+    sanitize_entry,
+)
+from .utils.ignore_utils import IgnoreMatcher, create_ignore_matcher
+from .utils.logger import logger
+from .utils.tree_generator import generate_tree_string
+from .utils.watcher import (
+    RESCAN_ALL,
+    PollingWatcher,
+    Signature,
+    create_watcher,
+    get_signature,
+    stat_signature,
+)
+
+
+class PackSession:
+    """
+    A resident pack of one directory that is updated incrementally.
+
+    The directory listings, the compiled ignore matcher, the sanitized file
+    contents and the rendered tree are kept in memory, so after a change only the
+    affected directories are listed again and only the affected files are read.
+    """
+
+    def __init__(self, root_dir: str, config: Dict[str, Any], output_path: str) -> None:
+        """
+        Initialize the PackSession.
+
+        Args:
+            root_dir (str): The root directory to pack.
+            config (Dict[str, Any]): The configuration dictionary.
+            output_path (str): The path to the output file.
+
+        Raises:
+            ConfigurationError: If the configuration selects files from git, which watch mode
+                does not support.
+        """
+        git_config: Dict[str, Any] = config.get("git", {})
+        if any(git_config.get(key) for key in ("from_git", "ref", "since", "changed_only")):
+            raise ConfigurationError("Watch mode packs the working tree and cannot use git options")
+
+        self.root_dir: str = os.path.abspath(root_dir)
+        self.config: Dict[str, Any] = config
+        # The configured output path, which split output derives shard paths from
+        self.unsplit_output_path: str = os.path.abspath(output_path)
+        self.output_path: str = os.path.abspath(get_compressed_path(output_path, config))
+        # Files written by the session, whose changes must not trigger another write
+        self.written_paths: Set[str] = {self.output_path}
+        self.matcher: IgnoreMatcher = create_ignore_matcher(self.root_dir, config)
+        # Included file names and subdirectory names of each directory, in listing order
+        self.directories: Dict[str, Tuple[List[str], List[str]]] = {}
+        self.directory_signatures: Dict[str, Optional[Signature]] = {}
+        self.file_stats: Dict[str, os.stat_result] = {}
+        self.ignore_file_signatures: Dict[str, Optional[Signature]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.pending: Set[str] = set()
+        self.file_paths: List[str] = []
+        self.tree_string: Optional[str] = None
+        self.lock = threading.RLock()
+        self.poller: Optional[PollingWatcher] = None
+        # Whether anything that affects the output changed since it was last written
+        self.changed: bool = True
+
+    def is_output_file(self, file_path: str) -> bool:
+        """
+        Check whether a path is an output file, shard or manifest, or a temporary file.
+
+        Args:
+            file_path (str): The path relative to the root directory.
+
+        Returns:
+            bool: True if the path is written by the session itself.
+        """
+        full_path = os.path.join(self.root_dir, file_path)
+        # Output is written to '<path>.<pid>.<thread id>.tmp' before it replaces the file
+        if re.search(rf"\.{os.getpid()}\.\d+\.tmp$", full_path):
+            return True
+        return full_path in self.written_paths
+
+    def build(self) -> None:
+        """
+        List the whole directory tree with a freshly compiled ignore matcher.
+
+        Sanitized contents of files whose stat data is unchanged are kept.
+        """
+        self.matcher = create_ignore_matcher(self.root_dir, self.config)
+        self.directories = {}
+        self.directory_signatures = {}
+        self.ignore_file_signatures = {}
+        self.scan_directory("", recursive=True)
+
+        listed_files = set(self.iter_file_paths())
+        for file_path in [path for path in self.file_stats if path not in listed_files]:
+            self.remove_file(file_path)
+
+    def iter_file_paths(self) -> Iterable[str]:
+        """
+        Iterate over the included files in the order os.walk lists them.
+
+        Yields:
+            str: The included file paths relative to the root directory.
+        """
+        stack: List[str] = [""]
+        while stack:
+            dir_path = stack.pop()
+            file_names, dir_names = self.directories.get(dir_path, ([], []))
+            prefix = dir_path + os.sep if dir_path else ""
+            for file_name in file_names:
+                yield prefix + file_name
+            stack.extend(prefix + dir_name for dir_name in reversed(dir_names))
+
+    def scan_directory(self, dir_path: str, recursive: bool) -> None:
+        """
+        List a directory again and update the included files and subdirectories.
+
+        Subdirectories that are new are always listed in full; existing subdirectories
+        are only listed again when recursive is True.
+
+        Args:
+            dir_path (str): The directory path relative to the root directory.
+            recursive (bool): Whether to list all subdirectories as well.
+        """
+        stack: List[str] = [dir_path]
+        while stack:
+            current_dir = stack.pop()
+            full_dir = os.path.join(self.root_dir, current_dir)
+            signature = get_signature(full_dir)
+            try:
+                with os.scandir(full_dir) as it:
+                    items = list(it)
+            except OSError:
+                self.remove_directory(current_dir)
+                continue
+
+            prefix = current_dir + os.sep if current_dir else ""
+            for name in self.matcher.ignore_file_names:
+                self.ignore_file_signatures.pop(prefix + name, None)
+            is_dir = {item.name: item.is_dir() for item in items}
+            self.matcher.add_directory(
+                current_dir, [item.name for item in items if not is_dir[item.name]]
+            )
+
+            file_names: List[str] = []
+            dir_names: List[str] = []
+            for item in items:
+                path = prefix + item.name
+                if is_dir[item.name]:
+                    # Like os.walk, symlinked directories are not descended into
+                    if not item.is_symlink() and not self.matcher.is_ignored(
+                        path, is_directory=True
+                    ):
+                        dir_names.append(item.name)
+                    continue
+                if item.name in self.matcher.ignore_file_names:
+                    self.ignore_file_signatures[path] = get_signature(item.path)
+                if not self.is_output_file(path) and not self.matcher.is_ignored(path):
+                    file_names.append(item.name)
+
+            previous = self.directories.get(current_dir)
+            self.directories[current_dir] = (file_names, dir_names)
+            if previous != (file_names, dir_names):
+                self.changed = True
+            self.directory_signatures[current_dir] = signature
+            if previous is not None:
+                for dir_name in set(previous[1]) - set(dir_names):
+                    self.remove_directory(prefix + dir_name)
+                for file_name in set(previous[0]) - set(file_names):
+                    self.remove_file(prefix + file_name)
+
+            for file_name in file_names:
+                self.refresh_file(prefix + file_name)
+            for dir_name in dir_names:
+                if recursive or previous is None or dir_name not in previous[1]:
+                    stack.append(prefix + dir_name)
+
+    def remove_directory(self, dir_path: str) -> None:
+        """
+        Forget a directory and everything below it.
+
+        Args:
+            dir_path (str): The directory path relative to the root directory.
+        """
+        stack: List[str] = [dir_path]
+        while stack:
+            current_dir = stack.pop()
+            listing = self.directories.pop(current_dir, None)
+            self.directory_signatures.pop(current_dir, None)
+            if listing is None:
+                continue
+            prefix = current_dir + os.sep if current_dir else ""
+            for file_name in listing[0]:
+                self.remove_file(prefix + file_name)
+            stack.extend(prefix + dir_name for dir_name in listing[1])
+        prefix = dir_path + os.sep
+        for path in [path for path in self.ignore_file_signatures if path.startswith(prefix)]:
+            del self.ignore_file_signatures[path]
+
+    def remove_file(self, file_path: str) -> None:
+        """
+        Forget a file.
+
+        Args:
+            file_path (str): The file path relative to the root directory.
+        """
+        if self.file_stats.pop(file_path, None) is not None:
+            self.changed = True
+        self.entries.pop(file_path, None)
+        self.pending.discard(file_path)
+
+    def refresh_file(self, file_path: str) -> None:
+        """
+        Queue a file for sanitizing if its stat data changed since it was last read.
+
+        Args:
+            file_path (str): The file path relative to the root directory.
+        """
+        try:
+            stat = os.stat(os.path.join(self.root_dir, file_path))
+        except OSError:
+            return  # Removed; the directory listing reports it
+        previous = self.file_stats.get(file_path)
+        if (
+            previous is None
+            or stat_signature(previous) != stat_signature(stat)
+            or file_path not in self.entries
+        ):
+            self.file_stats[file_path] = stat
+            self.pending.add(file_path)
+            self.changed = True
+
+    def apply_changes(self, paths: Set[str]) -> None:
+        """
+        Update the session for changed paths reported by a watcher.
+
+        A change to an ignore file recompiles the ignore matcher and lists the whole
+        tree again, still reusing the contents of unchanged files.
+
+        Args:
+            paths (Set[str]): Relative paths of changed files, and of directories whose
+                listing changed; RESCAN_ALL to check everything.
+        """
+        ignore_file_names = self.matcher.ignore_file_names
+        if RESCAN_ALL in paths or any(
+            os.path.basename(path) in ignore_file_names for path in paths
+        ):
+            logger.debug("Ignore files changed, listing the whole tree again")
+            self.build()
+            return
+
+        ignore_file_signatures = dict(self.ignore_file_signatures)
+        for path in sorted(paths):
+            if path in self.directories:
+                self.scan_directory(path, recursive=False)
+            elif path in self.file_stats:
+                self.refresh_file(path)
+            elif os.path.dirname(path) in self.directories:
+                self.scan_directory(os.path.dirname(path), recursive=False)
+
+        # Ignore files that appeared or disappeared in a listed directory
+        if self.ignore_file_signatures != ignore_file_signatures:
+            logger.debug("Ignore files changed, listing the whole tree again")
+            self.build()
+
+    def process_pending(self) -> int:
+        """
+        Sanitize the files queued by the last changes.
+
+        Returns:
+            int: The number of files sanitized.
+
+        Raises:
+            FileProcessingError: If there's an error processing a file; files that could
+                not be processed stay queued.
+        """
+        pending_paths = sorted(self.pending)
+        tasks = ((file_path, self.root_dir, self.config) for file_path in pending_paths)
+        for file_path, entry in zip(pending_paths, run_ordered(sanitize_entry, tasks, self.config)):
+            self.entries[file_path] = entry
+            self.pending.discard(file_path)
+        return len(pending_paths)
+
+    def collect(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Select the files to pack from the in-memory state.
+
+        The tree is only rendered again when the set of files changed.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Any]]: The sanitized files to pack, and
+                statistics about them as returned by pack().
+        """
+        file_paths = list(self.iter_file_paths())
+        if file_paths != self.file_paths or self.tree_string is None:
+            self.file_paths = file_paths
+            self.tree_string = generate_tree_string(file_paths)
+
+        limits = SizeLimits(self.config)
+        files: List[Dict[str, Any]] = []
+        comment_bytes_removed: Dict[str, int] = {}
+        for file_path in file_paths:
+            stat = self.file_stats.get(file_path)
+            size = stat.st_size if stat is not None else 0
+            if not limits.within_file_limit(file_path, size):
+                continue
+            entry = self.entries.get(file_path)
+            if entry is None or not entry["content"]:
+                continue
+            if not limits.within_total_limit(file_path, size):
+                continue
+            add_comment_bytes(comment_bytes_removed, file_path, entry)
+            file = {"path": file_path, "content": entry["content"], "encoding": entry["encoding"]}
+            if entry["tokens"] is not None:
+                file["tokens"] = entry["tokens"]
+            files.append(file)
+
+        stats: Dict[str, Any] = {
+            "skipped_files": limits.skipped,
+            "truncated_files": limits.truncated,
+            "comment_bytes_removed": comment_bytes_removed,
+        }
+        files = list(finish_files(files, self.root_dir, self.config, stats))
+
+        file_char_counts = {file["path"]: len(file["content"]) for file in files}
+        return files, {
+            "total_files": len(files),
+            "total_characters": sum(file_char_counts.values()),
+            "file_char_counts": file_char_counts,
+            **stats,
+            "file_token_counts": {
+                file["path"]: file["tokens"] for file in files if "tokens" in file
+            },
+        }
+
+    def write(self) -> Dict[str, Any]:
+        """
+        Write the output file from the in-memory state, replacing it atomically.
+
+        When 'split.max_size' is set, the output is written as shards with a manifest.
+
+        Returns:
+            Dict[str, Any]: Statistics about the packed files, as returned by pack().
+        """
+        files, result = self.collect()
+        shard_paths: Optional[List[str]] = None
+        if parse_size(self.config.get("split", {}).get("max_size", 0)):
+            manifest = generate_sharded_output(
+                self.config, files, self.file_paths, self.unsplit_output_path, self.tree_string
+            )
+            output_dir = os.path.dirname(self.unsplit_output_path)
+            shard_paths = [os.path.join(output_dir, shard["path"]) for shard in manifest["shards"]]
+            self.written_paths.update(shard_paths)
+            self.written_paths.add(get_manifest_path(self.unsplit_output_path))
+        else:
+            generate_output(
+                self.root_dir,
+                self.config,
+                files,
+                self.file_paths,
+                self.output_path,
+                self.tree_string,
+            )
+        result["shards"] = shard_paths
+        return result
+
+    def refresh(self) -> None:
+        """
+        Bring the session up to date by comparing the recorded stat data with the disk.
+
+        This costs one stat call per tracked file and directory; only changed files
+        are read again.
+        """
+        with self.lock:
+            if self.poller is None:
+                self.poller = PollingWatcher(self.root_dir)
+                self.build()
+            else:
+                changes = self.poller.wait(0)
+                if changes:
+                    self.apply_changes(changes)
+            sanitized = self.process_pending()
+            logger.debug(f"Sanitized {sanitized} changed files")
+            self.poller.sync(*self.signatures())
+
+    def pack(self, changes: Optional[Set[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Bring the session up to date and rewrite the output file if anything changed.
+
+        Args:
+            changes (Optional[Set[str]]): Changed relative paths reported by a watcher, or
+                None to list the whole tree and always write the output.
+
+        Returns:
+            Optional[Dict[str, Any]]: Statistics about the packed files, as returned by pack(),
+                or None if the changes did not affect the output.
+        """
+        with self.lock:
+            if changes is None:
+                self.build()
+                self.changed = True
+            else:
+                self.apply_changes({path for path in changes if not self.is_output_file(path)})
+            if not self.changed:
+                return None
+            sanitized = self.process_pending()
+            logger.debug(f"Sanitized {sanitized} changed files")
+            result = self.write()
+            self.changed = False
+            return result
+
+    def signatures(self) -> Tuple[Dict[str, Optional[Signature]], Dict[str, Optional[Signature]]]:
+        """
+        Get the stat signatures recorded for the tracked files and directories.
+
+        Returns:
+            Tuple[Dict[str, Optional[Signature]], Dict[str, Optional[Signature]]]: Signatures of
+                the included files and ignore files, and signatures of the directories.
+        """
+        file_signatures: Dict[str, Optional[Signature]] = {
+            path: stat_signature(stat) for path, stat in self.file_stats.items()
+        }
+        file_signatures.update(self.ignore_file_signatures)
+        return file_signatures, dict(self.directory_signatures)
+
+    def watch(self, stop_event: Optional[threading.Event] = None) -> None:
+        """
+        Rewrite the output file whenever files change, until stopped.
+
+        Changes are collected until none arrive for the debounce window, so a burst
+        of writes results in a single rewrite.
+
+        Args:
+            stop_event (Optional[threading.Event]): Event that ends watching when set.
+                Defaults to None, which watches until interrupted.
+        """
+        watch_config: Dict[str, Any] = self.config.get("watch", {})
+        debounce = float(watch_config.get("debounce", 0.2))
+        poll_interval = float(watch_config.get("poll_interval", 0.5))
+        watcher = create_watcher(self.root_dir, watch_config.get("backend", "auto"))
+        logger.debug(f"Watching {self.root_dir} with {type(watcher).__name__}")
+        try:
+            watcher.sync(*self.signatures())
+            while stop_event is None or not stop_event.is_set():
+                changes = watcher.wait(poll_interval)
+                if not changes:
+                    continue
+                while True:
+                    more = watcher.wait(debounce)
+                    if not more:
+                        break
+                    changes |= more
+
+                try:
+                    result = self.pack(changes)
+                except RepopackError as e:
+                    logger.error(f"Error updating output: {str(e)}")
+                    result = None
+                if result is not None:
+                    logger.info(
+                        f"Output updated. Total files: {result['total_files']}, "
+                        f"Total characters: {result['total_characters']}"
+                    )
+                watcher.sync(*self.signatures())
+        finally:
+            watcher.close()
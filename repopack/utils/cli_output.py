@@ -1,9 +1,9 @@
-from typing import Dict, List, Tuple
-import colorama
-from colorama import Fore, Style
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from .colors import get_colors
 
-# Initialize colorama for cross-platform colored terminal output
-colorama.init(autoreset=True)
+# Maximum number of paths listed for each group of left-out files
+MAX_LISTED_FILES = 10
 
 
 def print_top_files(file_char_counts: Dict[str, int], top_files_length: int) -> None:
@@ -14,6 +14,7 @@ def print_top_files(file_char_counts: Dict[str, int], top_files_length: int) ->
         file_char_counts (Dict[str, int]): A dictionary of file paths and their character counts.
         top_files_length (int): The number of top files to display.
     """
+    Fore, Style = get_colors(sys.stdout)
     print(f"\n{Fore.CYAN}📈 Top {top_files_length} Files by Character Count:")
     print(f"{Fore.CYAN}──────────────────────────────────")
 
@@ -24,12 +25,35 @@ def print_top_files(file_char_counts: Dict[str, int], top_files_length: int) ->
         print(f"{Fore.WHITE}{i}. {file_path} {Style.DIM}({char_count} chars)")
 
 
+def print_left_out_files(title: str, file_paths: List[str]) -> None:
+    """
+    Print a group of files that were left out of the pack.
+
+    Args:
+        title (str): The heading describing why the files were left out.
+        file_paths (List[str]): The paths of the left-out files.
+    """
+    Fore, Style = get_colors(sys.stdout)
+    print(f"\n{Fore.YELLOW}⚠️  {title}: {len(file_paths)}")
+    for file_path in file_paths[:MAX_LISTED_FILES]:
+        print(f"{Fore.WHITE}  - {file_path}")
+    if len(file_paths) > MAX_LISTED_FILES:
+        print(f"{Fore.WHITE}{Style.DIM}  ... and {len(file_paths) - MAX_LISTED_FILES} more")
+
+
 def print_summary(
     total_files: int,
     total_characters: int,
     output_path: str,
     file_char_counts: Dict[str, int],
     top_files_length: int,
+    skipped_files: Optional[List[str]] = None,
+    truncated_files: Optional[List[str]] = None,
+    total_tokens: Optional[int] = None,
+    token_excluded_files: Optional[List[str]] = None,
+    duplicate_files: Optional[Dict[str, str]] = None,
+    dedup_bytes_saved: Optional[int] = None,
+    comment_bytes_removed: Optional[Dict[str, int]] = None,
 ) -> None:
     """
     Print a summary of the repository packing process.
@@ -40,20 +64,80 @@ def print_summary(
         output_path (str): The path where the output file is saved.
         file_char_counts (Dict[str, int]): A dictionary of file paths and their character counts.
         top_files_length (int): The number of top files to display.
+        skipped_files (Optional[List[str]]): Files skipped for exceeding the per-file size limit.
+        truncated_files (Optional[List[str]]): Files left out after the total size limit was hit.
+        total_tokens (Optional[int]): The total number of tokens, if tokens were counted.
+        token_excluded_files (Optional[List[str]]): Files left out to fit the token budget.
+        duplicate_files (Optional[Dict[str, str]]): Files written as a reference to an identical
+            earlier file, mapped to that file's path.
+        dedup_bytes_saved (Optional[int]): The number of bytes deduplication left out.
+        comment_bytes_removed (Optional[Dict[str, int]]): Bytes removed with comments, by
+            language.
     """
+    Fore = get_colors(sys.stdout)[0]
     print(f"\n{Fore.CYAN}📊 Pack Summary:")
     print(f"{Fore.CYAN}────────────────")
     print(f"{Fore.WHITE}Total Files: {total_files}")
     print(f"{Fore.WHITE}Total Chars: {total_characters}")
+    if total_tokens is not None:
+        print(f"{Fore.WHITE}Total Tokens: {total_tokens}")
     print(f"{Fore.WHITE}     Output: {output_path}")
+    if duplicate_files:
+        print(
+            f"{Fore.WHITE}Duplicates: {len(duplicate_files)} files, "
+            f"{dedup_bytes_saved or 0} bytes saved"
+        )
+    if comment_bytes_removed:
+        languages = ", ".join(
+            f"{language} {removed}"
+            for language, removed in sorted(
+                comment_bytes_removed.items(), key=lambda item: item[1], reverse=True
+            )
+        )
+        print(
+            f"{Fore.WHITE}  Comments: {sum(comment_bytes_removed.values())} bytes removed "
+            f"({languages})"
+        )
 
     if top_files_length > 0:
         print_top_files(file_char_counts, top_files_length)
 
+    if skipped_files:
+        print_left_out_files("Skipped Files (over max file size)", skipped_files)
+    if truncated_files:
+        print_left_out_files("Truncated Files (over max total size)", truncated_files)
+    if token_excluded_files:
+        print_left_out_files("Excluded Files (over token budget)", token_excluded_files)
+
+
+def print_batch_summary(report: Dict[str, Any]) -> None:
+    """
+    Print a summary of a batch of packed directories.
+
+    Args:
+        report (Dict[str, Any]): The report returned by pack_batch().
+    """
+    Fore = get_colors(sys.stdout)[0]
+    print(f"\n{Fore.CYAN}📊 Batch Summary:")
+    print(f"{Fore.CYAN}─────────────────")
+    print(f"{Fore.WHITE}Directories: {report['total_roots']}")
+    print(f"{Fore.WHITE}Total Files: {report['total_files']}")
+    print(f"{Fore.WHITE}Total Chars: {report['total_characters']}")
+    if report["total_tokens"] is not None:
+        print(f"{Fore.WHITE}Total Tokens: {report['total_tokens']}")
+    print(f"{Fore.WHITE}    Elapsed: {report['elapsed']}s")
+
+    failed = [root for root in report["roots"] if root["status"] != "ok"]
+    if failed:
+        print(f"\n{Fore.RED}❌ Failed Directories: {len(failed)}")
+        for root in failed:
+            print(f"{Fore.WHITE}  - {root['root']}: {root['error']}")
+
 
 def print_completion() -> None:
     """
     Print a completion message indicating that the repository has been successfully packed.
     """
+    Fore = get_colors(sys.stdout)[0]
     print(f"\n{Fore.GREEN}🎉 All Done!")
     print(f"{Fore.WHITE}Your repository has been successfully packed.")
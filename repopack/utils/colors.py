@@ -0,0 +1,48 @@
+from functools import lru_cache
+from typing import Any, TextIO, Tuple
+
+
+class NoColor:
+    """Stand-in for colorama's Fore and Style whose every color is an empty string."""
+
+    def __getattr__(self, name: str) -> str:
+        return ""
+
+
+# Shared stand-in used when output is not a terminal
+NO_COLOR: NoColor = NoColor()
+
+
+@lru_cache(maxsize=None)
+def load_colorama() -> Tuple[Any, Any]:
+    """
+    Import and initialize colorama, once per process.
+
+    Returns:
+        Tuple[Any, Any]: colorama's Fore and Style.
+    """
+    import colorama
+
+    # Initialize colorama for cross-platform colored terminal output
+    colorama.init(autoreset=True)
+    return colorama.Fore, colorama.Style
+
+
+def get_colors(stream: TextIO) -> Tuple[Any, Any]:
+    """
+    Get the colors to use when writing to a stream.
+
+    colorama is only imported and initialized once a terminal is written to, so
+    redirected output carries no escape codes and startup does not pay for it.
+
+    Args:
+        stream (TextIO): The stream that will be written to.
+
+    Returns:
+        Tuple[Any, Any]: colorama's Fore and Style if the stream is a terminal, otherwise
+            stand-ins producing empty strings.
+    """
+    isatty = getattr(stream, "isatty", None)
+    if isatty is None or not isatty():
+        return NO_COLOR, NO_COLOR
+    return load_colorama()
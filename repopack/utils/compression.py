@@ -0,0 +1,104 @@
+import bz2
+import gzip
+import lzma
+from typing import Any, BinaryIO, Dict, Optional
+from ..exceptions import ConfigurationError
+
+# File name suffix of each supported compression format
+COMPRESSION_SUFFIXES: Dict[str, str] = {
+    "gzip": ".gz",
+    "bz2": ".bz2",
+    "xz": ".xz",
+    "zstd": ".zst",
+}
+
+# Compression level used when none is configured, trading speed for size like the usual CLIs
+DEFAULT_COMPRESSION_LEVELS: Dict[str, int] = {
+    "gzip": 6,
+    "bz2": 9,
+    "xz": 6,
+    "zstd": 3,
+}
+
+
+def get_compression_format(config: Dict[str, Any]) -> str:
+    """
+    Get the configured output compression format.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        str: The format name, or an empty string if the output is not compressed.
+
+    Raises:
+        ConfigurationError: If the format is unknown.
+    """
+    compression_format: str = config.get("compression", {}).get("format") or ""
+    if compression_format and compression_format not in COMPRESSION_SUFFIXES:
+        raise ConfigurationError(
+            f"Unknown compression format: {compression_format} "
+            f"(expected one of {', '.join(COMPRESSION_SUFFIXES)})"
+        )
+    return compression_format
+
+
+def get_compressed_path(output_path: str, config: Dict[str, Any]) -> str:
+    """
+    Get the path an output file is written to, with the compression suffix if compressed.
+
+    Args:
+        output_path (str): The configured output path.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        str: output_path, followed by the format's suffix unless it already ends with it.
+    """
+    compression_format = get_compression_format(config)
+    if not compression_format:
+        return output_path
+    suffix = COMPRESSION_SUFFIXES[compression_format]
+    return output_path if output_path.endswith(suffix) else output_path + suffix
+
+
+def open_compressor(raw: BinaryIO, config: Dict[str, Any]) -> BinaryIO:
+    """
+    Wrap a binary file in the configured compressor.
+
+    Data is compressed as it is written. zstd needs the optional 'zstandard'
+    package and is the only format that compresses with several threads
+    ('compression.threads', 0 for one per CPU).
+
+    Args:
+        raw (BinaryIO): The file the compressed stream is written to; it is left open.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        BinaryIO: A writable binary stream; closing it finishes the compressed data.
+
+    Raises:
+        ConfigurationError: If the format is unknown or its codec is unavailable.
+    """
+    compression_config: Dict[str, Any] = config.get("compression", {})
+    compression_format = get_compression_format(config)
+    level: Optional[int] = compression_config.get("level")
+    if level is None:
+        level = DEFAULT_COMPRESSION_LEVELS[compression_format]
+    threads = int(compression_config.get("threads", 0))
+
+    if compression_format == "gzip":
+        # Leave the temporary file's name and time out of the gzip header
+        return gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=raw, mtime=0)
+    if compression_format == "bz2":
+        return bz2.BZ2File(raw, "wb", compresslevel=level)
+    if compression_format == "xz":
+        return lzma.LZMAFile(raw, "wb", preset=level)
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ConfigurationError(
+            "zstd compression requires the 'zstandard' package (pip install repopack[zstd])"
+        )
+    compressor = zstandard.ZstdCompressor(level=level, threads=-1 if threads <= 0 else threads)
+    return compressor.stream_writer(raw, closefd=False)
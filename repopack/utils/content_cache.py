@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .logger import logger
+from .tokenizer import is_counting_enabled
+
+# Bump when the cached representation changes so stale entries are ignored
+CACHE_FORMAT_VERSION = 3
+
+# Configuration options that affect sanitized content, by configuration section
+CACHE_RELEVANT_OPTIONS: Dict[str, List[str]] = {
+    "output": ["remove_comments", "remove_empty_lines", "show_line_numbers"],
+    "encoding": ["default_encodings", "overrides", "detection_sample_size"],
+    "tokens": ["tokenizer", "vocab_file"],
+}
+
+
+def get_options_hash(config: Dict[str, Any]) -> str:
+    """
+    Hash the configuration options that affect sanitized file content.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        str: A hex digest identifying the relevant options.
+    """
+    relevant: Dict[str, Any] = {"version": CACHE_FORMAT_VERSION}
+    for section, keys in CACHE_RELEVANT_OPTIONS.items():
+        values = config.get(section, {})
+        relevant[section] = {key: values.get(key) for key in keys}
+    # Entries hold token counts only if counting was on, whether enabled or implied by a budget
+    relevant["tokens"]["counting"] = is_counting_enabled(config)
+    encoded = json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ContentCache:
+    """An on-disk SQLite cache of sanitized file contents keyed by file stat data."""
+
+    def __init__(self, cache_path: str, options_hash: str, max_size: int) -> None:
+        """
+        Open or create the cache database.
+
+        Args:
+            cache_path (str): The path to the SQLite cache file.
+            options_hash (str): Hash of the options the cached content depends on.
+            max_size (int): Maximum total size of cached content in bytes.
+
+        Raises:
+            sqlite3.Error: If the cache database cannot be opened.
+        """
+        self.cache_path: str = cache_path
+        self.options_hash: str = options_hash
+        self.max_size: int = max_size
+        self.used_paths: List[Tuple[float, str]] = []
+        self.connection: sqlite3.Connection = sqlite3.connect(cache_path, timeout=5)
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != CACHE_FORMAT_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS entries")
+            self.connection.execute(f"PRAGMA user_version = {CACHE_FORMAT_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, "
+            "options_hash TEXT, is_binary INTEGER, encoding TEXT, content TEXT, "
+            "tokens INTEGER, comment_bytes INTEGER, content_size INTEGER, last_used REAL)"
+        )
+
+    def find_valid(self, file_stats: Dict[str, os.stat_result]) -> Set[str]:
+        """
+        Find the files whose cached entry matches their current stat data and options.
+
+        Args:
+            file_stats (Dict[str, os.stat_result]): Current stat data by relative file path.
+
+        Returns:
+            Set[str]: The paths that can be served from the cache.
+        """
+        valid: Set[str] = set()
+        rows = self.connection.execute(
+            "SELECT path, size, mtime_ns, inode, options_hash FROM entries"
+        )
+        for path, size, mtime_ns, inode, options_hash in rows:
+            stat = file_stats.get(path)
+            if (
+                stat is not None
+                and options_hash == self.options_hash
+                and (size, mtime_ns, inode) == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            ):
+                valid.add(path)
+        return valid
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """
+        Load a cached entry.
+
+        Args:
+            path (str): The relative file path.
+
+        Returns:
+            Dict[str, Any]: The cached binary flag, encoding, content, token count and number
+                of bytes removed with comments.
+        """
+        is_binary, encoding, content, tokens, comment_bytes = self.connection.execute(
+            "SELECT is_binary, encoding, content, tokens, comment_bytes FROM entries "
+            "WHERE path = ?",
+            (path,),
+        ).fetchone()
+        self.used_paths.append((time.time(), path))
+        return {
+            "binary": bool(is_binary),
+            "encoding": encoding,
+            "content": content,
+            "tokens": tokens,
+            "comment_bytes": comment_bytes or 0,
+        }
+
+    def store(self, path: str, stat: os.stat_result, entry: Dict[str, Any]) -> None:
+        """
+        Store a freshly sanitized entry.
+
+        Args:
+            path (str): The relative file path.
+            stat (os.stat_result): The stat data taken before the file was read.
+            entry (Dict[str, Any]): The binary flag, encoding, content, token count and number of
+                bytes removed with comments to cache.
+        """
+        content: Optional[str] = entry["content"]
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                stat.st_size,
+                stat.st_mtime_ns,
+                stat.st_ino,
+                self.options_hash,
+                int(entry["binary"]),
+                entry["encoding"],
+                content,
+                entry.get("tokens"),
+                entry.get("comment_bytes", 0),
+                len(content.encode("utf-8")) if content else 0,
+                time.time(),
+            ),
+        )
+
+    def evict(self) -> int:
+        """
+        Evict the least recently used entries until the cache fits within max_size.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+        (total_size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(content_size), 0) FROM entries"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return 0
+
+        evicted: List[Tuple[str]] = []
+        rows = self.connection.execute(
+            "SELECT path, content_size FROM entries ORDER BY last_used ASC"
+        ).fetchall()
+        for path, content_size in rows:
+            if total_size <= self.max_size:
+                break
+            evicted.append((path,))
+            total_size -= content_size
+        self.connection.executemany("DELETE FROM entries WHERE path = ?", evicted)
+        return len(evicted)
+
+    def close(self) -> None:
+        """
+        Record entry usage, apply size-based eviction and commit the cache.
+
+        Errors are logged rather than raised, since the cache is only an optimization.
+        """
+        try:
+            self.connection.executemany(
+                "UPDATE entries SET last_used = ? WHERE path = ?", self.used_paths
+            )
+            evicted = self.evict()
+            if evicted:
+                logger.debug(f"Evicted {evicted} entries from content cache")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update content cache: {str(e)}")
+        finally:
+            self.connection.close()
+
+
+def get_user_cache_dir() -> str:
+    """
+    Get the per-user directory for cached data.
+
+    Returns:
+        str: '$XDG_CACHE_HOME/repopackpy' if the variable is set, otherwise the platform's
+            user cache directory with a 'repopackpy' subdirectory.
+    """
+    base_dir = os.environ.get("XDG_CACHE_HOME")
+    if not base_dir:
+        if os.name == "nt":
+            base_dir = os.environ.get("LOCALAPPDATA") or os.path.expanduser(
+                os.path.join("~", "AppData", "Local")
+            )
+        elif sys.platform == "darwin":
+            base_dir = os.path.expanduser("~/Library/Caches")
+        else:
+            base_dir = os.path.expanduser("~/.cache")
+    return os.path.join(base_dir, "repopackpy")
+
+
+def get_cache_path(root_dir: str, config: Dict[str, Any]) -> str:
+    """
+    Get the path of the content cache database of a directory.
+
+    Args:
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        str: 'cache.path' resolved against root_dir if it is set, otherwise a database in the
+            per-user cache directory named after a hash of root_dir, so packing never writes
+            into the packed directory by default.
+    """
+    cache_path: str = config.get("cache", {}).get("path", "")
+    if cache_path:
+        return os.path.join(root_dir, cache_path)
+    root_hash = hashlib.sha256(os.path.realpath(root_dir).encode("utf-8")).hexdigest()
+    return os.path.join(get_user_cache_dir(), f"{root_hash[:32]}.db")
+
+
+def open_content_cache(root_dir: str, config: Dict[str, Any]) -> Optional[ContentCache]:
+    """
+    Open the content cache described by the configuration.
+
+    Args:
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Optional[ContentCache]: The opened cache, or None if caching is disabled or the cache
+            cannot be opened.
+    """
+    cache_config: Dict[str, Any] = config.get("cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+
+    cache_path = get_cache_path(root_dir, config)
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        return ContentCache(cache_path, get_options_hash(config), cache_config["max_size"])
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Content cache disabled, could not open {cache_path}: {str(e)}")
+        return None
@@ -0,0 +1,151 @@
+import codecs
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from .logger import logger
+from .profiler import profiler
+
+if TYPE_CHECKING:
+    from pathspec import PathSpec
+
+# Default number of leading bytes passed to chardet when detection is needed
+DEFAULT_DETECTION_SAMPLE_SIZE = 64 * 1024
+
+# Byte order marks, longest first so UTF-32 is not mistaken for UTF-16
+BOM_ENCODINGS: List[Tuple[bytes, str]] = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+@lru_cache(maxsize=32)
+def compile_encoding_overrides(
+    overrides: Tuple[Tuple[str, str], ...],
+) -> List[Tuple["PathSpec", str]]:
+    """
+    Compile per-glob encoding overrides.
+
+    Args:
+        overrides (Tuple[Tuple[str, str], ...]): Pairs of glob pattern and encoding.
+
+    Returns:
+        List[Tuple[PathSpec, str]]: Compiled patterns with their encodings, in order.
+    """
+    from pathspec import PathSpec
+    from pathspec.patterns import GitWildMatchPattern
+
+    return [
+        (PathSpec.from_lines(GitWildMatchPattern, [pattern]), encoding)
+        for pattern, encoding in overrides
+    ]
+
+
+def get_encoding_override(file_path: str, config: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the configured encoding override for a file, if any.
+
+    Args:
+        file_path (str): The file path relative to the root directory.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Optional[str]: The encoding of the first matching override, or None.
+    """
+    overrides: Dict[str, str] = config.get("encoding", {}).get("overrides", {})
+    if not overrides:
+        return None
+    for spec, encoding in compile_encoding_overrides(tuple(overrides.items())):
+        if spec.match_file(file_path):
+            return encoding
+    return None
+
+
+def detect_bom(raw_content: bytes) -> Optional[str]:
+    """
+    Detect a Unicode byte order mark at the start of the content.
+
+    Args:
+        raw_content (bytes): The raw file content.
+
+    Returns:
+        Optional[str]: The encoding indicated by the BOM, or None if there is none.
+    """
+    head = bytes(raw_content[:4])
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def decode_content(raw_content: bytes, file_path: str, config: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Decode raw file content using a tiered strategy.
+
+    In order: a per-glob override from the 'encoding' configuration, a byte order
+    mark, a strict decode with each default encoding (UTF-8 unless configured
+    otherwise), and finally chardet on a bounded prefix of the content. If the
+    encoding guessed from the prefix cannot decode the whole content, chardet is
+    run on all of it, and cp1252 and finally latin-1, which decodes any bytes,
+    are used when that fails too.
+
+    Args:
+        raw_content (bytes): The raw file content.
+        file_path (str): The file path relative to the root directory, used for overrides.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Tuple[str, str]: The decoded content and the encoding used.
+    """
+    encoding_config: Dict[str, Any] = config.get("encoding", {})
+    profiler.count("bytes_decoded", len(raw_content))
+
+    override = get_encoding_override(file_path, config)
+    if override:
+        try:
+            return str(raw_content, override), override
+        except (UnicodeDecodeError, LookupError):
+            logger.warning(f"Failed to decode {file_path} with override {override}, detecting")
+
+    bom_encoding = detect_bom(raw_content)
+    if bom_encoding:
+        try:
+            return str(raw_content, bom_encoding), bom_encoding
+        except UnicodeDecodeError:
+            logger.warning(f"Failed to decode {file_path} despite {bom_encoding} BOM, detecting")
+
+    for encoding in encoding_config.get("default_encodings", ["utf-8"]):
+        try:
+            return str(raw_content, encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+
+    sample_size = encoding_config.get("detection_sample_size", DEFAULT_DETECTION_SAMPLE_SIZE)
+    import chardet
+
+    failed: List[str] = []
+    samples = [bytes(raw_content[:sample_size])]
+    if len(raw_content) > sample_size:
+        samples.append(bytes(raw_content))
+    for sample in samples:
+        profiler.count("chardet_calls")
+        profiler.count("chardet_bytes", len(sample))
+        encoding = chardet.detect(sample)["encoding"] or "utf-8"
+        if encoding in failed:
+            continue
+        try:
+            content = str(raw_content, encoding)
+            logger.trace(f"File encoding detected: {encoding}")
+            return content, encoding
+        except (UnicodeDecodeError, LookupError):
+            logger.debug(f"Failed to decode {file_path} with detected encoding {encoding}")
+            failed.append(encoding)
+
+    try:
+        return str(raw_content, "cp1252"), "cp1252"
+    except UnicodeDecodeError:
+        # latin-1 maps every byte to a character, so this cannot fail
+        logger.debug(f"Failed to decode {file_path} with detected encodings, using latin-1")
+        return str(raw_content, "latin-1"), "latin-1"
+
@@ -0,0 +1,116 @@
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator
+from ..exceptions import ConfigurationError
+from .tokenizer import get_tokenizer
+
+# Text written in place of the content of a file identical to an earlier one
+DUPLICATE_REFERENCE = "[Identical to {path}; content omitted]"
+
+# Content hashes that deduplication can use
+DEDUP_HASHES = ("fast", "sha256")
+
+
+def blake2b_hash(data: bytes) -> Hashable:
+    """
+    Hash data with 128-bit BLAKE2b.
+
+    Args:
+        data (bytes): The data to hash.
+
+    Returns:
+        Hashable: The digest.
+    """
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def sha256_hash(data: bytes) -> Hashable:
+    """
+    Hash data with SHA-256.
+
+    Args:
+        data (bytes): The data to hash.
+
+    Returns:
+        Hashable: The digest.
+    """
+    return hashlib.sha256(data).digest()
+
+
+def get_hash_function(name: str) -> Callable[[bytes], Hashable]:
+    """
+    Get a content hash function by name.
+
+    Args:
+        name (str): 'fast' for xxHash, or BLAKE2b without the optional 'xxhash' package
+            (the 'fast-hash' extra); 'sha256' for SHA-256.
+
+    Returns:
+        Callable[[bytes], Hashable]: The hash function.
+
+    Raises:
+        ConfigurationError: If the hash is unknown.
+    """
+    if name == "fast":
+        # xxHash when the optional package is installed, BLAKE2b from the stdlib otherwise
+        try:
+            import xxhash
+        except ImportError:
+            return blake2b_hash
+        return xxhash.xxh3_128_digest
+    if name == "sha256":
+        return sha256_hash
+    raise ConfigurationError(
+        f"Unknown dedup hash: {name} (expected one of {', '.join(DEDUP_HASHES)})"
+    )
+
+
+def deduplicate_files(
+    sanitized_files: Iterable[Dict[str, Any]], config: Dict[str, Any], stats: Dict[str, Any]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Replace the content of files identical to an earlier file with a reference to it.
+
+    Files are compared by a hash of their sanitized content, so only the hashes of
+    files already seen are kept in memory. Files whose content is no longer than
+    the reference are left as they are.
+
+    Args:
+        sanitized_files (Iterable[Dict[str, Any]]): The sanitized files, in output order.
+        config (Dict[str, Any]): The configuration dictionary.
+        stats (Dict[str, Any]): Dictionary updated with the path of the first occurrence of
+            each duplicate ('duplicate_files') and the number of UTF-8 bytes left out of the
+            output ('dedup_bytes_saved').
+
+    Yields:
+        Dict[str, Any]: The files, duplicates with the reference as content and the first
+            occurrence's path under 'duplicate_of'.
+
+    Raises:
+        ConfigurationError: If the configured hash is unknown.
+    """
+    hash_content = get_hash_function(config.get("dedup", {}).get("hash", "fast"))
+    tokenizer = get_tokenizer(config)
+    first_paths: Dict[Hashable, str] = {}
+    duplicate_files: Dict[str, str] = stats.setdefault("duplicate_files", {})
+    stats.setdefault("dedup_bytes_saved", 0)
+
+    for file in sanitized_files:
+        data = file["content"].encode("utf-8")
+        key = hash_content(data)
+        first_path = first_paths.get(key)
+        if first_path is None:
+            first_paths[key] = file["path"]
+            yield file
+            continue
+
+        reference = DUPLICATE_REFERENCE.format(path=first_path)
+        saved = len(data) - len(reference.encode("utf-8"))
+        if saved <= 0:
+            yield file
+            continue
+        duplicate_files[file["path"]] = first_path
+        stats["dedup_bytes_saved"] += saved
+        duplicate = dict(file, content=reference, duplicate_of=first_path)
+        if "tokens" in file:
+            duplicate["tokens"] = tokenizer.count(reference)
+        yield duplicate
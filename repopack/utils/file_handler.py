@@ -1,9 +1,24 @@
+import mmap
 import os
-import chardet
-from typing import List, Dict, Any, Optional
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple
+from ..config import parse_size
 from ..exceptions import FileProcessingError
+from .content_cache import ContentCache
+from .decoder import decode_content
 from .file_manipulator import FileManipulator
+from .git_reader import read_git_blob
 from .logger import logger
+from .profiler import call_with_counters, profiler
+from .tokenizer import get_tokenizer
+
+# Number of leading bytes inspected for null bytes when detecting binary files
+BINARY_CHECK_SIZE = 1024
+
+# Files at least this large are memory-mapped instead of copied into memory
+DEFAULT_MMAP_THRESHOLD = 1024 * 1024
 
 
 def is_binary(file_path: str) -> bool:
@@ -18,44 +33,472 @@ def is_binary(file_path: str) -> bool:
     """
     try:
         with open(file_path, "rb") as file:
-            chunk = file.read(1024)
+            chunk = file.read(BINARY_CHECK_SIZE)
             return b"\0" in chunk  # Check for null bytes
     except IOError:
         return False
 
 
+def get_worker_count(config: Dict[str, Any]) -> int:
+    """
+    Get the number of ingestion workers from the configuration.
+
+    Args:
+        config (Dict[str, Any]): Configuration dictionary.
+
+    Returns:
+        int: The number of workers; a configured value of 0 or less means one per CPU.
+    """
+    jobs = int(config.get("processing", {}).get("jobs", 1))
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def create_executor(config: Dict[str, Any], jobs: int) -> Executor:
+    """
+    Create the worker pool used for file ingestion.
+
+    A thread pool suits I/O-bound work; a process pool can be selected with
+    'processing.executor' for CPU-heavy decoding and comment removal.
+
+    Args:
+        config (Dict[str, Any]): Configuration dictionary.
+        jobs (int): The maximum number of workers.
+
+    Returns:
+        Executor: A thread or process pool executor.
+    """
+    if config.get("processing", {}).get("executor", "thread") == "process":
+        # Imported here as it pulls in multiprocessing, which slows down startup
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=jobs)
+    return ThreadPoolExecutor(max_workers=jobs)
+
+
+def run_ordered(
+    func: Callable[..., Any], tasks: Iterable[Tuple[Any, ...]], config: Dict[str, Any]
+) -> Iterator[Any]:
+    """
+    Run tasks on a bounded worker pool, yielding results in submission order.
+
+    At most a few tasks per worker are in flight at any time, so results are
+    not accumulated faster than the caller consumes them.
+
+    Args:
+        func (Callable[..., Any]): The function to run; must be picklable for process pools.
+        tasks (Iterable[Tuple[Any, ...]]): Argument tuples, one per task.
+        config (Dict[str, Any]): Configuration dictionary.
+
+    Yields:
+        Any: The result of each task, in the order the tasks were given.
+    """
+    jobs = get_worker_count(config)
+    if jobs == 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    with create_executor(config, jobs) as executor:
+        # Worker processes do not share the profiler, so their counters are sent back
+        collect_counters = profiler.enabled and not isinstance(executor, ThreadPoolExecutor)
+        pending: Deque[Future] = deque()
+        try:
+            for task in tasks:
+                if collect_counters:
+                    pending.append(executor.submit(call_with_counters, func, *task))
+                else:
+                    pending.append(executor.submit(func, *task))
+                if len(pending) >= jobs * 4:
+                    yield get_result(pending.popleft(), collect_counters)
+            while pending:
+                yield get_result(pending.popleft(), collect_counters)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def get_result(future: Future, with_counters: bool) -> Any:
+    """
+    Wait for a task's result, merging the profiler counters sent back with it.
+
+    Args:
+        future (Future): The task's future.
+        with_counters (bool): Whether the task ran through call_with_counters().
+
+    Returns:
+        Any: The task's result.
+    """
+    if not with_counters:
+        return future.result()
+    result, counters = future.result()
+    profiler.merge_counters(counters)
+    return result
+
+
+def sanitize_entry(file_path: str, root_dir: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read and sanitize a single repository file, skipping binary files.
+
+    When 'git.ref' is set, the file is read from that ref in the git object store
+    instead of the working tree.
+
+    Args:
+        file_path (str): The file path relative to root_dir.
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): Configuration dictionary.
+
+    Returns:
+        Dict[str, Any]: A dictionary with the binary flag ('binary'), the detected
+            encoding ('encoding'), the sanitized content ('content'), its token count
+            ('tokens', None unless token counting is enabled), the number of bytes
+            removed with comments ('comment_bytes') and the size in bytes of a file read
+            from a git ref ('size', None for working tree files, whose stat data gives
+            it); encoding and content are None for binary files.
+
+    Raises:
+        FileProcessingError: If there's an error processing the file.
+    """
+    full_path = os.path.join(root_dir, file_path)
+    git_ref: str = config.get("git", {}).get("ref", "")
+    size: Optional[int] = None
+    try:
+        with profiler.stage("read_decode"):
+            if git_ref:
+                raw_content = read_git_blob(root_dir, git_ref, file_path)
+                size = len(raw_content)
+                decoded = decode_blob(raw_content, file_path, config)
+            else:
+                decoded = read_file(full_path, config, file_path)
+        if decoded is None:
+            return {
+                "binary": True,
+                "encoding": None,
+                "content": None,
+                "tokens": None,
+                "comment_bytes": 0,
+                "size": size,
+            }
+        content, encoding = decoded
+        transform_stats: Dict[str, Any] = {}
+        with profiler.stage("transform"):
+            content = transform_content(content, full_path, config, transform_stats)
+        tokenizer = get_tokenizer(config)
+        tokens = None
+        if tokenizer is not None:
+            with profiler.stage("tokenize"):
+                tokens = tokenizer.count(content)
+        return {
+            "binary": False,
+            "encoding": encoding,
+            "content": content,
+            "tokens": tokens,
+            "comment_bytes": transform_stats.get("comment_bytes", 0),
+            "size": size,
+        }
+    except Exception as e:
+        raise FileProcessingError(file_path=file_path, error_message=str(e))
+
+
+class SizeLimits:
+    """
+    Applies the configured size limits to files in packing order.
+
+    Files larger than 'processing.max_file_size' are skipped. Text files that would
+    take the total size of the selected files past 'processing.max_total_size' are
+    left out, and smaller files after them are still selected while they fit. A limit
+    of 0 disables the check.
+    """
+
+    __slots__ = ("max_file_size", "max_total_size", "total_size", "skipped", "truncated")
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        """
+        Initialize the SizeLimits.
+
+        Args:
+            config (Dict[str, Any]): Configuration dictionary.
+        """
+        processing: Dict[str, Any] = config.get("processing", {})
+        self.max_file_size: int = parse_size(processing.get("max_file_size", 0))
+        self.max_total_size: int = parse_size(processing.get("max_total_size", 0))
+        self.total_size = 0
+        # The files skipped for exceeding the per-file limit and left out by the total limit
+        self.skipped: List[str] = []
+        self.truncated: List[str] = []
+
+    def within_file_limit(self, file_path: str, size: int) -> bool:
+        """
+        Check a file against the per-file limit, recording it as skipped if it exceeds it.
+
+        Args:
+            file_path (str): The file path.
+            size (int): The size of the file in bytes.
+
+        Returns:
+            bool: True if the file may be packed.
+        """
+        if self.max_file_size and size > self.max_file_size:
+            self.skipped.append(file_path)
+            logger.trace(f"File skipped (exceeds max file size): {file_path}")
+            return False
+        return True
+
+    def within_total_limit(self, file_path: str, size: int) -> bool:
+        """
+        Check a text file against the remaining total budget, using it up if the file fits.
+
+        Binary files are dropped when read, so only text files are checked.
+
+        Args:
+            file_path (str): The file path.
+            size (int): The size of the file in bytes.
+
+        Returns:
+            bool: True if the file may be packed.
+        """
+        if not self.max_total_size:
+            return True
+        if self.total_size + size > self.max_total_size:
+            self.truncated.append(file_path)
+            logger.trace(f"File skipped (exceeds remaining total size budget): {file_path}")
+            return False
+        self.total_size += size
+        return True
+
+
+def add_comment_bytes(totals: Dict[str, int], file_path: str, entry: Dict[str, Any]) -> None:
+    """
+    Add the bytes removed with comments from a sanitized file to the totals of its language.
+
+    Args:
+        totals (Dict[str, int]): Bytes removed by language, updated in place.
+        file_path (str): The path of the file.
+        entry (Dict[str, Any]): The file's entry from sanitize_entry().
+    """
+    comment_bytes: int = entry.get("comment_bytes", 0)
+    if not comment_bytes:
+        return
+    language = FileManipulator.get_language(os.path.splitext(file_path)[1])
+    if language is not None:
+        totals[language] = totals.get(language, 0) + comment_bytes
+
+
 def sanitize_files(
-    file_paths: List[str], root_dir: str, config: Dict[str, Any]
-) -> List[Dict[str, str]]:
+    file_paths: List[str],
+    root_dir: str,
+    config: Dict[str, Any],
+    cache: Optional[ContentCache] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
     """
     Sanitize files based on the given configuration.
 
+    Files are processed concurrently according to the 'processing' configuration and
+    yielded lazily in the order of file_paths, so callers can stream them to the output
+    without holding every file in memory. When a cache is given, files whose stat data
+    is unchanged are served from it and only the remaining files are read. Working tree
+    files over the per-file size limit are left out before they are read; the other
+    limits are applied to the sizes and binary checks of the reads themselves.
+
     Args:
         file_paths (List[str]): List of file paths to sanitize.
         root_dir (str): The root directory of the project.
         config (Dict[str, Any]): Configuration dictionary.
+        cache (Optional[ContentCache]): Content cache for incremental re-packs. Defaults to None.
+        stats (Optional[Dict[str, Any]]): If given, filled as files are yielded with the files
+            left out by the size limits ('skipped_files' and 'truncated_files') and the bytes
+            removed with comments by language ('comment_bytes_removed').
 
-    Returns:
-        List[Dict[str, str]]: List of dictionaries containing sanitized file paths and contents.
+    Yields:
+        Dict[str, Any]: Dictionaries containing sanitized file paths, contents and encodings,
+            plus token counts when token counting is enabled and sizes in bytes ('size').
 
     Raises:
         FileProcessingError: If there's an error processing a file.
     """
-    sanitized_files = []
+    limits = SizeLimits(config)
+    comment_bytes_removed: Dict[str, int] = {}
+    if stats is not None:
+        stats["skipped_files"] = limits.skipped
+        stats["truncated_files"] = limits.truncated
+        stats["comment_bytes_removed"] = comment_bytes_removed
+
+    # Working tree sizes are reported with each file and used by the cache and size limits;
+    # files read from a ref are sized by their blobs instead
+    reading_ref = bool(config.get("git", {}).get("ref"))
+    file_stats: Dict[str, os.stat_result] = {}
+    if not reading_ref:
+        for file_path in file_paths:
+            try:
+                file_stats[file_path] = os.stat(os.path.join(root_dir, file_path))
+            except OSError:
+                continue
+        file_paths = [
+            file_path
+            for file_path in file_paths
+            if file_path not in file_stats
+            or limits.within_file_limit(file_path, file_stats[file_path].st_size)
+        ]
+
+    cached_paths: Set[str] = set()
+    if cache is not None:
+        cached_paths = cache.find_valid(
+            {
+                file_path: file_stats[file_path]
+                for file_path in file_paths
+                if file_path in file_stats
+            }
+        )
+        logger.debug(f"Content cache hits: {len(cached_paths)} of {len(file_paths)} files")
+
+    pending_paths = [file_path for file_path in file_paths if file_path not in cached_paths]
+    tasks = ((file_path, root_dir, config) for file_path in pending_paths)
+    results = run_ordered(sanitize_entry, tasks, config)
+
     for file_path in file_paths:
-        full_path = os.path.join(root_dir, file_path)
-        logger.trace(f"Sanitizing file: {file_path}")
-        try:
-            if not is_binary(full_path):
-                content = sanitize_file(full_path, config)
-                if content:
-                    sanitized_files.append({"path": file_path, "content": content})
-                    logger.trace(f"File sanitized: {file_path}")
-                else:
-                    logger.trace(f"File skipped (empty content): {file_path}")
-        except Exception as e:
-            raise FileProcessingError(file_path=file_path, error_message=str(e))
-    return sanitized_files
+        if file_path in cached_paths:
+            entry = cache.load(file_path)
+            profiler.count("cache_hits")
+            logger.trace(f"File loaded from cache: {file_path}")
+        else:
+            entry = next(results)
+            if cache is not None and file_path in file_stats:
+                cache.store(file_path, file_stats[file_path], entry)
+
+        stat = file_stats.get(file_path)
+        size: Optional[int] = stat.st_size if stat is not None else entry.get("size")
+        if reading_ref and not limits.within_file_limit(file_path, size or 0):
+            continue
+        if not entry["content"]:
+            profiler.count("files_skipped.binary" if entry["binary"] else "files_skipped.empty")
+            logger.trace(f"File skipped (binary or empty content): {file_path}")
+            continue
+        if not limits.within_total_limit(file_path, size or 0):
+            continue
+
+        logger.trace(f"File sanitized: {file_path}")
+        add_comment_bytes(comment_bytes_removed, file_path, entry)
+        file = {"path": file_path, "content": entry["content"], "encoding": entry["encoding"]}
+        if entry["tokens"] is not None:
+            file["tokens"] = entry["tokens"]
+        if size is not None:
+            file["size"] = size
+        yield file
+
+
+@contextmanager
+def open_file_content(file_path: str, mmap_threshold: int) -> Iterator[Optional[Any]]:
+    """
+    Open a file once and provide its raw content unless it is binary.
+
+    The first chunk decides whether the file is binary; the rest of the file is only
+    read for text files. Files of at least mmap_threshold bytes are memory-mapped so
+    their content is not copied into a bytes object before decoding.
+
+    Args:
+        file_path (str): The path to the file to open.
+        mmap_threshold (int): The file size from which the content is memory-mapped.
+
+    Yields:
+        Optional[Any]: A bytes-like object with the file content, or None if the file is binary.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(BINARY_CHECK_SIZE)
+        if b"\0" in head:  # Check for null bytes
+            yield None
+        elif len(head) < BINARY_CHECK_SIZE:
+            yield head
+        elif os.fstat(f.fileno()).st_size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        else:
+            yield head + f.read()
+
+
+def read_file(
+    file_path: str, config: Dict[str, Any], relative_path: Optional[str] = None
+) -> Optional[Tuple[str, str]]:
+    """
+    Read a text file and decode it with the tiered decoder.
+
+    Args:
+        file_path (str): The path to the file to read.
+        config (Dict[str, Any]): Configuration dictionary.
+        relative_path (Optional[str]): The path relative to the root directory, used to match
+            encoding overrides. Defaults to file_path.
+
+    Returns:
+        Optional[Tuple[str, str]]: The decoded content and the encoding used, or None if the
+            file is binary.
+    """
+    mmap_threshold = config.get("processing", {}).get("mmap_threshold", DEFAULT_MMAP_THRESHOLD)
+    with open_file_content(file_path, mmap_threshold) as raw_content:
+        if raw_content is None:
+            return None
+        profiler.count("bytes_read", len(raw_content))
+        return decode_content(raw_content, relative_path or file_path, config)
+
+
+def decode_blob(
+    raw_content: bytes, file_path: str, config: Dict[str, Any]
+) -> Optional[Tuple[str, str]]:
+    """
+    Decode a file read from a git ref with the tiered decoder.
+
+    Args:
+        raw_content (bytes): The blob content.
+        file_path (str): The file path relative to the root directory.
+        config (Dict[str, Any]): Configuration dictionary.
+
+    Returns:
+        Optional[Tuple[str, str]]: The decoded content and the encoding used, or None if the
+            file is binary.
+    """
+    profiler.count("bytes_read", len(raw_content))
+    if b"\0" in raw_content[:BINARY_CHECK_SIZE]:  # Check for null bytes
+        return None
+    return decode_content(raw_content, file_path, config)
+
+
+def transform_content(
+    content: str, file_path: str, config: Dict[str, Any], stats: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Apply the configured output transformations to decoded file content.
+
+    Args:
+        content (str): The decoded file content.
+        file_path (str): The path of the file the content was read from.
+        config (Dict[str, Any]): Configuration dictionary.
+        stats (Optional[Dict[str, Any]]): If given, set to the number of UTF-8 bytes removed
+            with comments ('comment_bytes').
+
+    Returns:
+        str: The transformed content.
+    """
+    if config["output"]["remove_comments"]:
+        file_extension = os.path.splitext(file_path)[1]
+        stripped = FileManipulator.remove_comments(content, file_extension)
+        if stats is not None:
+            stats["comment_bytes"] = len(content.encode("utf-8")) - len(stripped.encode("utf-8"))
+        content = stripped
+        logger.trace(f"Comments removed from file: {file_path}")
+
+    # Remove empty lines if configured
+    if config["output"]["remove_empty_lines"]:
+        content = remove_empty_lines(content)
+        logger.trace(f"Empty lines removed from file: {file_path}")
+
+    content = content.strip()
+
+    # Add line numbers if configured
+    if config["output"]["show_line_numbers"]:
+        content = add_line_numbers(content)
+        logger.trace(f"Line numbers added to file: {file_path}")
+
+    return content
 
 
 def sanitize_file(file_path: str, config: Dict[str, Any]) -> Optional[str]:
@@ -67,45 +510,16 @@ def sanitize_file(file_path: str, config: Dict[str, Any]) -> Optional[str]:
         config (Dict[str, Any]): Configuration dictionary.
 
     Returns:
-        Optional[str]: The sanitized content of the file, or None if the file is empty.
+        Optional[str]: The sanitized content of the file, or None if the file is binary.
 
     Raises:
         FileProcessingError: If there's an error sanitizing the file.
     """
     try:
-        with open(file_path, "rb") as f:
-            raw_content = f.read()
-
-        # Detect file encoding
-        encoding = chardet.detect(raw_content)["encoding"] or "utf-8"
-        try:
-            content = raw_content.decode(encoding)
-            logger.trace(f"File encoding detected: {encoding}")
-        except UnicodeDecodeError:
-            logger.warning(f"Failed to decode with detected encoding {encoding}, trying UTF-8")
-            content = raw_content.decode("utf-8")
-            logger.trace("File decoded with UTF-8")
-
-        # Remove comments (not implemented yet)
-        if config["output"]["remove_comments"]:
-            raise NotImplementedError("Comment removal is not implemented yet.")
-            # file_extension = os.path.splitext(file_path)[1]
-            # content = FileManipulator.remove_comments(content, file_extension)
-            # logger.trace(f"Comments removed from file: {file_path}")
-
-        # Remove empty lines if configured
-        if config["output"]["remove_empty_lines"]:
-            content = remove_empty_lines(content)
-            logger.trace(f"Empty lines removed from file: {file_path}")
-
-        content = content.strip()
-
-        # Add line numbers if configured
-        if config["output"]["show_line_numbers"]:
-            content = add_line_numbers(content)
-            logger.trace(f"Line numbers added to file: {file_path}")
-
-        return content
+        decoded = read_file(file_path, config)
+        if decoded is None:
+            return None
+        return transform_content(decoded[0], file_path, config)
     except Exception as e:
         raise FileProcessingError(file_path=file_path, error_message=str(e))
 
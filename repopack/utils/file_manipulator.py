@@ -1,7 +1,309 @@
 # file: utils/file_manipulator.py
 
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+# Keywords after which a '/' starts a JavaScript regular expression literal, not a division
+REGEX_PRECEDING_KEYWORDS = frozenset(
+    {
+        "await",
+        "case",
+        "delete",
+        "do",
+        "else",
+        "in",
+        "instanceof",
+        "new",
+        "of",
+        "return",
+        "throw",
+        "typeof",
+        "void",
+        "yield",
+    }
+)
+
+# Characters after which a '/' starts a JavaScript regular expression literal
+REGEX_PRECEDING_CHARS = frozenset("(,=:[!&|?{};~+-*%<>^")
+
+# Trailing identifier or keyword of the code preceding a '/'
+TRAILING_WORD_PATTERN = re.compile(r"[\w$]+\Z")
+
+# Remainder of a line after a comment that ends it
+LINE_END_PATTERN = re.compile(r"[ \t]*(?:\r?\n|\Z)")
+
+# Remainder of a line after a Python string that forms a statement on its own
+STATEMENT_END_PATTERN = re.compile(r"[ \t]*(?:#[^\r\n]*)?(?:\r?\n|\Z)")
+
+
+def quoted_pattern(quote: str, multiline: bool, raw: bool = False) -> str:
+    """
+    Build a regular expression matching a string literal, or an unterminated one to its end.
+
+    Unterminated literals run to the end of the line, or of the content for literals that
+    may span lines, so that scanning never backtracks over them.
+
+    Args:
+        quote (str): The delimiter, one character or three repeated characters.
+        multiline (bool): Whether the literal may span lines.
+        raw (bool): Whether backslashes are literal characters rather than escapes, as in
+            Go's backtick strings. Defaults to False.
+
+    Returns:
+        str: The regular expression.
+    """
+    q = re.escape(quote[0])
+    if raw:
+        return f"{q}[^{q}]*{q}?" if multiline else f"{q}[^{q}\\r\\n]*{q}?"
+    if len(quote) == 3:
+        return f"{q}{{3}}[^{q}\\\\]*(?:(?:\\\\.|{q}(?!{q}{q}))[^{q}\\\\]*)*(?:{q}{{3}}|\\Z)"
+    if multiline:
+        return f"{q}[^{q}\\\\]*(?:\\\\.[^{q}\\\\]*)*{q}?"
+    return f"{q}[^{q}\\\\\\r\\n]*(?:\\\\.[^{q}\\\\\\r\\n]*)*{q}?"
+
+
+class CommentSyntax:
+    """
+    The lexical rules needed to tell a language's comments from its code and strings.
+
+    All rules are combined into one regular expression, so stripping comments scans
+    each file once, jumping from one comment, string or regular expression literal to
+    the next.
+    """
+
+    __slots__ = ("pattern", "block_comments", "regex_literals", "docstrings")
+
+    def __init__(
+        self,
+        line_comments: Sequence[str] = (),
+        block_comments: Sequence[Tuple[str, str]] = (),
+        quotes: Sequence[str] = (),
+        multiline_quotes: Sequence[str] = (),
+        raw_quotes: Sequence[str] = (),
+        string_prefix: str = "",
+        regex_literals: bool = False,
+        docstrings: bool = False,
+    ) -> None:
+        """
+        Initialize a CommentSyntax.
+
+        Args:
+            line_comments (Sequence[str]): Markers starting a comment that ends with the line.
+            block_comments (Sequence[Tuple[str, str]]): Start and end markers of block comments.
+            quotes (Sequence[str]): String delimiters, longest first.
+            multiline_quotes (Sequence[str]): The delimiters whose strings may span lines;
+                strings with other delimiters end at the end of the line.
+            raw_quotes (Sequence[str]): The delimiters whose strings have no backslash escapes.
+            string_prefix (str): Regular expression for an optional prefix of string literals.
+            regex_literals (bool): Whether '/' may start a JavaScript regular expression.
+            docstrings (bool): Whether strings forming a statement on their own are removed
+                like comments, as Python docstrings.
+        """
+        comments = [re.escape(marker) + r"[^\r\n]*" for marker in line_comments]
+        comments += [
+            re.escape(start) + r".*?(?:" + re.escape(end) + r"|\Z)" for start, end in block_comments
+        ]
+        strings = [
+            quoted_pattern(quote, len(quote) == 3 or quote in multiline_quotes, quote in raw_quotes)
+            for quote in quotes
+        ]
+        alternatives: List[str] = []
+        if comments:
+            alternatives.append(f"(?P<comment>{'|'.join(comments)})")
+        if strings:
+            alternatives.append(f"(?P<string>{string_prefix}(?:{'|'.join(strings)}))")
+        if regex_literals:
+            alternatives.append(
+                r"(?P<regex>/(?![*/])(?:[^/\\\[\r\n]|\\.|\[(?:[^\]\\\r\n]|\\.)*\])+/)"
+            )
+        self.pattern: Pattern[str] = re.compile("|".join(alternatives), re.DOTALL)
+        self.block_comments: Tuple[Tuple[str, str], ...] = tuple(block_comments)
+        self.regex_literals: bool = regex_literals
+        self.docstrings: bool = docstrings
+
+
+PYTHON_SYNTAX = CommentSyntax(
+    line_comments=["#"],
+    quotes=['"""', "'''", '"', "'"],
+    string_prefix=r"(?:(?<![\w])[rRbBuUfF]{1,2})?",
+    docstrings=True,
+)
+
+C_SYNTAX = CommentSyntax(
+    line_comments=["//"],
+    block_comments=[("/*", "*/")],
+    quotes=['"', "'"],
+)
+
+GO_SYNTAX = CommentSyntax(
+    line_comments=["//"],
+    block_comments=[("/*", "*/")],
+    quotes=['"', "'", "`"],
+    multiline_quotes=["`"],
+    raw_quotes=["`"],
+)
+
+JS_SYNTAX = CommentSyntax(
+    line_comments=["//"],
+    block_comments=[("/*", "*/")],
+    quotes=['"', "'", "`"],
+    multiline_quotes=["`"],
+    regex_literals=True,
+)
+
+HTML_SYNTAX = CommentSyntax(block_comments=[("<!--", "-->")])
+
+CSS_SYNTAX = CommentSyntax(block_comments=[("/*", "*/")], quotes=['"', "'"])
+
+
+def is_regex_context(preceding: str) -> bool:
+    """
+    Check whether a '/' following some code starts a regular expression literal.
+
+    Args:
+        preceding (str): The code before the '/', without trailing whitespace.
+
+    Returns:
+        bool: True for a regular expression literal, False for a division.
+    """
+    if not preceding or preceding[-1] in REGEX_PRECEDING_CHARS:
+        return True
+    word = TRAILING_WORD_PATTERN.search(preceding[-16:])
+    return word is not None and word.group() in REGEX_PRECEDING_KEYWORDS
+
+
+def is_unterminated_block(text: str, syntax: CommentSyntax) -> bool:
+    """
+    Check whether a comment is a block comment that runs to the end of the content unclosed.
+
+    Args:
+        text (str): The comment.
+        syntax (CommentSyntax): The lexical rules of the content's language.
+
+    Returns:
+        bool: True if the block comment has no end marker.
+    """
+    for start, end in syntax.block_comments:
+        if text.startswith(start):
+            return len(text) < len(start) + len(end) or not text.endswith(end)
+    return False
+
+
+def trim_line_end(out: List[str]) -> None:
+    """
+    Remove spaces and tabs from the end of the output.
+
+    Args:
+        out (List[str]): The output pieces, modified in place.
+    """
+    while out:
+        piece = out[-1].rstrip(" \t")
+        if piece:
+            out[-1] = piece
+            return
+        out.pop()
+
+
+def strip_comments(content: str, syntax: CommentSyntax) -> str:
+    """
+    Remove comments from content in a single pass.
+
+    Comment markers inside strings and regular expression literals are left alone.
+    Lines left empty by the removal are dropped, and a '#!' line at the start of the
+    content is kept. A block comment that is never closed is more likely a misread
+    string or regular expression than a comment, so the rest of the content is kept.
+
+    Args:
+        content (str): The content to remove comments from.
+        syntax (CommentSyntax): The lexical rules of the content's language.
+
+    Returns:
+        str: The content with comments removed.
+    """
+    out: List[str] = []
+    search = syntax.pattern.search
+    pos = 0
+    # Whether the current output line holds only whitespace so far
+    line_blank = True
+    # The last emitted text that is not whitespace, for regular expression detection
+    preceding = ""
+    # Bracket depth and line continuation of the code, for docstring detection
+    depth = 0
+    continued = False
+
+    while True:
+        match = search(content, pos)
+        if match is None:
+            out.append(content[pos:])
+            break
+        start, end = match.span()
+        if start > pos:
+            gap = content[pos:start]
+            out.append(gap)
+            newline = gap.rfind("\n")
+            if newline >= 0:
+                line_blank = not gap[newline + 1 :].strip()
+                continued = gap[:newline].rstrip("\r").endswith("\\")
+            else:
+                line_blank = line_blank and not gap.strip()
+            if gap.strip():
+                preceding = gap.rstrip()
+            if syntax.docstrings:
+                opened = gap.count("(") + gap.count("[") + gap.count("{")
+                closed = gap.count(")") + gap.count("]") + gap.count("}")
+                depth = max(0, depth + opened - closed)
+
+        kind = match.lastgroup
+        text = match.group()
+        rest = None
+        if kind == "string":
+            if syntax.docstrings and line_blank and not depth and not continued:
+                rest = STATEMENT_END_PATTERN.match(content, end)
+            if rest is None:
+                out.append(text)
+                line_blank = False
+                preceding = text
+                pos = end
+                continue
+        elif kind == "regex":
+            if not is_regex_context(preceding):
+                # A division; scan on from the character after it
+                text = "/"
+                end = start + 1
+            out.append(text)
+            line_blank = False
+            preceding = text
+            pos = end
+            continue
+        elif is_unterminated_block(text, syntax):
+            out.append(content[start:])
+            break
+        elif start == 0 and text.startswith("#!"):
+            out.append(text)
+            line_blank = False
+            pos = end
+            continue
+        else:
+            rest = LINE_END_PATTERN.match(content, end)
+
+        if rest is not None:
+            # The comment ends the line: drop trailing whitespace, and the line if left empty
+            trim_line_end(out)
+            pos = rest.end() if line_blank else end
+            continue
+
+        # Code follows on the same line; keep tokens on either side apart
+        pos = end
+        if line_blank:
+            continue
+        if "\n" in text:
+            trim_line_end(out)
+            out.append("\n")
+            line_blank = True
+        elif not out[-1][-1].isspace() and not content[end].isspace():
+            out.append(" ")
+
+    return "".join(out)
 
 
 class FileManipulator:
@@ -11,15 +313,52 @@ class FileManipulator:
     EXTENSION_METHODS: Dict[str, str] = {
         ".py": "remove_python_comments",
         ".pyw": "remove_python_comments",
+        ".pyi": "remove_python_comments",
         ".js": "remove_js_comments",
+        ".mjs": "remove_js_comments",
+        ".cjs": "remove_js_comments",
         ".ts": "remove_js_comments",
         ".jsx": "remove_js_comments",
         ".tsx": "remove_js_comments",
+        ".c": "remove_c_comments",
+        ".h": "remove_c_comments",
+        ".cc": "remove_c_comments",
+        ".cpp": "remove_c_comments",
+        ".cxx": "remove_c_comments",
+        ".hh": "remove_c_comments",
+        ".hpp": "remove_c_comments",
+        ".cs": "remove_c_comments",
+        ".java": "remove_c_comments",
+        ".go": "remove_go_comments",
         ".html": "remove_html_comments",
         ".htm": "remove_html_comments",
         ".css": "remove_css_comments",
     }
 
+    # Language each comment removal method is reported under
+    METHOD_LANGUAGES: Dict[str, str] = {
+        "remove_python_comments": "Python",
+        "remove_js_comments": "JavaScript",
+        "remove_c_comments": "C-family",
+        "remove_go_comments": "Go",
+        "remove_html_comments": "HTML",
+        "remove_css_comments": "CSS",
+    }
+
+    @staticmethod
+    def get_language(file_extension: str) -> Optional[str]:
+        """
+        Get the language whose comments are removed from files with the given extension.
+
+        Args:
+            file_extension (str): The file extension, including the leading dot.
+
+        Returns:
+            Optional[str]: The language name, or None if comments are not removed.
+        """
+        method_name = FileManipulator.EXTENSION_METHODS.get(file_extension.lower())
+        return FileManipulator.METHOD_LANGUAGES.get(method_name) if method_name else None
+
     @staticmethod
     def remove_comments(content: str, file_extension: str) -> str:
         """
@@ -30,20 +369,18 @@ class FileManipulator:
             file_extension (str): The file extension to determine the comment style.
 
         Returns:
-            str: The content with comments removed.
+            str: The content with comments removed, unchanged for unknown file types.
         """
-        method_name = FileManipulator.EXTENSION_METHODS.get(file_extension)
+        method_name = FileManipulator.EXTENSION_METHODS.get(file_extension.lower())
         if method_name:
             method = getattr(FileManipulator, method_name)
             return method(content)
-        else:
-            print(f"Skipping comment removal for unknown file type: {file_extension}")
-            return content  # No comment removal for unknown file types
+        return content
 
     @staticmethod
     def remove_python_comments(content: str) -> str:
         """
-        Remove Python-style comments from the given content.
+        Remove Python comments and docstrings from the given content.
 
         Args:
             content (str): The Python content to remove comments from.
@@ -51,12 +388,7 @@ class FileManipulator:
         Returns:
             str: The content with Python comments removed.
         """
-        # Remove single-line comments
-        content = re.sub(r"#.*$", "", content, flags=re.MULTILINE)
-        # Remove multi-line comments (triple quotes)
-        content = re.sub(r'"""[\s\S]*?"""', "", content)
-        content = re.sub(r"'''[\s\S]*?'''", "", content)
-        return content
+        return strip_comments(content, PYTHON_SYNTAX)
 
     @staticmethod
     def remove_js_comments(content: str) -> str:
@@ -69,11 +401,33 @@ class FileManipulator:
         Returns:
             str: The content with JavaScript comments removed.
         """
-        # Remove single-line comments
-        content = re.sub(r"//.*$", "", content, flags=re.MULTILINE)
-        # Remove multi-line comments
-        content = re.sub(r"/\*[\s\S]*?\*/", "", content)
-        return content
+        return strip_comments(content, JS_SYNTAX)
+
+    @staticmethod
+    def remove_c_comments(content: str) -> str:
+        """
+        Remove C-style comments from the given content.
+
+        Args:
+            content (str): The C, C++, C# or Java content to remove comments from.
+
+        Returns:
+            str: The content with C-style comments removed.
+        """
+        return strip_comments(content, C_SYNTAX)
+
+    @staticmethod
+    def remove_go_comments(content: str) -> str:
+        """
+        Remove Go comments from the given content.
+
+        Args:
+            content (str): The Go content to remove comments from.
+
+        Returns:
+            str: The content with Go comments removed.
+        """
+        return strip_comments(content, GO_SYNTAX)
 
     @staticmethod
     def remove_html_comments(content: str) -> str:
@@ -86,7 +440,7 @@ class FileManipulator:
         Returns:
             str: The content with HTML comments removed.
         """
-        return re.sub(r"<!--[\s\S]*?-->", "", content)
+        return strip_comments(content, HTML_SYNTAX)
 
     @staticmethod
     def remove_css_comments(content: str) -> str:
@@ -99,4 +453,4 @@ class FileManipulator:
         Returns:
             str: The content with CSS comments removed.
         """
-        return re.sub(r"/\*[\s\S]*?\*/", "", content)
+        return strip_comments(content, CSS_SYNTAX)
@@ -0,0 +1,106 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from .git_reader import list_git_files
+from .ignore_utils import IgnoreMatcher
+from .logger import logger
+
+
+def walk_directory(root_dir: str, matcher: IgnoreMatcher) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Walk a directory tree, pruning ignored directories before they are listed.
+
+    As in git, a file inside an excluded directory cannot be re-included by a
+    negation pattern, so excluded directories are never descended into. Each
+    directory is registered with the matcher as it is entered, so its own ignore
+    files apply to the paths below it.
+
+    Args:
+        root_dir (str): The root directory to walk.
+        matcher (IgnoreMatcher): The hierarchical ignore matcher for root_dir.
+
+    Returns:
+        Tuple[List[str], Dict[str, int]]: The included file paths relative to root_dir,
+            and walk statistics ('pruned_directories' and 'ignored_files').
+    """
+    file_paths: List[str] = []
+    stats: Dict[str, int] = {"pruned_directories": 0, "ignored_files": 0}
+
+    for current_dir, dir_names, file_names in os.walk(root_dir):
+        rel_dir = os.path.relpath(current_dir, root_dir)
+        prefix = "" if rel_dir == os.curdir else rel_dir + os.sep
+        matcher.add_directory(prefix, file_names)
+
+        kept_dirs: List[str] = []
+        for dir_name in dir_names:
+            dir_path = prefix + dir_name
+            if matcher.is_ignored(dir_path, is_directory=True):
+                stats["pruned_directories"] += 1
+                logger.trace(f"Pruning directory: {dir_path}")
+            else:
+                kept_dirs.append(dir_name)
+        dir_names[:] = kept_dirs
+
+        for file_name in file_names:
+            file_path = prefix + file_name
+            if matcher.is_ignored(file_path):
+                stats["ignored_files"] += 1
+                logger.trace(f"Ignoring file: {file_path}")
+            else:
+                file_paths.append(file_path)
+                logger.trace(f"Including file: {file_path}")
+
+    return file_paths, stats
+
+
+def filter_git_files(
+    root_dir: str, matcher: IgnoreMatcher, ref: Optional[str] = None
+) -> Tuple[List[str], Dict[str, int]]:
+    """
+    List the files git tracks under a directory and filter them with an ignore matcher.
+
+    The filesystem is not walked, so untracked build outputs cost nothing; when
+    listing the index, tracked files deleted from the working tree are left out. Each
+    directory is checked once, and files below an ignored directory are excluded
+    as they would be by walk_directory.
+
+    Args:
+        root_dir (str): The directory to list.
+        matcher (IgnoreMatcher): The ignore matcher for root_dir.
+        ref (Optional[str]): A commit-ish or tree-ish to list instead of the index.
+
+    Returns:
+        Tuple[List[str], Dict[str, int]]: The included file paths relative to root_dir,
+            and statistics ('pruned_directories' and 'ignored_files').
+    """
+    file_paths: List[str] = []
+    stats: Dict[str, int] = {"pruned_directories": 0, "ignored_files": 0}
+    ignored_dirs: Dict[str, bool] = {"": False}
+
+    for file_path in list_git_files(root_dir, ref):
+        parts = file_path.split("/")
+        dir_path = ""
+        ignored = False
+        for part in parts[:-1]:
+            dir_path = dir_path + "/" + part if dir_path else part
+            if dir_path not in ignored_dirs:
+                ignored_dirs[dir_path] = matcher.is_ignored(dir_path, is_directory=True)
+                if ignored_dirs[dir_path]:
+                    stats["pruned_directories"] += 1
+                    logger.trace(f"Pruning directory: {dir_path}")
+            if ignored_dirs[dir_path]:
+                ignored = True
+                break
+
+        if ignored:
+            continue
+        if ref is None and not os.path.isfile(os.path.join(root_dir, file_path)):
+            logger.trace(f"Skipping file deleted from the working tree: {file_path}")
+            continue
+        if matcher.is_ignored(file_path):
+            stats["ignored_files"] += 1
+            logger.trace(f"Ignoring file: {file_path}")
+        else:
+            file_paths.append(file_path)
+            logger.trace(f"Including file: {file_path}")
+
+    return file_paths, stats
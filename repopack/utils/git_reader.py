@@ -0,0 +1,1025 @@
+import glob
+import hashlib
+import mmap
+import os
+import re
+import struct
+import zlib
+from bisect import bisect_left
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from ..exceptions import GitError
+from .logger import logger
+
+# File modes of index and tree entries
+GIT_MODE_TREE = 0o040000
+GIT_MODE_SYMLINK = 0o120000
+GIT_MODE_GITLINK = 0o160000
+
+# Pack object types
+PACK_OBJECT_TYPES: Dict[int, str] = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+PACK_OFS_DELTA = 6
+PACK_REF_DELTA = 7
+
+# Fixed-size part of an index entry: ten 32-bit stat fields, the object id and the flags
+INDEX_ENTRY_FORMAT = struct.Struct(">10I20sH")
+INDEX_EXTENDED_FLAG = 0x4000
+INDEX_STAGE_MASK = 0x3000
+
+# Index extensions that leave entries out of the index file itself
+INDEX_INCOMPLETE_EXTENSIONS = {b"link": "split index", b"sdir": "sparse index"}
+
+# Size of the SHA-1 checksum ending the index file
+INDEX_CHECKSUM_SIZE = 20
+
+# Places where a short ref name is looked up, in git's rev-parse order
+REF_SEARCH_PATHS = ["{}", "refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/{}"]
+
+# Names looked up as they are in the git directory, besides full ref names; other files
+# there, such as 'config' or 'index', are not refs
+PSEUDO_REFS = ("HEAD", "FETCH_HEAD", "ORIG_HEAD", "MERGE_HEAD")
+
+HEX_SHA_PATTERN = re.compile(r"^[0-9a-f]{4,40}$")
+
+# A ref name followed by '~N' and '^N' ancestry suffixes
+REF_SUFFIX_PATTERN = re.compile(r"^(.*?)((?:[~^]\d*)*)$")
+
+
+class IndexEntry:
+    """A file tracked in the git index, with the stat data git recorded for it."""
+
+    __slots__ = ("path", "sha", "mode", "size", "mtime_ns", "ctime_ns", "inode", "device")
+
+    def __init__(
+        self,
+        path: str,
+        sha: str,
+        mode: int,
+        size: int,
+        mtime_ns: int,
+        ctime_ns: int,
+        inode: int,
+        device: int,
+    ) -> None:
+        """
+        Initialize an IndexEntry.
+
+        Args:
+            path (str): The file path relative to the repository root.
+            sha (str): The hex object id of the staged blob.
+            mode (int): The git file mode.
+            size (int): The file size recorded in the index (truncated to 32 bits).
+            mtime_ns (int): The modification time recorded in the index, in nanoseconds.
+            ctime_ns (int): The status change time recorded in the index, in nanoseconds.
+            inode (int): The inode number recorded in the index (truncated to 32 bits).
+            device (int): The device number recorded in the index (truncated to 32 bits).
+        """
+        self.path: str = path
+        self.sha: str = sha
+        self.mode: int = mode
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self.ctime_ns: int = ctime_ns
+        self.inode: int = inode
+        self.device: int = device
+
+
+def find_git_dir(start_dir: str) -> Optional[Tuple[str, str]]:
+    """
+    Find the git directory of the repository containing a directory.
+
+    Both '.git' directories and '.git' files pointing elsewhere (worktrees and
+    submodules) are supported.
+
+    Args:
+        start_dir (str): The directory to start searching from.
+
+    Returns:
+        Optional[Tuple[str, str]]: The git directory and the repository's working tree root,
+            or None if start_dir is not inside a git repository.
+    """
+    current_dir = os.path.abspath(start_dir)
+    while True:
+        dot_git = os.path.join(current_dir, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git, current_dir
+        if os.path.isfile(dot_git):
+            with open(dot_git, "r") as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                git_dir = os.path.join(current_dir, content[len("gitdir:") :].strip())
+                return os.path.normpath(git_dir), current_dir
+        parent_dir = os.path.dirname(current_dir)
+        if parent_dir == current_dir:  # We've reached the root directory
+            return None
+        current_dir = parent_dir
+
+
+def read_varint_offset(data: bytes, pos: int) -> Tuple[int, int]:
+    """
+    Read a variable-length integer in git's offset encoding.
+
+    This encoding is used for v4 index path prefixes and pack offset deltas: each
+    continuation adds one before shifting, so no value has two encodings.
+
+    Args:
+        data (bytes): The buffer to read from.
+        pos (int): The position of the first byte.
+
+    Returns:
+        Tuple[int, int]: The decoded value and the position after it.
+    """
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_index(git_dir: str) -> List[IndexEntry]:
+    """
+    Parse the git index file, supporting index versions 2, 3 and 4.
+
+    Unmerged paths are listed once, by their first stage. Extensions after the
+    entries are not needed for enumeration and are ignored, except for the split
+    and sparse index extensions, which mean the entries are incomplete.
+
+    Args:
+        git_dir (str): The git directory.
+
+    Returns:
+        List[IndexEntry]: The tracked entries, sorted by path as git stores them.
+
+    Raises:
+        GitError: If the index cannot be read, has an unsupported format, or is a split or
+            sparse index.
+    """
+    index_path = os.path.join(git_dir, "index")
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise GitError(f"Cannot read git index {index_path}: {str(e)}")
+
+    if len(data) < 12 or data[:4] != b"DIRC":
+        raise GitError(f"Invalid git index signature in {index_path}")
+    version, count = struct.unpack(">II", data[4:12])
+    if version not in (2, 3, 4):
+        raise GitError(f"Unsupported git index version {version}")
+
+    entries: List[IndexEntry] = []
+    pos = 12
+    previous_path = b""
+    for _ in range(count):
+        start = pos
+        (
+            ctime_s,
+            ctime_ns,
+            mtime_s,
+            mtime_ns,
+            device,
+            inode,
+            mode,
+            _uid,
+            _gid,
+            size,
+            sha,
+            flags,
+        ) = INDEX_ENTRY_FORMAT.unpack_from(data, pos)
+        pos += INDEX_ENTRY_FORMAT.size
+        if version >= 3 and flags & INDEX_EXTENDED_FLAG:
+            pos += 2
+
+        if version == 4:
+            strip, pos = read_varint_offset(data, pos)
+            end = data.index(b"\0", pos)
+            path = previous_path[: len(previous_path) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", pos)
+            path = data[pos:end]
+            # Entries are NUL-padded to a multiple of eight bytes
+            pos = start + ((end - start + 8) & ~7)
+        previous_path = path
+
+        decoded_path = path.decode("utf-8", "surrogateescape")
+        if flags & INDEX_STAGE_MASK and entries and entries[-1].path == decoded_path:
+            continue  # Unmerged paths have an entry per stage
+        entries.append(
+            IndexEntry(
+                path=decoded_path,
+                sha=sha.hex(),
+                mode=mode,
+                size=size,
+                mtime_ns=mtime_s * 1_000_000_000 + mtime_ns,
+                ctime_ns=ctime_s * 1_000_000_000 + ctime_ns,
+                inode=inode,
+                device=device,
+            )
+        )
+
+    while pos + 8 <= len(data) - INDEX_CHECKSUM_SIZE:
+        signature = data[pos : pos + 4]
+        if signature in INDEX_INCOMPLETE_EXTENSIONS:
+            raise GitError(f"Unsupported {INDEX_INCOMPLETE_EXTENSIONS[signature]} in {index_path}")
+        (extension_size,) = struct.unpack(">I", data[pos + 4 : pos + 8])
+        pos += 8 + extension_size
+
+    logger.debug(f"Read {len(entries)} entries from git index version {version}")
+    return entries
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    Apply a git pack delta to its base object.
+
+    Args:
+        base (bytes): The content of the base object.
+        delta (bytes): The delta instructions.
+
+    Returns:
+        bytes: The content of the resulting object.
+
+    Raises:
+        GitError: If the delta does not match the base object.
+    """
+
+    def read_size(pos: int) -> Tuple[int, int]:
+        value = shift = 0
+        while True:
+            byte = delta[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value, pos
+
+    base_size, pos = read_size(0)
+    result_size, pos = read_size(pos)
+    if base_size != len(base):
+        raise GitError("Delta base size mismatch")
+
+    out: List[bytes] = []
+    while pos < len(delta):
+        opcode = delta[pos]
+        pos += 1
+        if opcode & 0x80:
+            # Copy a range of the base object
+            offset = size = 0
+            for i in range(4):
+                if opcode & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if opcode & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out.append(base[offset : offset + (size or 0x10000)])
+        elif opcode:
+            # Insert literal bytes from the delta
+            out.append(delta[pos : pos + opcode])
+            pos += opcode
+        else:
+            raise GitError("Invalid delta opcode")
+
+    result = b"".join(out)
+    if len(result) != result_size:
+        raise GitError("Delta result size mismatch")
+    return result
+
+
+class PackFile:
+    """A git packfile and its version 2 index, memory-mapped for random access."""
+
+    def __init__(self, idx_path: str) -> None:
+        """
+        Open a packfile by its index.
+
+        Args:
+            idx_path (str): The path to the '.idx' file; the '.pack' file must sit next to it.
+
+        Raises:
+            GitError: If the index has an unsupported format.
+        """
+        with open(idx_path, "rb") as f:
+            idx = f.read()
+        if idx[:4] != b"\xfftOc" or struct.unpack(">I", idx[4:8])[0] != 2:
+            raise GitError(f"Unsupported pack index format: {idx_path}")
+
+        count = struct.unpack(">I", idx[8 + 255 * 4 : 8 + 256 * 4])[0]
+        shas_start = 8 + 256 * 4
+        offsets_start = shas_start + count * 24  # object ids, then CRC32s
+        large_start = offsets_start + count * 4
+
+        self.shas: List[bytes] = [
+            idx[shas_start + i * 20 : shas_start + (i + 1) * 20] for i in range(count)
+        ]
+        self.offsets: List[int] = []
+        for (offset,) in struct.iter_unpack(">I", idx[offsets_start:large_start]):
+            if offset & 0x80000000:
+                large = large_start + (offset & 0x7FFFFFFF) * 8
+                offset = struct.unpack(">Q", idx[large : large + 8])[0]
+            self.offsets.append(offset)
+
+        with open(idx_path[: -len(".idx")] + ".pack", "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def find(self, sha: bytes) -> Optional[int]:
+        """
+        Find the offset of an object in the pack.
+
+        Args:
+            sha (bytes): The binary object id.
+
+        Returns:
+            Optional[int]: The offset of the object, or None if it is not in this pack.
+        """
+        i = bisect_left(self.shas, sha)
+        if i < len(self.shas) and self.shas[i] == sha:
+            return self.offsets[i]
+        return None
+
+    def find_prefix(self, prefix: bytes) -> List[bytes]:
+        """
+        Find the object ids starting with a binary prefix.
+
+        Args:
+            prefix (bytes): The prefix to look for.
+
+        Returns:
+            List[bytes]: The matching binary object ids.
+        """
+        matches: List[bytes] = []
+        i = bisect_left(self.shas, prefix)
+        while i < len(self.shas) and self.shas[i].startswith(prefix):
+            matches.append(self.shas[i])
+            i += 1
+        return matches
+
+    def read_raw(self, offset: int) -> Tuple[int, bytes, Optional[object]]:
+        """
+        Read a single pack entry without resolving deltas.
+
+        Args:
+            offset (int): The offset of the entry.
+
+        Returns:
+            Tuple[int, bytes, Optional[object]]: The entry type, the inflated data, and the
+                delta base (an offset for offset deltas, a binary object id for ref deltas).
+        """
+        byte = self.data[offset]
+        pos = offset + 1
+        object_type = (byte >> 4) & 7
+        size = byte & 0x0F
+        shift = 4
+        while byte & 0x80:
+            byte = self.data[pos]
+            pos += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+
+        base: Optional[object] = None
+        if object_type == PACK_OFS_DELTA:
+            distance, pos = read_varint_offset(self.data, pos)
+            base = offset - distance
+        elif object_type == PACK_REF_DELTA:
+            base = self.data[pos : pos + 20]
+            pos += 20
+
+        # Start with a chunk about the size of the inflated object, then read on if needed
+        decompressor = zlib.decompressobj()
+        chunks: List[bytes] = []
+        chunk_size = size + 64
+        while not decompressor.eof:
+            if pos >= len(self.data):
+                raise GitError(f"Truncated pack entry at offset {offset}")
+            chunks.append(decompressor.decompress(self.data[pos : pos + chunk_size]))
+            pos += chunk_size
+            chunk_size = 65536
+        return object_type, b"".join(chunks), base
+
+
+class GitObjectStore:
+    """Reads objects from a repository's loose object directory and packfiles."""
+
+    def __init__(self, git_dir: str) -> None:
+        """
+        Initialize the GitObjectStore.
+
+        Args:
+            git_dir (str): The git directory.
+        """
+        self.git_dir: str = git_dir
+        self.objects_dir: str = os.path.join(self.common_dir(), "objects")
+        self.packs: Optional[Dict[str, PackFile]] = None
+        self.lock = Lock()
+
+    def common_dir(self) -> str:
+        """
+        Get the directory holding objects and refs shared by all worktrees.
+
+        Returns:
+            str: The common git directory.
+        """
+        common_path = os.path.join(self.git_dir, "commondir")
+        if os.path.isfile(common_path):
+            with open(common_path, "r") as f:
+                return os.path.normpath(os.path.join(self.git_dir, f.read().strip()))
+        return self.git_dir
+
+    def get_packs(self) -> List[PackFile]:
+        """
+        Open the repository's packfiles on first use.
+
+        Returns:
+            List[PackFile]: The opened packfiles.
+        """
+        if self.packs is None:
+            self.rescan_packs()
+        return list(self.packs.values())
+
+    def rescan_packs(self) -> bool:
+        """
+        List the packfiles again, opening new ones and forgetting removed ones.
+
+        Repacking, e.g. by 'git gc', replaces packfiles and loose objects while a
+        process keeps the store, so lookups rescan before reporting a missing object.
+
+        Returns:
+            bool: True if a packfile was opened that was not open before.
+        """
+        idx_paths = sorted(glob.glob(os.path.join(self.objects_dir, "pack", "*.idx")))
+        with self.lock:
+            packs = self.packs or {}
+            added = [idx_path for idx_path in idx_paths if idx_path not in packs]
+            self.packs = {
+                idx_path: packs[idx_path] if idx_path in packs else PackFile(idx_path)
+                for idx_path in idx_paths
+            }
+        if added:
+            logger.debug(f"Opened {len(added)} new packfiles in {self.objects_dir}")
+        return bool(added)
+
+    def read(self, sha: str) -> Tuple[str, bytes]:
+        """
+        Read an object by its id.
+
+        Args:
+            sha (str): The full hex object id.
+
+        Returns:
+            Tuple[str, bytes]: The object type ('blob', 'tree', 'commit' or 'tag') and content.
+
+        Raises:
+            GitError: If the object cannot be found or read.
+        """
+        loose_path = os.path.join(self.objects_dir, sha[:2], sha[2:])
+        try:
+            with open(loose_path, "rb") as f:
+                raw = zlib.decompress(f.read())
+            header, _, content = raw.partition(b"\0")
+            object_type = header.split(b" ")[0].decode("ascii")
+            return object_type, content
+        except FileNotFoundError:
+            pass
+        except (OSError, zlib.error) as e:
+            raise GitError(f"Cannot read loose object {sha}: {str(e)}")
+
+        binary_sha = bytes.fromhex(sha)
+        for pack in self.get_packs():
+            offset = pack.find(binary_sha)
+            if offset is not None:
+                return self.read_packed(pack, offset)
+        if self.rescan_packs():
+            # The object may have moved from a loose file into a new pack
+            return self.read(sha)
+        raise GitError(f"Object not found: {sha}")
+
+    def read_packed(self, pack: PackFile, offset: int) -> Tuple[str, bytes]:
+        """
+        Read an object from a packfile, resolving delta chains iteratively.
+
+        Args:
+            pack (PackFile): The packfile holding the object.
+            offset (int): The offset of the object in the pack.
+
+        Returns:
+            Tuple[str, bytes]: The object type and content.
+
+        Raises:
+            GitError: If the object or a delta base cannot be read.
+        """
+        deltas: List[bytes] = []
+        while True:
+            object_type, data, base = pack.read_raw(offset)
+            if object_type == PACK_OFS_DELTA:
+                deltas.append(data)
+                offset = base
+            elif object_type == PACK_REF_DELTA:
+                deltas.append(data)
+                type_name, content = self.read(base.hex())
+                break
+            elif object_type in PACK_OBJECT_TYPES:
+                type_name, content = PACK_OBJECT_TYPES[object_type], data
+                break
+            else:
+                raise GitError(f"Unknown pack object type {object_type}")
+
+        for delta in reversed(deltas):
+            content = apply_delta(content, delta)
+        return type_name, content
+
+    def expand_sha(self, prefix: str) -> Optional[str]:
+        """
+        Expand an abbreviated hex object id to the unique full id.
+
+        Args:
+            prefix (str): An abbreviated hex object id of at least four characters.
+
+        Returns:
+            Optional[str]: The full hex object id, or None if no object matches.
+
+        Raises:
+            GitError: If the prefix is ambiguous.
+        """
+        if len(prefix) == 40:
+            return prefix
+        matches = self.find_prefix(prefix)
+        if not matches and self.rescan_packs():
+            matches = self.find_prefix(prefix)
+        if len(matches) > 1:
+            raise GitError(f"Ambiguous object id: {prefix}")
+        return matches.pop() if matches else None
+
+    def find_prefix(self, prefix: str) -> Set[str]:
+        """
+        Find the loose and packed objects whose hex ids start with a prefix.
+
+        Args:
+            prefix (str): An abbreviated hex object id of at least four characters.
+
+        Returns:
+            Set[str]: The matching full hex object ids.
+        """
+        matches: Set[str] = set()
+        loose_dir = os.path.join(self.objects_dir, prefix[:2])
+        if os.path.isdir(loose_dir):
+            matches.update(
+                prefix[:2] + name for name in os.listdir(loose_dir) if name.startswith(prefix[2:])
+            )
+        binary_prefix = bytes.fromhex(prefix[: len(prefix) & ~1])
+        for pack in self.get_packs():
+            matches.update(
+                sha.hex() for sha in pack.find_prefix(binary_prefix) if sha.hex().startswith(prefix)
+            )
+        return matches
+
+
+def read_ref_file(git_dir: str, name: str) -> Optional[str]:
+    """
+    Read a ref from a loose ref file or packed-refs, following symbolic refs.
+
+    Args:
+        git_dir (str): The git directory.
+        name (str): The full ref name (e.g. 'HEAD' or 'refs/heads/main').
+
+    Returns:
+        Optional[str]: The hex object id the ref points to, or None if it does not exist.
+    """
+    store = get_object_store(git_dir)
+    for _ in range(10):  # Bound symbolic ref chains
+        value: Optional[str] = None
+        for base_dir in (git_dir, store.common_dir()):
+            ref_path = os.path.join(base_dir, name)
+            if os.path.isfile(ref_path):
+                with open(ref_path, "r") as f:
+                    value = f.read().strip()
+                break
+        if value is None:
+            packed_path = os.path.join(store.common_dir(), "packed-refs")
+            if os.path.isfile(packed_path):
+                with open(packed_path, "r") as f:
+                    for line in f:
+                        parts = line.split()
+                        if len(parts) == 2 and parts[1] == name and not line.startswith("#"):
+                            value = parts[0]
+                            break
+        if value is None:
+            return None
+        if not value.startswith("ref:"):
+            return value
+        name = value[len("ref:") :].strip()
+    return None
+
+
+def resolve_name(git_dir: str, name: str) -> str:
+    """
+    Resolve a ref name or object id to an object id.
+
+    Args:
+        git_dir (str): The git directory.
+        name (str): A full or abbreviated object id, 'HEAD', a full ref name, or a short
+            branch, tag or remote name.
+
+    Returns:
+        str: The hex object id.
+
+    Raises:
+        GitError: If the name cannot be resolved.
+    """
+    for template in REF_SEARCH_PATHS:
+        if template == "{}" and name not in PSEUDO_REFS and not name.startswith("refs/"):
+            continue
+        sha = read_ref_file(git_dir, template.format(name))
+        if sha is not None:
+            return sha
+    if HEX_SHA_PATTERN.match(name):
+        sha = get_object_store(git_dir).expand_sha(name)
+        if sha is not None:
+            return sha
+    raise GitError(f"Unknown revision: {name}")
+
+
+def get_parent(store: GitObjectStore, sha: str, number: int) -> str:
+    """
+    Get a parent of a commit, peeling annotated tags first.
+
+    Args:
+        store (GitObjectStore): The object store.
+        sha (str): The hex object id of a commit or tag.
+        number (int): The 1-based parent number, or 0 for the commit itself.
+
+    Returns:
+        str: The hex object id of the parent commit.
+
+    Raises:
+        GitError: If the object is not a commit or has no such parent.
+    """
+    object_type, content = store.read(sha)
+    while object_type == "tag":
+        sha = content.split(b"\n", 1)[0].split(b" ")[1].decode("ascii")
+        object_type, content = store.read(sha)
+    if object_type != "commit":
+        raise GitError(f"Object {sha} is a {object_type}, not a commit")
+    if number == 0:
+        return sha
+    parents = [
+        line.split(b" ")[1].decode("ascii")
+        for line in content.split(b"\n\n", 1)[0].split(b"\n")
+        if line.startswith(b"parent ")
+    ]
+    if number > len(parents):
+        raise GitError(f"Commit {sha} has no parent {number}")
+    return parents[number - 1]
+
+
+def resolve_ref(git_dir: str, ref: str) -> str:
+    """
+    Resolve a commit-ish or tree-ish to an object id.
+
+    Supported forms are full and abbreviated object ids, 'HEAD', full ref names and
+    short branch, tag and remote names, each optionally followed by '~N' and '^N'
+    ancestry suffixes.
+
+    Args:
+        git_dir (str): The git directory.
+        ref (str): The ref to resolve.
+
+    Returns:
+        str: The hex object id.
+
+    Raises:
+        GitError: If the ref cannot be resolved.
+    """
+    match = REF_SUFFIX_PATTERN.match(ref)
+    sha = resolve_name(git_dir, match.group(1))
+    store = get_object_store(git_dir)
+    for operator, count in re.findall(r"([~^])(\d*)", match.group(2)):
+        number = int(count) if count else 1
+        if operator == "~":
+            for _ in range(number):
+                sha = get_parent(store, sha, 1)
+        else:
+            sha = get_parent(store, sha, number)
+    return sha
+
+
+def peel_to_tree(store: GitObjectStore, sha: str) -> str:
+    """
+    Peel an annotated tag or commit to its tree.
+
+    Args:
+        store (GitObjectStore): The object store.
+        sha (str): The hex object id of a tag, commit or tree.
+
+    Returns:
+        str: The hex object id of the tree.
+
+    Raises:
+        GitError: If the object does not lead to a tree.
+    """
+    while True:
+        object_type, content = store.read(sha)
+        if object_type == "tree":
+            return sha
+        if object_type == "tag":
+            sha = content.split(b"\n", 1)[0].split(b" ")[1].decode("ascii")
+        elif object_type == "commit":
+            return content.split(b"\n", 1)[0].split(b" ")[1].decode("ascii")
+        else:
+            raise GitError(f"Object {sha} is a {object_type}, not a tree-ish")
+
+
+def iter_tree(store: GitObjectStore, tree_sha: str) -> Iterator[Tuple[str, int, str]]:
+    """
+    Recursively list the blobs of a tree without recursion in Python.
+
+    Args:
+        store (GitObjectStore): The object store.
+        tree_sha (str): The hex object id of the tree.
+
+    Yields:
+        Tuple[str, int, str]: The path, mode and hex object id of each blob and symlink.
+    """
+    stack: List[Tuple[str, str]] = [("", tree_sha)]
+    while stack:
+        prefix, sha = stack.pop()
+        object_type, content = store.read(sha)
+        if object_type != "tree":
+            raise GitError(f"Object {sha} is a {object_type}, not a tree")
+        pos = 0
+        while pos < len(content):
+            space = content.index(b" ", pos)
+            nul = content.index(b"\0", space)
+            mode = int(content[pos:space], 8)
+            name = content[space + 1 : nul].decode("utf-8", "surrogateescape")
+            entry_sha = content[nul + 1 : nul + 21].hex()
+            pos = nul + 21
+            if mode == GIT_MODE_TREE:
+                stack.append((prefix + name + "/", entry_sha))
+            elif mode != GIT_MODE_GITLINK:
+                yield prefix + name, mode, entry_sha
+
+
+@lru_cache(maxsize=8)
+def get_object_store(git_dir: str) -> GitObjectStore:
+    """
+    Get the object store of a git directory, reusing it within a process.
+
+    Args:
+        git_dir (str): The git directory.
+
+    Returns:
+        GitObjectStore: The object store.
+    """
+    return GitObjectStore(git_dir)
+
+
+def read_tree_files(git_dir: str, ref: str) -> Dict[str, Tuple[int, str]]:
+    """
+    List the files of a commit or tree.
+
+    The ref is resolved on every call, so a branch that moves is listed at its new
+    commit, while the listing of each tree is reused within a process.
+
+    Args:
+        git_dir (str): The git directory.
+        ref (str): The commit-ish or tree-ish to list.
+
+    Returns:
+        Dict[str, Tuple[int, str]]: The mode and hex blob id by path relative to the
+            repository root, in path order.
+
+    Raises:
+        GitError: If the ref or its objects cannot be read.
+    """
+    return read_tree(git_dir, resolve_ref(git_dir, ref))
+
+
+@lru_cache(maxsize=8)
+def read_tree(git_dir: str, sha: str) -> Dict[str, Tuple[int, str]]:
+    """
+    List the files of a commit or tree by object id, reusing the listing within a process.
+
+    Args:
+        git_dir (str): The git directory.
+        sha (str): The hex object id of a tag, commit or tree.
+
+    Returns:
+        Dict[str, Tuple[int, str]]: The mode and hex blob id by path relative to the
+            repository root, in path order.
+
+    Raises:
+        GitError: If the objects cannot be read.
+    """
+    store = get_object_store(git_dir)
+    tree_sha = peel_to_tree(store, sha)
+    files = {path: (mode, blob_sha) for path, mode, blob_sha in iter_tree(store, tree_sha)}
+    logger.debug(f"Read {len(files)} files from {sha} ({tree_sha})")
+    return dict(sorted(files.items()))
+
+
+@lru_cache(maxsize=32)
+def get_repository(root_dir: str) -> Tuple[str, str]:
+    """
+    Locate the repository containing a directory, reusing the result within a process.
+
+    Args:
+        root_dir (str): A directory inside the repository.
+
+    Returns:
+        Tuple[str, str]: The git directory, and the path of root_dir relative to the
+            repository root with a trailing slash ('' for the repository root itself).
+
+    Raises:
+        GitError: If root_dir is not in a git repository.
+    """
+    found = find_git_dir(root_dir)
+    if found is None:
+        raise GitError(f"Not a git repository: {root_dir}")
+    git_dir, worktree_root = found
+    prefix = os.path.relpath(os.path.abspath(root_dir), worktree_root).replace(os.sep, "/")
+    return git_dir, "" if prefix == "." else prefix + "/"
+
+
+def list_git_files(root_dir: str, ref: Optional[str] = None) -> List[str]:
+    """
+    List the files git tracks under a directory, from the index or from a ref.
+
+    Submodules are not listed. When listing the index, symlinks are listed like
+    regular files, as the filesystem walk would; when listing a ref, only regular
+    files are listed because symlink targets are not available as content.
+
+    Args:
+        root_dir (str): The directory to list; it may be a subdirectory of the repository.
+        ref (Optional[str]): A commit-ish or tree-ish to list instead of the index.
+
+    Returns:
+        List[str]: The file paths relative to root_dir.
+
+    Raises:
+        GitError: If root_dir is not in a git repository or git data cannot be read.
+    """
+    git_dir, prefix = get_repository(root_dir)
+    if ref:
+        paths = [
+            path
+            for path, (mode, _) in read_tree_files(git_dir, ref).items()
+            if mode != GIT_MODE_SYMLINK
+        ]
+    else:
+        paths = [entry.path for entry in read_index(git_dir) if entry.mode != GIT_MODE_GITLINK]
+    return [path[len(prefix) :] for path in paths if path.startswith(prefix)]
+
+
+def read_git_blob(root_dir: str, ref: str, file_path: str) -> bytes:
+    """
+    Read the content of a file at a ref from the object store.
+
+    Args:
+        root_dir (str): The directory file_path is relative to, inside the repository.
+        ref (str): The commit-ish or tree-ish to read from.
+        file_path (str): The file path relative to root_dir.
+
+    Returns:
+        bytes: The blob content.
+
+    Raises:
+        GitError: If the file does not exist at the ref or cannot be read.
+    """
+    git_dir, prefix = get_repository(root_dir)
+    entry = read_tree_files(git_dir, ref).get(prefix + file_path.replace(os.sep, "/"))
+    if entry is None:
+        raise GitError(f"Path {file_path} does not exist in {ref}")
+    _, content = get_object_store(git_dir).read(entry[1])
+    return content
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the git blob id of a file in the working tree.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        str: The hex object id git would assign to the file's content.
+    """
+    if os.path.islink(file_path):
+        content = os.readlink(file_path).encode("utf-8", "surrogateescape")
+    else:
+        with open(file_path, "rb") as f:
+            content = f.read()
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def is_stat_clean(entry: IndexEntry, stat: os.stat_result, index_mtime_ns: int) -> bool:
+    """
+    Check whether a file's stat data shows it is unchanged since it was staged.
+
+    As in git, entries written in the same instant as the index ('racily clean'
+    entries) are not trusted, since the file may have changed without moving its
+    modification time.
+
+    Args:
+        entry (IndexEntry): The index entry of the file.
+        stat (os.stat_result): The current stat data of the file.
+        index_mtime_ns (int): The modification time of the index file, in nanoseconds.
+
+    Returns:
+        bool: True if the file content is known to match the staged blob.
+    """
+    return (
+        entry.mtime_ns < index_mtime_ns
+        and entry.mtime_ns == stat.st_mtime_ns
+        and entry.size == stat.st_size & 0xFFFFFFFF
+        and entry.inode == stat.st_ino & 0xFFFFFFFF
+    )
+
+
+def find_changed_files(
+    root_dir: str, file_paths: List[str], since: str, ref: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Find the files that were added, modified or renamed since a commit or tree.
+
+    Working tree files are compared against the blobs recorded in the 'since' tree.
+    Files whose stat data matches the index are compared by their staged blob id,
+    so only files touched since they were staged are read and hashed. When a ref
+    is given, its tree is compared against the 'since' tree instead, without
+    touching the working tree.
+
+    Args:
+        root_dir (str): The directory file_paths are relative to, inside the repository.
+        file_paths (List[str]): The candidate file paths relative to root_dir.
+        since (str): The commit-ish or tree-ish to compare against.
+        ref (Optional[str]): A commit-ish or tree-ish to compare instead of the working tree.
+
+    Returns:
+        Dict[str, str]: The changed paths in file_paths order, each mapped to 'added',
+            'modified' or 'renamed' (an added file whose content matches a file that no
+            longer exists at its old path).
+
+    Raises:
+        GitError: If git data cannot be read.
+    """
+    git_dir, prefix = get_repository(root_dir)
+    base_files = read_tree_files(git_dir, since)
+
+    if ref:
+        current_shas: Dict[str, str] = {
+            path: sha for path, (_, sha) in read_tree_files(git_dir, ref).items()
+        }
+        index_entries: Dict[str, IndexEntry] = {}
+        index_mtime_ns = 0
+    else:
+        current_shas = {}
+        index_entries = {entry.path: entry for entry in read_index(git_dir)}
+        index_mtime_ns = os.stat(os.path.join(git_dir, "index")).st_mtime_ns
+
+    # Content that is no longer at its old path, for exact rename detection of added files
+    removed_shas: Set[str] = set()
+    if any(prefix + path.replace(os.sep, "/") not in base_files for path in file_paths):
+        for path, (_, sha) in base_files.items():
+            if not path.startswith(prefix):
+                continue
+            if ref:
+                removed = path not in current_shas
+            else:
+                removed = not os.path.lexists(os.path.join(root_dir, path[len(prefix) :]))
+            if removed:
+                removed_shas.add(sha)
+
+    changed: Dict[str, str] = {}
+    hashed = 0
+    for file_path in file_paths:
+        repo_path = prefix + file_path.replace(os.sep, "/")
+        base = base_files.get(repo_path)
+        if ref:
+            sha = current_shas.get(repo_path)
+        else:
+            full_path = os.path.join(root_dir, file_path)
+            entry = index_entries.get(repo_path)
+            try:
+                stat = os.lstat(full_path)
+            except OSError:
+                continue  # Deleted from the working tree
+            if entry is not None and is_stat_clean(entry, stat, index_mtime_ns):
+                sha = entry.sha
+            elif base is None and not removed_shas:
+                sha = None  # Added, and there is nothing it could have been renamed from
+            else:
+                sha = hash_file(full_path)
+                hashed += 1
+
+        if base is None:
+            changed[file_path] = "renamed" if sha in removed_shas else "added"
+        elif sha != base[1]:
+            changed[file_path] = "modified"
+
+    logger.debug(f"Found {len(changed)} files changed since {since} ({hashed} files hashed)")
+    return changed
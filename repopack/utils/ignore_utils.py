@@ -1,8 +1,12 @@
 import os
-from typing import List, Dict, Any, Callable
-from pathspec import PathSpec
-from pathspec.patterns import GitWildMatchPattern
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Optional, Pattern, Tuple
 from .logger import logger
+from .profiler import profiler
+
+if TYPE_CHECKING:
+    from pathspec import PathSpec
 
 # Default list of patterns to ignore in repository packing
 DEFAULT_IGNORE_LIST: List[str] = [
@@ -93,16 +97,87 @@ DEFAULT_IGNORE_LIST: List[str] = [
     # Temporary files
     "tmp",
     "temp",
-    # repopack-py output
-    "repopackpy-output.txt",
-    "repopackpy-output.xml",
+    # repopack-py output, its shards and their manifest, compressed or not
+    "repopackpy-output*.txt",
+    "repopackpy-output*.xml",
+    "repopackpy-output*.txt.*",
+    "repopackpy-output*.xml.*",
+    "repopackpy-output-manifest.json",
+    # repopack-py content cache
+    ".repopackpy-cache*",
 ]
 
+# Number of distinct compiled pattern lists kept per process
+COMPILED_PATTERNS_CACHE_SIZE = 512
+
+# A path component of a pattern without wildcards, escapes or whitespace, other than '.' and '..'
+LITERAL_SEGMENT = r"(?!\.\.?(?:/|$))[^*?\[\]\\/\s!#]+"
+
+# Patterns matched with lookup tables instead of regexes: a plain name, which matches at any
+# depth, an extension such as '*.log', or a literal path anchored to the base directory,
+# each optionally with a trailing '/' that restricts it to directories
+LITERAL_PATTERN: Pattern[str] = re.compile(
+    rf"(?:(?P<name>{LITERAL_SEGMENT})"
+    r"|\*(?P<suffix>\.[^*?\[\]\\/\s!#]*)"
+    rf"|/?(?P<path>{LITERAL_SEGMENT}(?:/{LITERAL_SEGMENT})*))"
+    r"(?P<dir>/)?$"
+)
+
+# Named groups in pathspec's regexes, made non-capturing when the regexes are merged
+NAMED_GROUP: Pattern[str] = re.compile(r"\(\?P<\w+>")
+
+
+def find_repository_root(start_dir: str) -> Optional[str]:
+    """
+    Find the root of the git repository containing a directory.
+
+    Args:
+        start_dir (str): The directory to start searching from.
+
+    Returns:
+        Optional[str]: The nearest directory at or above start_dir that contains '.git',
+            or None if start_dir is not inside a git repository.
+    """
+    current_dir = os.path.abspath(start_dir)
+    while True:
+        if os.path.exists(os.path.join(current_dir, ".git")):
+            return current_dir
+        parent_dir = os.path.dirname(current_dir)
+        if parent_dir == current_dir:  # We've reached the root directory
+            return None
+        current_dir = parent_dir
+
+
+def read_ignore_file(ignore_path: str) -> List[str]:
+    """
+    Read the patterns from an ignore file, skipping blank lines and comments.
+
+    Args:
+        ignore_path (str): The path to the ignore file.
+
+    Returns:
+        List[str]: The patterns in the file, or an empty list if it cannot be read.
+    """
+    try:
+        with open(ignore_path, "r") as f:
+            patterns = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        profiler.count("ignore_files_read")
+        logger.debug(f"Found and processed ignore file: {ignore_path}")
+        return patterns
+    except IOError as e:
+        logger.warning(f"Error reading ignore file {ignore_path}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error reading ignore file {ignore_path}: {str(e)}")
+    return []
+
 
 def get_ignore_patterns(filename: str, start_dir: str) -> List[str]:
     """
     Get ignore patterns from a file, searching in the start directory and its parents.
 
+    Parent directories are only searched up to the root of the enclosing git repository;
+    outside a repository only the start directory is searched.
+
     Args:
         filename (str): The name of the ignore file (e.g., '.gitignore').
         start_dir (str): The directory to start searching from.
@@ -111,26 +186,16 @@ def get_ignore_patterns(filename: str, start_dir: str) -> List[str]:
         List[str]: A list of ignore patterns read from the file.
     """
     patterns: List[str] = []
-    current_dir = start_dir
+    repository_root = find_repository_root(start_dir) or os.path.abspath(start_dir)
+    current_dir = os.path.abspath(start_dir)
     while True:
         ignore_path: str = os.path.join(current_dir, filename)
         if os.path.exists(ignore_path):
-            try:
-                with open(ignore_path, "r") as f:
-                    new_patterns = [
-                        line.strip() for line in f if line.strip() and not line.startswith("#")
-                    ]
-                    patterns = new_patterns + patterns  # Prepend new patterns
-                logger.debug(f"Found and processed ignore file: {ignore_path}")
-            except IOError as e:
-                logger.warning(f"Error reading ignore file {ignore_path}: {str(e)}")
-            except Exception as e:
-                logger.error(f"Unexpected error reading ignore file {ignore_path}: {str(e)}")
+            patterns = read_ignore_file(ignore_path) + patterns  # Prepend new patterns
 
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir == current_dir:  # We've reached the root directory
+        if current_dir == repository_root:
             break
-        current_dir = parent_dir
+        current_dir = os.path.dirname(current_dir)
 
     if not patterns:
         logger.debug(f"No {filename} found in {start_dir} or its parent directories")
@@ -158,6 +223,22 @@ def get_all_ignore_patterns(root_dir: str, config: Dict[str, Any]) -> List[str]:
     return patterns
 
 
+def create_ignore_spec(patterns: List[str]) -> "PathSpec":
+    """
+    Compile ignore patterns into a PathSpec.
+
+    Args:
+        patterns (List[str]): A list of ignore patterns.
+
+    Returns:
+        PathSpec: The compiled gitignore-style path specification.
+    """
+    from pathspec import PathSpec
+    from pathspec.patterns import GitWildMatchPattern
+
+    return PathSpec.from_lines(GitWildMatchPattern, patterns)
+
+
 def create_ignore_filter(patterns: List[str]) -> Callable[[str], bool]:
     """
     Create an ignore filter function based on the given patterns.
@@ -169,5 +250,349 @@ def create_ignore_filter(patterns: List[str]) -> Callable[[str], bool]:
         Callable[[str], bool]: A function that takes a file path and returns True if the file should be included,
                                False if it should be ignored.
     """
-    spec: PathSpec = PathSpec.from_lines(GitWildMatchPattern, patterns)
-    return lambda path: not spec.match_file(path)
+    compiled = compile_patterns(patterns)
+
+    def include(path: str) -> bool:
+        path = path.replace(os.sep, "/")
+        if path.startswith("/"):
+            path = path[1:]
+        elif path.startswith("./"):
+            path = path[2:]
+        return not compiled.match(path)
+
+    return include
+
+
+class CompiledPatterns:
+    """
+    Ignore patterns compiled for matching with git's last-match-wins semantics.
+
+    Plain names ('node_modules', 'build/'), extensions ('*.log') and anchored literal
+    paths ('/dist', 'build/Release') make up most ignore files. They are looked up by
+    path component, component suffix or leading path in dictionaries mapping each key
+    to the index of its last pattern, instead of running a regex per pattern. The
+    remaining patterns are merged into one regex alternation, most significant first,
+    whose matching group names the winning pattern. The highest index matched across
+    all tables decides whether the path is excluded.
+    """
+
+    __slots__ = (
+        "excludes",
+        "names",
+        "dir_names",
+        "suffixes",
+        "dir_suffixes",
+        "prefixes",
+        "dir_prefixes",
+        "has_literals",
+        "regex",
+        "regex_index",
+    )
+
+    def __init__(self, patterns: List[Tuple[str, str, bool]]) -> None:
+        """
+        Initialize CompiledPatterns.
+
+        Args:
+            patterns (List[Tuple[str, str, bool]]): For each pattern, in order, the pattern
+                without its negation prefix, its regex as compiled by pathspec and whether a
+                match excludes (True) or re-includes (False) the path.
+        """
+        self.excludes: List[bool] = []
+        # Path component, component suffix or leading path to the index of its last pattern;
+        # the dir_ tables only match when something follows the key in the path
+        self.names: Dict[str, int] = {}
+        self.dir_names: Dict[str, int] = {}
+        self.suffixes: Dict[str, int] = {}
+        self.dir_suffixes: Dict[str, int] = {}
+        self.prefixes: Dict[str, int] = {}
+        self.dir_prefixes: Dict[str, int] = {}
+        self.regex: Optional[Pattern[str]] = None
+        # Index of the most significant pattern in the regex, or -1 if it is empty
+        self.regex_index: int = -1
+
+        alternatives: List[str] = []
+        for index, (pattern, regex, exclude) in enumerate(patterns):
+            self.excludes.append(exclude)
+            literal = LITERAL_PATTERN.match(pattern)
+            if literal is None:
+                regex = NAMED_GROUP.sub("(?:", regex)
+                # pathspec searches its regexes, so unanchored ones may match anywhere
+                if not regex.startswith("^"):
+                    regex = "(?s:.*?)" + regex
+                alternatives.append(f"(?P<p{index}>{regex})")
+                self.regex_index = index
+                continue
+            is_directory = bool(literal.group("dir"))
+            if literal.group("suffix"):
+                table = self.dir_suffixes if is_directory else self.suffixes
+                table[literal.group("suffix")] = index
+            elif literal.group("name"):
+                table = self.dir_names if is_directory else self.names
+                table[literal.group("name")] = index
+            else:
+                table = self.dir_prefixes if is_directory else self.prefixes
+                table[literal.group("path")] = index
+
+        self.has_literals: bool = len(alternatives) < len(self.excludes)
+        if alternatives:
+            self.regex = re.compile("|".join(reversed(alternatives)))
+
+    def __len__(self) -> int:
+        return len(self.excludes)
+
+    def match(self, path: str) -> Optional[bool]:
+        """
+        Match a path against the patterns.
+
+        Args:
+            path (str): The path to match, relative to the patterns' base directory, with a
+                trailing '/' for directories.
+
+        Returns:
+            Optional[bool]: True if the path is excluded, False if it is explicitly re-included
+                by a negation pattern, and None if no pattern matches.
+        """
+        best = -1
+        if self.has_literals:
+            parts = path.split("/")
+            last = len(parts) - 1
+            prefix = ""
+            for position, part in enumerate(parts):
+                if not part:
+                    continue
+                # Whether the component is a directory, i.e. followed by '/'
+                followed = position < last
+                prefix = f"{prefix}/{part}" if position else part
+                best = max(
+                    best,
+                    self.names.get(part, -1),
+                    self.prefixes.get(prefix, -1),
+                    self.dir_names.get(part, -1) if followed else -1,
+                    self.dir_prefixes.get(prefix, -1) if followed else -1,
+                )
+                if self.suffixes or self.dir_suffixes:
+                    dot = part.find(".")
+                    while dot != -1:
+                        suffix = part[dot:]
+                        best = max(
+                            best,
+                            self.suffixes.get(suffix, -1),
+                            self.dir_suffixes.get(suffix, -1) if followed else -1,
+                        )
+                        dot = part.find(".", dot + 1)
+
+        if self.regex_index > best:
+            match = self.regex.match(path)
+            if match is not None:
+                best = max(best, int(match.lastgroup[1:]))
+
+        return self.excludes[best] if best >= 0 else None
+
+
+@lru_cache(maxsize=COMPILED_PATTERNS_CACHE_SIZE)
+def compile_pattern_tuple(patterns: Tuple[str, ...]) -> CompiledPatterns:
+    """
+    Compile ignore patterns, reusing earlier compilations of the same patterns within a
+    process.
+
+    Args:
+        patterns (Tuple[str, ...]): gitignore-style patterns.
+
+    Returns:
+        CompiledPatterns: The compiled patterns.
+    """
+    from pathspec.patterns import GitWildMatchPattern
+
+    with profiler.stage("ignore_compile"):
+        compiled: List[Tuple[str, str, bool]] = []
+        for line in patterns:
+            pattern = GitWildMatchPattern(line)
+            if pattern.include is None:
+                continue
+            body = line[1:] if not pattern.include and line.startswith("!") else line
+            compiled.append((body, pattern.regex.pattern, bool(pattern.include)))
+        profiler.count("ignore_patterns_compiled", len(compiled))
+        return CompiledPatterns(compiled)
+
+
+def compile_patterns(patterns: List[str]) -> CompiledPatterns:
+    """
+    Compile ignore patterns for matching with git's last-match-wins semantics.
+
+    Identical pattern lists, such as the default ignore list or ignore files shared by
+    many repositories, are only compiled once per process.
+
+    Args:
+        patterns (List[str]): A list of gitignore-style patterns.
+
+    Returns:
+        CompiledPatterns: The compiled patterns.
+    """
+    return compile_pattern_tuple(tuple(patterns))
+
+
+def match_patterns(compiled: CompiledPatterns, path: str) -> Optional[bool]:
+    """
+    Match a path against compiled patterns with git's last-match-wins semantics.
+
+    Args:
+        compiled (CompiledPatterns): Patterns from compile_patterns.
+        path (str): The path to match, relative to the patterns' base directory.
+
+    Returns:
+        Optional[bool]: True if the path is excluded, False if it is explicitly re-included
+            by a negation pattern, and None if no pattern matches.
+    """
+    return compiled.match(path)
+
+
+class IgnoreMatcher:
+    """
+    Git-accurate hierarchical ignore matching.
+
+    Each directory's ignore files are compiled once into their own matcher and
+    applied to paths relative to that directory, with deeper directories taking
+    precedence. Ignore files in parent directories of the root directory are read
+    up to the repository root. Base patterns have the lowest precedence and
+    override patterns the highest.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        patterns: List[str],
+        ignore_file_names: Optional[List[str]] = None,
+        override_patterns: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Initialize the IgnoreMatcher.
+
+        Args:
+            root_dir (str): The root directory that paths are relative to.
+            patterns (List[str]): Base patterns relative to root_dir, with the lowest precedence.
+            ignore_file_names (Optional[List[str]]): Names of per-directory ignore files, in
+                increasing order of precedence (e.g. ['.gitignore', '.repopackpyignore']).
+            override_patterns (Optional[List[str]]): Patterns relative to root_dir that take
+                precedence over everything else.
+        """
+        self.root_dir: str = os.path.abspath(root_dir)
+        self.ignore_file_names: List[str] = list(ignore_file_names or [])
+        self.base = compile_patterns(patterns)
+        self.overrides = compile_patterns(override_patterns or [])
+        self.directories: Dict[str, Optional[CompiledPatterns]] = {}
+        self.outer: List[Tuple[str, CompiledPatterns]] = []
+
+        if self.ignore_file_names:
+            repository_root = find_repository_root(self.root_dir)
+            current_dir = self.root_dir
+            while repository_root is not None and current_dir != repository_root:
+                current_dir = os.path.dirname(current_dir)
+                compiled = self.load_ignore_files(current_dir)
+                if compiled:
+                    prefix = os.path.relpath(self.root_dir, current_dir).replace(os.sep, "/")
+                    self.outer.append((prefix + "/", compiled))
+
+    def load_ignore_files(
+        self, directory: str, file_names: Optional[List[str]] = None
+    ) -> Optional[CompiledPatterns]:
+        """
+        Read and compile the ignore files in a directory.
+
+        Args:
+            directory (str): The absolute directory path.
+            file_names (Optional[List[str]]): The names of the files in the directory, if already
+                known, to avoid checking for each ignore file on disk.
+
+        Returns:
+            Optional[CompiledPatterns]: The compiled patterns of the directory, or None if it
+                has no patterns.
+        """
+        patterns: List[str] = []
+        for name in self.ignore_file_names:
+            if file_names is not None:
+                if name not in file_names:
+                    continue
+            elif not os.path.isfile(os.path.join(directory, name)):
+                continue
+            patterns.extend(read_ignore_file(os.path.join(directory, name)))
+        return compile_patterns(patterns) if patterns else None
+
+    def add_directory(self, dir_path: str, file_names: Optional[List[str]] = None) -> None:
+        """
+        Register a directory and compile its ignore files.
+
+        Args:
+            dir_path (str): The directory path relative to root_dir ('' for root_dir itself).
+            file_names (Optional[List[str]]): The names of the files in the directory, if known.
+        """
+        dir_path = dir_path.replace(os.sep, "/").strip("/")
+        if dir_path not in self.directories:
+            self.directories[dir_path] = self.load_ignore_files(
+                os.path.join(self.root_dir, dir_path), file_names
+            )
+
+    def is_ignored(self, path: str, is_directory: bool = False) -> bool:
+        """
+        Check whether a path is ignored.
+
+        Ignore files of directories that were not registered with add_directory are read
+        on first use.
+
+        Args:
+            path (str): The path relative to root_dir.
+            is_directory (bool): Whether the path is a directory. Defaults to False.
+
+        Returns:
+            bool: True if the path is ignored, False otherwise.
+        """
+        profiler.count("ignore_checks")
+        path = path.replace(os.sep, "/").strip("/")
+        match_path = path + "/" if is_directory else path
+
+        result = match_patterns(self.overrides, match_path)
+        if result is not None:
+            return result
+
+        parts = path.split("/")
+        for depth in range(len(parts) - 1, -1, -1):
+            dir_path = "/".join(parts[:depth])
+            if dir_path not in self.directories:
+                self.add_directory(dir_path)
+            compiled = self.directories[dir_path]
+            if compiled:
+                relative = match_path[len(dir_path) + 1 :] if dir_path else match_path
+                result = match_patterns(compiled, relative)
+                if result is not None:
+                    return result
+
+        for prefix, compiled in self.outer:
+            result = match_patterns(compiled, prefix + match_path)
+            if result is not None:
+                return result
+
+        return bool(match_patterns(self.base, match_path))
+
+
+def create_ignore_matcher(root_dir: str, config: Dict[str, Any]) -> IgnoreMatcher:
+    """
+    Create a hierarchical ignore matcher based on the configuration.
+
+    Args:
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        IgnoreMatcher: The matcher for paths relative to root_dir.
+    """
+    ignore_file_names: List[str] = []
+    # Tracked files are listed regardless of .gitignore when enumerating from git
+    if config["ignore"]["use_gitignore"] and not config.get("git", {}).get("from_git"):
+        ignore_file_names.append(".gitignore")
+    ignore_file_names.append(".repopackpyignore")
+    return IgnoreMatcher(
+        root_dir,
+        DEFAULT_IGNORE_LIST if config["ignore"]["use_default_patterns"] else [],
+        ignore_file_names,
+        config["ignore"]["custom_patterns"],
+    )
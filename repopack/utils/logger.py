@@ -1,21 +1,32 @@
 import logging
 from typing import Dict, Any, Optional
-from colorama import Fore, Style, init
-
-# Initialize colorama for cross-platform colored output
-init(autoreset=True)
+from .colors import get_colors
 
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter to add colors to log messages based on their level."""
 
+    # colorama Fore attribute name for each level; BRIGHT_LEVELS are also made bright
     COLORS: Dict[str, str] = {
-        "DEBUG": Fore.BLUE,
-        "INFO": Fore.CYAN,
-        "WARNING": Fore.YELLOW,
-        "ERROR": Fore.RED,
-        "CRITICAL": Fore.RED + Style.BRIGHT,
+        "DEBUG": "BLUE",
+        "INFO": "CYAN",
+        "WARNING": "YELLOW",
+        "ERROR": "RED",
+        "CRITICAL": "RED",
     }
+    BRIGHT_LEVELS = ("CRITICAL",)
+
+    def __init__(self, fmt: str, stream: Any) -> None:
+        """
+        Initialize the formatter.
+
+        Args:
+            fmt (str): The log message format.
+            stream (Any): The stream the messages are written to; colors are only added
+                if it is a terminal.
+        """
+        super().__init__(fmt)
+        self.stream: Any = stream
 
     def format(self, record: logging.LogRecord) -> str:
         """
@@ -28,8 +39,12 @@ class ColoredFormatter(logging.Formatter):
             str: The formatted log message with color.
         """
         levelname: str = record.levelname
+        Fore, Style = get_colors(self.stream)
         if levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[levelname]}{levelname}{Style.RESET_ALL}"
+            color: str = getattr(Fore, self.COLORS[levelname])
+            if levelname in self.BRIGHT_LEVELS:
+                color += Style.BRIGHT
+            record.levelname = f"{color}{levelname}{Style.RESET_ALL}"
         return super().format(record)
 
 
@@ -41,9 +56,11 @@ class Logger:
         self.logger: logging.Logger = logging.getLogger("repopack-py")
         self.logger.setLevel(logging.INFO)
 
-        console_handler: logging.StreamHandler = logging.StreamHandler()
-        console_handler.setFormatter(ColoredFormatter("%(levelname)s: %(message)s"))
-        self.logger.addHandler(console_handler)
+        self.console_handler: logging.StreamHandler = logging.StreamHandler()
+        self.console_handler.setFormatter(
+            ColoredFormatter("%(levelname)s: %(message)s", self.console_handler.stream)
+        )
+        self.logger.addHandler(self.console_handler)
 
     def set_verbose(self, verbose: bool) -> None:
         """
@@ -82,6 +99,7 @@ class Logger:
             message (str): The trace message to log.
         """
         if self.logger.level <= logging.DEBUG:
+            Fore, Style = get_colors(self.console_handler.stream)
             self.logger.debug(f"{Fore.MAGENTA}TRACE: {message}{Style.RESET_ALL}")
 
 
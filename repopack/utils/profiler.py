@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Tuple
+
+# Trace events kept at most, so profiling a huge repository cannot exhaust memory;
+# stage totals and counters are still recorded past the limit
+MAX_TRACE_EVENTS = 1_000_000
+
+# Context manager returned for stages while profiling is disabled
+NULL_STAGE: ContextManager[None] = nullcontext()
+
+
+class StageTimer:
+    """Context manager timing one run of a stage on the current thread."""
+
+    __slots__ = ("profiler", "name", "start_wall", "start_cpu")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        """
+        Initialize a StageTimer.
+
+        Args:
+            profiler (Profiler): The profiler to record the stage in.
+            name (str): The stage name.
+        """
+        self.profiler: Profiler = profiler
+        self.name: str = name
+        self.start_wall: float = 0.0
+        self.start_cpu: float = 0.0
+
+    def __enter__(self) -> None:
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.thread_time()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.thread_time() - self.start_cpu
+        self.profiler.record(self.name, self.start_wall, wall, cpu)
+
+
+class Profiler:
+    """
+    Per-stage timings and counters for the packing pipeline.
+
+    Disabled by default, in which case stage() returns a shared no-op context
+    manager and count() returns at once; hot paths additionally check 'enabled'
+    before computing what they would count. Stages record wall time and the CPU
+    time of the thread running them, and can be exported as Chrome trace events
+    for chrome://tracing or Perfetto.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a disabled Profiler."""
+        self.enabled: bool = False
+        self.lock: threading.Lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard everything recorded so far and restart the trace clock."""
+        self.origin: float = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.thread_names: Dict[int, str] = {}
+
+    def enable(self) -> None:
+        """Discard earlier recordings and start recording."""
+        self.reset()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording, keeping what was recorded."""
+        self.enabled = False
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """
+        Time a stage.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            ContextManager[None]: A context manager timing the code it wraps.
+        """
+        if not self.enabled:
+            return NULL_STAGE
+        return StageTimer(self, name)
+
+    def record(self, name: str, start: float, wall: float, cpu: float) -> None:
+        """
+        Record one run of a stage.
+
+        Args:
+            name (str): The stage name.
+            start (float): The perf_counter() value when the stage started.
+            wall (float): The wall time in seconds.
+            cpu (float): The CPU time of the running thread in seconds.
+        """
+        thread = threading.current_thread()
+        with self.lock:
+            totals = self.stages.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.thread_names.setdefault(thread.ident or 0, thread.name)
+                self.events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": round((start - self.origin) * 1e6, 3),
+                        "dur": round(wall * 1e6, 3),
+                        "pid": os.getpid(),
+                        "tid": thread.ident or 0,
+                        "args": {"cpu_ms": round(cpu * 1e3, 3)},
+                    }
+                )
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): The counter name.
+            value (int): The amount to add. Defaults to 1.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge_counters(self, counters: Dict[str, int]) -> None:
+        """
+        Add counters recorded elsewhere, such as in a worker process.
+
+        Args:
+            counters (Dict[str, int]): Counter values by name.
+        """
+        for name, value in counters.items():
+            self.count(name, value)
+
+    def to_stats(self) -> Dict[str, Any]:
+        """
+        Get the stage totals and counters.
+
+        Returns:
+            Dict[str, Any]: Calls, wall seconds and CPU seconds by stage name ('stages'),
+                and counter values by name ('counters').
+        """
+        with self.lock:
+            return {
+                "stages": {
+                    name: {
+                        "calls": int(calls),
+                        "wall_seconds": round(wall, 6),
+                        "cpu_seconds": round(cpu, 6),
+                    }
+                    for name, (calls, wall, cpu) in self.stages.items()
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def to_trace(self) -> Dict[str, Any]:
+        """
+        Get the recorded stages as a Chrome trace.
+
+        Returns:
+            Dict[str, Any]: The trace in the Trace Event Format, with counters as metadata.
+        """
+        pid = os.getpid()
+        with self.lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self.thread_names.items()
+            ]
+            events = metadata + list(self.events)
+            counters = dict(sorted(self.counters.items()))
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": counters}
+
+    def write_trace(self, path: str) -> None:
+        """
+        Write the recorded stages as a Chrome trace file.
+
+        Args:
+            path (str): The path to the trace file.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_trace(), f)
+
+
+# Shared instance used by the packing pipeline
+profiler = Profiler()
+
+
+def call_with_counters(func: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, int]]:
+    """
+    Run a function in a worker process with profiling enabled, returning its counters.
+
+    Counters recorded in a worker process would otherwise stay there; the caller
+    merges the returned counters into its own profiler.
+
+    Args:
+        func (Callable[..., Any]): The function to run; must be picklable.
+        *args (Any): The arguments to call it with.
+
+    Returns:
+        Tuple[Any, Dict[str, int]]: The function's result and the counters it recorded.
+    """
+    profiler.enable()
+    try:
+        return func(*args), dict(profiler.counters)
+    finally:
+        profiler.disable()
+
+
+def write_stats_json(path: str, pack_result: Dict[str, Any]) -> None:
+    """
+    Write packing statistics and the profiler's stage totals and counters as JSON.
+
+    Args:
+        path (str): The path to the JSON file.
+        pack_result (Dict[str, Any]): The statistics returned by pack().
+    """
+    stats: Dict[str, Any] = {"pack": pack_result}
+    stats.update(profiler.to_stats())
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2, default=str)
+        f.write("\n")
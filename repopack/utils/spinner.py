@@ -1,5 +1,7 @@
-from halo import Halo
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from halo import Halo
 
 
 class Spinner:
@@ -12,7 +14,9 @@ class Spinner:
         Args:
             message (str): The initial message to display with the spinner.
         """
-        self.spinner: Halo = Halo(text=message, spinner="dots")
+        from halo import Halo
+
+        self.spinner: "Halo" = Halo(text=message, spinner="dots")
 
     def start(self) -> None:
         """Start the spinner animation."""
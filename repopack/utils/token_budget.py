@@ -0,0 +1,105 @@
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+from ..exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    from pathspec import PathSpec
+
+
+def get_priority(file_path: str, priority_specs: List["PathSpec"]) -> int:
+    """
+    Get the priority rank of a file from the configured path globs.
+
+    Args:
+        file_path (str): The file path relative to the root directory.
+        priority_specs (List[PathSpec]): Compiled priority globs, highest priority first.
+
+    Returns:
+        int: The index of the first matching glob, or len(priority_specs) if none match.
+    """
+    for index, spec in enumerate(priority_specs):
+        if spec.match_file(file_path):
+            return index
+    return len(priority_specs)
+
+
+def rank_files(
+    sanitized_files: List[Dict[str, Any]], root_dir: str, config: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Order files by packing preference for the token budget.
+
+    Files are ranked by the first matching glob in 'tokens.priority', then by
+    'tokens.rank_by': 'size' prefers files with fewer tokens, 'recency' prefers
+    recently modified files in the working tree and 'path' keeps the packing order.
+
+    Args:
+        sanitized_files (List[Dict[str, Any]]): Sanitized files with token counts.
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        List[Dict[str, Any]]: The files, most preferred first.
+
+    Raises:
+        ConfigurationError: If 'tokens.rank_by' is not recognized, or is 'recency' while
+            packing a git ref, whose files have no modification times.
+    """
+    from pathspec import PathSpec
+    from pathspec.patterns import GitWildMatchPattern
+
+    tokens_config: Dict[str, Any] = config.get("tokens", {})
+    priority_specs = [
+        PathSpec.from_lines(GitWildMatchPattern, [pattern])
+        for pattern in tokens_config.get("priority", [])
+    ]
+    rank_by: str = tokens_config.get("rank_by", "size")
+    if rank_by not in ("size", "recency", "path"):
+        raise ConfigurationError(f"Unknown token rank_by option: {rank_by}")
+    if rank_by == "recency" and config.get("git", {}).get("ref"):
+        raise ConfigurationError("Token rank_by 'recency' cannot be used with a git ref")
+
+    def sort_key(file: Dict[str, Any]) -> Tuple[int, float]:
+        priority = get_priority(file["path"], priority_specs)
+        if rank_by == "size":
+            return priority, file["tokens"]
+        if rank_by == "recency":
+            try:
+                return priority, -os.stat(os.path.join(root_dir, file["path"])).st_mtime
+            except OSError:
+                return priority, 0  # Removed since it was read; rank it as the oldest
+        return priority, 0
+
+    return sorted(sanitized_files, key=sort_key)
+
+
+def select_within_budget(
+    sanitized_files: List[Dict[str, Any]], root_dir: str, config: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Greedily fill the token budget with the highest-ranked files.
+
+    Files are taken in rank order and any file that does not fit in the remaining
+    budget is left out. The budget covers file contents only, not the header and
+    the repository structure.
+
+    Args:
+        sanitized_files (List[Dict[str, Any]]): Sanitized files with token counts.
+        root_dir (str): The root directory of the project.
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[str]]: The selected files in their original order,
+            and the paths of the files left out.
+    """
+    budget: int = config["tokens"]["budget"]
+    used = 0
+    selected_paths = set()
+    for file in rank_files(sanitized_files, root_dir, config):
+        if used + file["tokens"] <= budget:
+            used += file["tokens"]
+            selected_paths.add(file["path"])
+
+    selected = [file for file in sanitized_files if file["path"] in selected_paths]
+    excluded = [file["path"] for file in sanitized_files if file["path"] not in selected_paths]
+    return selected, excluded
@@ -0,0 +1,187 @@
+import base64
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from ..exceptions import ConfigurationError
+
+# Estimator pieces: runs of up to four word characters, or single punctuation characters
+ESTIMATE_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Regex approximation of the cl100k pre-tokenizer; Python's re has no \p{L}/\p{N}
+BPE_PRETOKENIZE_PATTERN = re.compile(
+    r"'(?i:[sdmt]|ll|ve|re)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"
+)
+
+# Maximum number of pre-tokenized pieces whose token counts are memoized
+BPE_PIECE_CACHE_SIZE = 100_000
+
+
+class Tokenizer(ABC):
+    """Base class for token counters used to budget the packed output."""
+
+    name: str = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """
+        Count the tokens in a text.
+
+        Args:
+            text (str): The text to count.
+
+        Returns:
+            int: The number of tokens.
+        """
+
+
+class EstimateTokenizer(Tokenizer):
+    """A fast offline estimator that needs no vocabulary files."""
+
+    name = "estimate"
+
+    def count(self, text: str) -> int:
+        """
+        Estimate the tokens in a text.
+
+        Words are counted as one token per four characters and every punctuation
+        character as one token, which tracks BPE tokenizers closely on source code.
+
+        Args:
+            text (str): The text to count.
+
+        Returns:
+            int: The estimated number of tokens.
+        """
+        return len(ESTIMATE_PATTERN.findall(text))
+
+
+class BPETokenizer(Tokenizer):
+    """A byte-pair encoding tokenizer that runs from a local tiktoken-format vocab file."""
+
+    name = "bpe"
+
+    def __init__(self, vocab_file: str) -> None:
+        """
+        Load the merge ranks from a vocab file.
+
+        Args:
+            vocab_file (str): Path to a file with one base64-encoded token and its rank per line.
+
+        Raises:
+            ConfigurationError: If the vocab file cannot be read or parsed.
+        """
+        self.ranks: Dict[bytes, int] = {}
+        try:
+            with open(vocab_file, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        token, rank = line.split()
+                        self.ranks[base64.b64decode(token)] = int(rank)
+        except (OSError, ValueError) as e:
+            raise ConfigurationError(f"Error reading vocab file {vocab_file}: {str(e)}")
+        self.count_piece = lru_cache(maxsize=BPE_PIECE_CACHE_SIZE)(self._count_piece)
+
+    def _count_piece(self, piece: bytes) -> int:
+        """
+        Count the tokens a single pre-tokenized piece is merged into.
+
+        Args:
+            piece (bytes): The UTF-8 bytes of the piece.
+
+        Returns:
+            int: The number of tokens.
+        """
+        if piece in self.ranks:
+            return 1
+        parts = [piece[i : i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank: Optional[int] = None
+            best_index = 0
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = i
+            if best_rank is None:
+                break
+            parts[best_index : best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        """
+        Count the BPE tokens in a text.
+
+        Args:
+            text (str): The text to count.
+
+        Returns:
+            int: The number of tokens.
+        """
+        return sum(
+            self.count_piece(piece.encode("utf-8"))
+            for piece in BPE_PRETOKENIZE_PATTERN.findall(text)
+        )
+
+
+# Registered tokenizer classes by name
+TOKENIZERS: Dict[str, Any] = {
+    EstimateTokenizer.name: EstimateTokenizer,
+    BPETokenizer.name: BPETokenizer,
+}
+
+
+@lru_cache(maxsize=8)
+def create_tokenizer(name: str, vocab_file: Optional[str] = None) -> Tokenizer:
+    """
+    Create a tokenizer by name, reusing instances within a process.
+
+    Args:
+        name (str): The tokenizer name ('estimate' or 'bpe').
+        vocab_file (Optional[str]): The vocab file for tokenizers that need one.
+
+    Returns:
+        Tokenizer: The tokenizer instance.
+
+    Raises:
+        ConfigurationError: If the tokenizer is unknown or misconfigured.
+    """
+    if name not in TOKENIZERS:
+        raise ConfigurationError(f"Unknown tokenizer: {name}")
+    if name == BPETokenizer.name:
+        if not vocab_file:
+            raise ConfigurationError("The bpe tokenizer requires 'tokens.vocab_file'")
+        return BPETokenizer(vocab_file)
+    return TOKENIZERS[name]()
+
+
+def is_counting_enabled(config: Dict[str, Any]) -> bool:
+    """
+    Check whether tokens are counted, which a token budget implies.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        bool: True if token counting is enabled.
+    """
+    tokens_config: Dict[str, Any] = config.get("tokens", {})
+    return bool(tokens_config.get("enabled") or tokens_config.get("budget"))
+
+
+def get_tokenizer(config: Dict[str, Any]) -> Optional[Tokenizer]:
+    """
+    Get the tokenizer described by the configuration.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Optional[Tokenizer]: The tokenizer, or None if token counting is disabled.
+    """
+    if not is_counting_enabled(config):
+        return None
+    tokens_config: Dict[str, Any] = config.get("tokens", {})
+    return create_tokenizer(
+        tokens_config.get("tokenizer", EstimateTokenizer.name), tokens_config.get("vocab_file")
+    )
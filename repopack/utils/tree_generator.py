@@ -1,9 +1,12 @@
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+from .profiler import profiler
 
 
 class TreeNode:
     """Represents a node in the file tree structure."""
 
+    __slots__ = ("name", "children", "is_directory")
+
     def __init__(self, name: str, is_directory: bool = False):
         """
         Initialize a TreeNode.
@@ -13,7 +16,7 @@ class TreeNode:
             is_directory (bool, optional): Whether this node represents a directory. Defaults to False.
         """
         self.name: str = name
-        self.children: List["TreeNode"] = []
+        self.children: Dict[str, "TreeNode"] = {}
         self.is_directory: bool = is_directory
 
 
@@ -21,6 +24,9 @@ def generate_file_tree(files: List[str]) -> TreeNode:
     """
     Generate a file tree structure from a list of file paths.
 
+    Children are looked up by name, so construction is linear in the total
+    number of path components.
+
     Args:
         files (List[str]): List of file paths.
 
@@ -30,29 +36,59 @@ def generate_file_tree(files: List[str]) -> TreeNode:
     root = TreeNode("root", True)
     for file in files:
         parts = file.split("/")
+        last_index = len(parts) - 1
         current_node = root
         for i, part in enumerate(parts):
-            is_last_part = i == len(parts) - 1
-            child = next((c for c in current_node.children if c.name == part), None)
-            if not child:
-                child = TreeNode(part, not is_last_part)
-                current_node.children.append(child)
+            child = current_node.children.get(part)
+            if child is None:
+                child = TreeNode(part, i != last_index)
+                current_node.children[part] = child
             current_node = child
     return root
 
 
-def sort_tree_nodes(node: TreeNode) -> None:
+def sort_key(node: TreeNode) -> Tuple[bool, str]:
+    """
+    Get the sort key of a node: directories before files, and then alphabetically.
+
+    Args:
+        node (TreeNode): The node to sort.
+
+    Returns:
+        Tuple[bool, str]: The sort key.
+    """
+    return (not node.is_directory, node.name)
+
+
+def iter_tree_lines(node: TreeNode, prefix: str = "") -> Iterator[str]:
     """
-    Sort the children of a TreeNode recursively.
+    Yield the lines of the string representation of a TreeNode structure.
 
-    Directories are sorted before files, and then alphabetically.
+    The tree is traversed depth-first with an explicit stack, so arbitrarily deep
+    trees render without hitting the recursion limit, and each directory's
+    children are sorted exactly once when it is visited.
 
     Args:
-        node (TreeNode): The node whose children should be sorted.
+        node (TreeNode): The root node of the tree to render.
+        prefix (str, optional): The prefix to use for indentation. Defaults to "".
+
+    Yields:
+        str: One line per file or directory, without a trailing newline.
     """
-    node.children.sort(key=lambda x: (not x.is_directory, x.name))
-    for child in node.children:
-        sort_tree_nodes(child)
+    stack: List[Tuple[Iterator[TreeNode], str]] = [
+        (iter(sorted(node.children.values(), key=sort_key)), prefix)
+    ]
+    while stack:
+        children, child_prefix = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        if child.is_directory:
+            yield f"{child_prefix}{child.name}/"
+            stack.append((iter(sorted(child.children.values(), key=sort_key)), child_prefix + "  "))
+        else:
+            yield f"{child_prefix}{child.name}"
 
 
 def tree_to_string(node: TreeNode, prefix: str = "") -> str:
@@ -66,13 +102,7 @@ def tree_to_string(node: TreeNode, prefix: str = "") -> str:
     Returns:
         str: A string representation of the file tree.
     """
-    sort_tree_nodes(node)
-    result = ""
-    for child in node.children:
-        result += f"{prefix}{child.name}{'/' if child.is_directory else ''}\n"
-        if child.is_directory:
-            result += tree_to_string(child, prefix + "  ")
-    return result
+    return "".join(f"{line}\n" for line in iter_tree_lines(node, prefix))
 
 
 def generate_tree_string(files: List[str]) -> str:
@@ -85,5 +115,6 @@ def generate_tree_string(files: List[str]) -> str:
     Returns:
         str: A string representation of the file tree.
     """
-    tree = generate_file_tree(files)
-    return tree_to_string(tree).strip()
+    with profiler.stage("tree_render"):
+        tree = generate_file_tree(files)
+        return tree_to_string(tree).strip()
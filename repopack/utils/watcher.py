@@ -0,0 +1,302 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set, Tuple
+from .logger import logger
+
+# Stat fields that identify a change to a file or directory listing
+Signature = Tuple[int, int, int]
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# Events that change a directory listing, and events that change a file's content
+INOTIFY_LISTING_EVENTS = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_WATCH_MASK = (
+    INOTIFY_LISTING_EVENTS
+    | IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+# Marker returned when events were lost and everything must be rescanned; NUL never
+# occurs in paths
+RESCAN_ALL = "\0"
+
+
+def stat_signature(stat: os.stat_result) -> Signature:
+    """
+    Get the signature of stat data.
+
+    Args:
+        stat (os.stat_result): The stat data.
+
+    Returns:
+        Signature: The modification time, size and inode.
+    """
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def get_signature(path: str) -> Optional[Signature]:
+    """
+    Get the stat signature of a path.
+
+    Args:
+        path (str): The path to stat.
+
+    Returns:
+        Optional[Signature]: The modification time, size and inode, or None if the path
+            does not exist.
+    """
+    try:
+        return stat_signature(os.stat(path))
+    except OSError:
+        return None
+
+
+class Watcher(ABC):
+    """Base class for change watchers used by watch mode."""
+
+    @abstractmethod
+    def sync(
+        self,
+        file_signatures: Dict[str, Optional[Signature]],
+        directory_signatures: Dict[str, Optional[Signature]],
+    ) -> None:
+        """
+        Update the watched paths after changes were processed.
+
+        Args:
+            file_signatures (Dict[str, Optional[Signature]]): Stat signatures of the tracked
+                files by relative path, as recorded when they were last processed.
+            directory_signatures (Dict[str, Optional[Signature]]): Stat signatures of the
+                tracked directories by relative path ('' for the root directory itself).
+        """
+
+    @abstractmethod
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout (float): The number of seconds to wait.
+
+        Returns:
+            Set[str]: The relative paths of changed files, and of directories whose listing
+                changed; RESCAN_ALL if changes may have been missed.
+        """
+
+    def close(self) -> None:
+        """Release the watcher's resources."""
+
+
+class PollingWatcher(Watcher):
+    """Detects changes by comparing stat signatures of the tracked paths."""
+
+    def __init__(self, root_dir: str) -> None:
+        """
+        Initialize the PollingWatcher.
+
+        Args:
+            root_dir (str): The root directory that tracked paths are relative to.
+        """
+        self.root_dir: str = root_dir
+        self.snapshot: Dict[str, Optional[Signature]] = {}
+
+    def sync(
+        self,
+        file_signatures: Dict[str, Optional[Signature]],
+        directory_signatures: Dict[str, Optional[Signature]],
+    ) -> None:
+        """
+        Replace the tracked paths with the signatures recorded when they were last processed.
+
+        Args:
+            file_signatures (Dict[str, Optional[Signature]]): Stat signatures of the tracked
+                files by relative path.
+            directory_signatures (Dict[str, Optional[Signature]]): Stat signatures of the
+                tracked directories by relative path ('' for root_dir itself).
+        """
+        self.snapshot = dict(file_signatures)
+        self.snapshot.update(directory_signatures)
+
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Wait for the given time, then report the tracked paths that changed.
+
+        Directories report added and removed entries through their own signature,
+        since creating, deleting or renaming an entry updates the directory's
+        modification time.
+
+        Args:
+            timeout (float): The number of seconds to wait before polling.
+
+        Returns:
+            Set[str]: The relative paths whose signature changed since the previous poll.
+        """
+        time.sleep(timeout)
+        changed: Set[str] = set()
+        for path, signature in self.snapshot.items():
+            current = get_signature(os.path.join(self.root_dir, path))
+            if current != signature:
+                self.snapshot[path] = current
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        """Release the watcher's resources."""
+        self.snapshot = {}
+
+
+class InotifyWatcher(Watcher):
+    """Receives change events from the Linux kernel through inotify, using ctypes."""
+
+    def __init__(self, root_dir: str) -> None:
+        """
+        Initialize the InotifyWatcher.
+
+        Args:
+            root_dir (str): The root directory that watched paths are relative to.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root_dir: str = root_dir
+        self.fd: int = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.directories: Dict[int, str] = {}
+        self.watched: Set[str] = set()
+
+    def sync(
+        self,
+        file_signatures: Dict[str, Optional[Signature]],
+        directory_signatures: Dict[str, Optional[Signature]],
+    ) -> None:
+        """
+        Watch every tracked directory that is not watched yet.
+
+        Files need no watches of their own, since events for a file are reported on
+        its directory.
+
+        Args:
+            file_signatures (Dict[str, Optional[Signature]]): Stat signatures of the tracked
+                files by relative path; unused.
+            directory_signatures (Dict[str, Optional[Signature]]): Stat signatures of the
+                tracked directories by relative path ('' for root_dir itself).
+        """
+        for path in directory_signatures:
+            if path in self.watched:
+                continue
+            full_path = os.path.join(self.root_dir, path)
+            wd = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(full_path), ctypes.c_uint32(INOTIFY_WATCH_MASK)
+            )
+            if wd < 0:
+                logger.warning(
+                    f"Cannot watch directory {full_path}: {os.strerror(ctypes.get_errno())}"
+                )
+                continue
+            self.directories[wd] = path
+            self.watched.add(path)
+
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Wait up to the given time for events and report the affected paths.
+
+        Args:
+            timeout (float): The maximum number of seconds to wait.
+
+        Returns:
+            Set[str]: The relative paths of changed files, and of directories whose listing
+                changed; RESCAN_ALL if events were lost.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = INOTIFY_EVENT_HEADER.unpack_from(data, pos)
+                pos += INOTIFY_EVENT_HEADER.size
+                name = os.fsdecode(data[pos : pos + length].rstrip(b"\0"))
+                pos += length
+
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(RESCAN_ALL)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # The directory is gone from its path; its parent reports the listing
+                    # change, and a directory created there later gets a new watch
+                    if not mask & IN_IGNORED:
+                        self.libc.inotify_rm_watch(self.fd, wd)
+                    del self.directories[wd]
+                    self.watched.discard(directory)
+                    continue
+                if mask & INOTIFY_LISTING_EVENTS:
+                    changed.add(directory)
+                if name:
+                    changed.add(os.path.join(directory, name) if directory else name)
+        return changed
+
+    def close(self) -> None:
+        """Release the inotify file descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(root_dir: str, backend: str = "auto") -> Watcher:
+    """
+    Create a change watcher for a directory tree.
+
+    Args:
+        root_dir (str): The root directory to watch.
+        backend (str): 'inotify', 'poll', or 'auto' to use inotify where available and fall
+            back to polling.
+
+    Returns:
+        Watcher: An InotifyWatcher or PollingWatcher.
+    """
+    if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root_dir)
+        except (OSError, AttributeError) as e:
+            if backend == "inotify":
+                raise
+            logger.debug(f"inotify unavailable, falling back to polling: {str(e)}")
+    return PollingWatcher(root_dir)
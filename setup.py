@@ -30,6 +30,8 @@ setup(
     ],
     extras_require={
         "dev": ["black", "build", "pre-commit", "pytest", "pytest-cov", "twine"],
+        "zstd": ["zstandard"],
+        "fast-hash": ["xxhash"],
     },
     classifiers=[
         "Programming Language :: Python :: 3",
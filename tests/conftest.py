@@ -0,0 +1,21 @@
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def user_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """
+    Keep content caches written by tests out of the real user cache directory.
+
+    Args:
+        tmp_path_factory (pytest.TempPathFactory): Pytest fixture creating temporary directories.
+        monkeypatch (pytest.MonkeyPatch): Pytest fixture for setting environment variables.
+
+    Returns:
+        Path: The cache base directory used by the test.
+    """
+    cache_dir = tmp_path_factory.mktemp("user-cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_dir))
+    return cache_dir
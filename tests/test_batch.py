@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+from repopack.batch import pack_batch, read_roots_file
+
+
+def test_read_roots_file(tmp_path: Path) -> None:
+    """
+    Test that roots are resolved against the roots file and overrides are parsed.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    roots_file = tmp_path / "roots.txt"
+    roots_file.write_text(
+        "# nightly\n"
+        "services/api\n"
+        "\n"
+        'services/web {"ignore": {"custom_patterns": ["*.css"]}}\n'
+        "/abs/path with spaces\n"
+    )
+
+    assert read_roots_file(str(roots_file)) == [
+        {"root": str(tmp_path / "services" / "api"), "config": {}},
+        {
+            "root": str(tmp_path / "services" / "web"),
+            "config": {"ignore": {"custom_patterns": ["*.css"]}},
+        },
+        {"root": "/abs/path with spaces", "config": {}},
+    ]
+
+
+def test_pack_batch(tmp_path: Path) -> None:
+    """
+    Test that every root is packed with its own overrides and failures are reported.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    for name in ("api", "web"):
+        (tmp_path / name / "src").mkdir(parents=True)
+        (tmp_path / name / "src" / "main.py").write_text(f"print('{name}')")
+        (tmp_path / name / "style.css").write_text("body {}")
+    targets = [
+        {"root": str(tmp_path / "api")},
+        {"root": str(tmp_path / "web"), "config": {"ignore": {"custom_patterns": ["*.css"]}}},
+        {"root": str(tmp_path / "missing")},
+    ]
+    output_dir = tmp_path / "out"
+
+    report = pack_batch(targets, {"cache": {"enabled": False}}, 2, str(output_dir))
+
+    assert [root["status"] for root in report["roots"]] == ["ok", "ok", "error"]
+    assert [root.get("total_files") for root in report["roots"]] == [2, 1, None]
+    assert report["total_files"] == 3
+    assert report["failed_roots"] == 1
+    assert "print('web')" in (output_dir / "web.txt").read_text()
+    assert "style.css" not in (output_dir / "web.txt").read_text()
+    json.dumps(report)
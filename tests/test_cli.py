@@ -8,7 +8,7 @@ def test_run_cli_success():
     with patch("repopack.cli.argparse.ArgumentParser.parse_args") as mock_parse_args, patch(
         "repopack.cli.load_config"
     ) as mock_load_config, patch("repopack.cli.merge_configs") as mock_merge_configs, patch(
-        "repopack.cli.pack"
+        "repopack.packager.pack"
     ) as mock_pack, patch(
         "repopack.cli.print_summary"
     ) as mock_print_summary, patch(
@@ -37,7 +37,7 @@ def test_run_cli_repopack_error():
     with patch("repopack.cli.argparse.ArgumentParser.parse_args") as mock_parse_args, patch(
         "repopack.cli.load_config"
     ) as mock_load_config, patch("repopack.cli.merge_configs") as mock_merge_configs, patch(
-        "repopack.cli.pack"
+        "repopack.packager.pack"
     ) as mock_pack, patch(
         "repopack.cli.logger.error"
     ) as mock_logger_error, patch(
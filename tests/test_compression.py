@@ -0,0 +1,108 @@
+import bz2
+import gzip
+import importlib.util
+import lzma
+import re
+from pathlib import Path
+import pytest
+from repopack.config import merge_configs
+from repopack.exceptions import ConfigurationError
+from repopack.output_generator import generate_output, generate_sharded_output
+from repopack.utils.compression import get_compressed_path
+
+DECOMPRESSORS = {"gzip": gzip.decompress, "bz2": bz2.decompress, "xz": lzma.decompress}
+
+FILES = [
+    {"path": "src/main.py", "content": "print('hello')\n" * 50},
+    {"path": "src/util.py", "content": "def util():\n    return 'ünïcode'\n"},
+]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\d{4}-\d\d-\d\dT[\d:.]+", "DATE", text)
+
+
+@pytest.mark.parametrize("compression_format", sorted(DECOMPRESSORS))
+def test_generate_output_compressed(tmp_path: Path, compression_format: str) -> None:
+    """
+    Test that compressed output decompresses to the same document as plain output.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+        compression_format (str): The compression format to write.
+    """
+    file_paths = [file["path"] for file in FILES]
+    plain_path = tmp_path / "plain.txt"
+    generate_output(str(tmp_path), merge_configs({}, {}), iter(FILES), file_paths, str(plain_path))
+    config = merge_configs({}, {"compression": {"format": compression_format, "level": 1}})
+
+    generate_output(str(tmp_path), config, iter(FILES), file_paths, str(tmp_path / "out.txt"))
+
+    compressed_path = Path(get_compressed_path(str(tmp_path / "out.txt"), config))
+    assert compressed_path.name != "out.txt"
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        ["plain.txt", compressed_path.name]
+    )
+    decompressed = DECOMPRESSORS[compression_format](compressed_path.read_bytes())
+    assert _normalize(decompressed.decode("utf-8")) == _normalize(plain_path.read_text())
+
+
+def test_sharded_output_compressed(tmp_path: Path) -> None:
+    """
+    Test that every shard is compressed and listed under its compressed name.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    config = merge_configs(
+        {}, {"compression": {"format": "gzip"}, "split": {"max_size": 2750, "unit": "chars"}}
+    )
+    file_paths = [file["path"] for file in FILES]
+
+    manifest = generate_sharded_output(config, iter(FILES), file_paths, str(tmp_path / "o.txt"))
+
+    assert [shard["path"] for shard in manifest["shards"]] == ["o-1.txt.gz", "o-2.txt.gz"]
+    for shard in manifest["shards"]:
+        assert (
+            "Repository Files" in gzip.decompress((tmp_path / shard["path"]).read_bytes()).decode()
+        )
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("zstandard") is not None, reason="zstandard is installed"
+)
+def test_zstd_without_zstandard(tmp_path: Path) -> None:
+    """
+    Test that zstd compression reports the missing optional package.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    config = merge_configs({}, {"compression": {"format": "zstd"}})
+    with pytest.raises(ConfigurationError, match="zstandard"):
+        generate_output(str(tmp_path), config, iter(FILES), [], str(tmp_path / "out.txt"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_zstd_round_trip(tmp_path: Path) -> None:
+    """
+    Test that zstd output decompresses to the same document as plain output.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    zstandard = pytest.importorskip("zstandard")
+    file_paths = [file["path"] for file in FILES]
+    plain_path = tmp_path / "plain.txt"
+    generate_output(str(tmp_path), merge_configs({}, {}), iter(FILES), file_paths, str(plain_path))
+    config = merge_configs({}, {"compression": {"format": "zstd", "level": 1}})
+
+    generate_output(str(tmp_path), config, iter(FILES), file_paths, str(tmp_path / "out.txt"))
+
+    compressed_path = Path(get_compressed_path(str(tmp_path / "out.txt"), config))
+    assert compressed_path.name == "out.txt.zst"
+    # Streamed frames do not record the content size, so decompress incrementally
+    decompressed = (
+        zstandard.ZstdDecompressor().decompressobj().decompress(compressed_path.read_bytes())
+    )
+    assert _normalize(decompressed.decode("utf-8")) == _normalize(plain_path.read_text())
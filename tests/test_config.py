@@ -1,7 +1,7 @@
 import pytest
 from pathlib import Path
 from typing import Dict, Any
-from repopack.config import load_config, merge_configs, DEFAULT_CONFIG
+from repopack.config import load_config, merge_configs, parse_size, DEFAULT_CONFIG
 from repopack.exceptions import ConfigurationError
 
 
@@ -44,3 +44,26 @@ def test_merge_configs() -> None:
     assert merged["output"]["file_path"] == "file_output.txt"
     assert merged["output"]["show_line_numbers"] is True
     assert merged["output"]["style"] == DEFAULT_CONFIG["output"]["style"]
+
+
+def test_merge_configs_replaces_default_encodings() -> None:
+    """
+    Test that configured default encodings replace the defaults instead of extending them.
+    """
+    file_config: Dict[str, Any] = {"encoding": {"default_encodings": ["cp1252"]}}
+    merged: Dict[str, Any] = merge_configs(file_config, {})
+
+    assert merged["encoding"]["default_encodings"] == ["cp1252"]
+    assert DEFAULT_CONFIG["encoding"]["default_encodings"] == ["utf-8"]
+
+
+def test_parse_size() -> None:
+    """
+    Test parsing human-readable sizes.
+    """
+    assert parse_size("1048576") == 1048576
+    assert parse_size("512K") == 512 * 1024
+    assert parse_size("10mb") == 10 * 1024 * 1024
+    assert parse_size(0) == 0
+    with pytest.raises(ConfigurationError):
+        parse_size("ten megabytes")
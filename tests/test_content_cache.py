@@ -0,0 +1,178 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict
+from unittest.mock import patch
+from repopack.config import merge_configs
+from repopack.packager import pack
+from repopack.utils.content_cache import ContentCache, get_cache_path, get_options_hash
+from repopack.utils.file_handler import sanitize_entry, sanitize_files
+
+
+def _config() -> Dict[str, Any]:
+    return {
+        "output": {
+            "remove_comments": False,
+            "remove_empty_lines": False,
+            "show_line_numbers": False,
+        },
+        "processing": {"jobs": 1},
+    }
+
+
+def test_cache_round_trip_and_invalidation(tmp_path: Path) -> None:
+    """
+    Test that entries are served only while stat data and options are unchanged.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("hello")
+    stat = os.stat(file_path)
+    options_hash = get_options_hash(_config())
+
+    cache = ContentCache(str(tmp_path / "cache.db"), options_hash, 1024)
+    cache.store("a.txt", stat, {"binary": False, "encoding": "ascii", "content": "hello"})
+    cache.close()
+
+    cache = ContentCache(str(tmp_path / "cache.db"), options_hash, 1024)
+    assert cache.find_valid({"a.txt": stat}) == {"a.txt"}
+    assert cache.load("a.txt") == {
+        "binary": False,
+        "encoding": "ascii",
+        "content": "hello",
+        "tokens": None,
+        "comment_bytes": 0,
+    }
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.find_valid({"a.txt": os.stat(file_path)}) == set()
+    cache.close()
+
+    other_config = _config()
+    other_config["output"]["show_line_numbers"] = True
+    cache = ContentCache(str(tmp_path / "cache.db"), get_options_hash(other_config), 1024)
+    assert cache.find_valid({"a.txt": stat}) == set()
+    cache.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """
+    Test that the cache evicts the oldest entries once it exceeds its size limit.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    (tmp_path / "a.txt").write_text("x")
+    stat = os.stat(tmp_path / "a.txt")
+    cache = ContentCache(str(tmp_path / "cache.db"), "hash", 10)
+    with patch("repopack.utils.content_cache.time.time", side_effect=[1.0, 2.0]):
+        cache.store("old.txt", stat, {"binary": False, "encoding": "ascii", "content": "x" * 6})
+        cache.store("new.txt", stat, {"binary": False, "encoding": "ascii", "content": "y" * 6})
+    assert cache.evict() == 1
+    assert cache.find_valid({"old.txt": stat, "new.txt": stat}) == {"new.txt"}
+    cache.close()
+
+
+def test_cache_close_logs_database_errors(tmp_path: Path) -> None:
+    """
+    Test that a failure to update the cache on close is logged instead of raised.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    (tmp_path / "a.txt").write_text("x")
+    stat = os.stat(tmp_path / "a.txt")
+    cache = ContentCache(str(tmp_path / "cache.db"), "hash", 1024)
+    cache.store("a.txt", stat, {"binary": False, "encoding": "ascii", "content": "x"})
+    cache.connection.commit()
+    other = sqlite3.connect(str(tmp_path / "cache.db"))
+    other.execute("DROP TABLE entries")
+    other.commit()
+    other.close()
+
+    with patch("repopack.utils.content_cache.logger") as mock_logger:
+        cache.close()
+
+    mock_logger.warning.assert_called_once()
+
+
+def test_default_cache_stays_out_of_the_packed_directory(
+    tmp_path: Path, user_cache_dir: Path
+) -> None:
+    """
+    Test that the default cache is kept in the user cache directory, once per root.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+        user_cache_dir (Path): The user cache directory used by the test.
+    """
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.txt").write_text("hello")
+    config = merge_configs({}, {"processing": {"jobs": 1}})
+
+    pack(str(root), config, str(tmp_path / "output.txt"))
+
+    assert sorted(path.name for path in root.iterdir()) == ["a.txt"]
+    assert [Path(get_cache_path(str(root), config))] == list(
+        (user_cache_dir / "repopackpy").iterdir()
+    )
+    other_root = tmp_path / "other"
+    other_root.mkdir()
+    assert get_cache_path(str(other_root), config) != get_cache_path(str(root), config)
+
+
+def test_sanitize_files_reads_only_changed_files(tmp_path: Path) -> None:
+    """
+    Test that a warm re-pack only re-processes files whose stat data changed.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (tmp_path / name).write_text(f"content of {name}")
+    config = _config()
+    cache_path = str(tmp_path / "cache.db")
+    files = ["a.txt", "b.txt", "c.txt"]
+
+    cache = ContentCache(cache_path, get_options_hash(config), 1024)
+    first = list(sanitize_files(files, str(tmp_path), config, cache))
+    cache.close()
+
+    (tmp_path / "b.txt").write_text("changed content")
+    cache = ContentCache(cache_path, get_options_hash(config), 1024)
+    with patch(
+        "repopack.utils.file_handler.sanitize_entry", side_effect=sanitize_entry
+    ) as mock_entry:
+        second = list(sanitize_files(files, str(tmp_path), config, cache))
+    cache.close()
+
+    assert [call.args[0] for call in mock_entry.call_args_list] == ["b.txt"]
+    assert [file["content"] for file in second] == [
+        first[0]["content"],
+        "changed content",
+        first[2]["content"],
+    ]
+
+
+def test_token_budget_after_warm_cache(tmp_path: Path) -> None:
+    """
+    Test that a token budget run does not reuse entries cached without token counts.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "small.py").write_text("a = 1")
+    (root / "large.py").write_text("value = 'x'\n" * 50)
+    output = str(tmp_path / "out.txt")
+
+    first = pack(str(root), merge_configs({}, {}), output)
+    budget_config = merge_configs({}, {"tokens": {"budget": 10}})
+    second = pack(str(root), budget_config, output)
+
+    assert first.get("total_tokens") is None
+    assert second["total_tokens"] <= 10
+    assert second["token_excluded_files"] == ["large.py"]
@@ -0,0 +1,60 @@
+import codecs
+from typing import Any, Dict
+from unittest.mock import patch
+from repopack.utils.decoder import decode_content
+
+
+def test_decode_utf8_without_chardet() -> None:
+    """
+    Test that valid UTF-8 is decoded without calling chardet.
+    """
+    with patch("chardet.detect") as mock_detect:
+        content, encoding = decode_content("héllo".encode("utf-8"), "a.txt", {})
+
+    assert (content, encoding) == ("héllo", "utf-8")
+    mock_detect.assert_not_called()
+
+
+def test_decode_bom() -> None:
+    """
+    Test that a UTF-8 byte order mark is detected and stripped.
+    """
+    content, encoding = decode_content(codecs.BOM_UTF8 + b"hello", "a.txt", {})
+    assert (content, encoding) == ("hello", "utf-8-sig")
+
+
+def test_decode_falls_back_to_sampled_chardet() -> None:
+    """
+    Test that chardet only sees a bounded prefix when UTF-8 decoding fails.
+    """
+    config: Dict[str, Any] = {"encoding": {"detection_sample_size": 8}}
+    raw = "café crème brûlée".encode("latin-1")
+    with patch("chardet.detect", return_value={"encoding": "latin-1"}) as mock_detect:
+        content, encoding = decode_content(raw, "a.txt", config)
+
+    assert (content, encoding) == ("café crème brûlée", "latin-1")
+    mock_detect.assert_called_once_with(raw[:8])
+
+
+def test_decode_detects_whole_content_after_ascii_prefix() -> None:
+    """
+    Test that non-ASCII bytes past the detection sample are decoded instead of replaced.
+    """
+    raw = b"x" * (64 * 1024) + "café crème".encode("latin-1")
+
+    content, encoding = decode_content(raw, "a.txt", {})
+
+    assert content.endswith("café crème")
+    assert "\ufffd" not in content
+    assert encoding != "utf-8"
+
+
+def test_decode_glob_override() -> None:
+    """
+    Test that a per-glob encoding override takes precedence over UTF-8.
+    """
+    config: Dict[str, Any] = {"encoding": {"overrides": {"legacy/*.txt": "cp1252"}}}
+    raw = "naïve".encode("utf-8")
+
+    assert decode_content(raw, "legacy/a.txt", config) == (raw.decode("cp1252"), "cp1252")
+    assert decode_content(raw, "modern/a.txt", config) == ("naïve", "utf-8")
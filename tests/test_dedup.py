@@ -0,0 +1,80 @@
+from pathlib import Path
+import pytest
+from repopack import pack_repository
+from repopack.config import merge_configs
+from repopack.exceptions import ConfigurationError
+from repopack.utils.dedup import DUPLICATE_REFERENCE, deduplicate_files
+
+LICENSE = "Permission is hereby granted, free of charge, to any person obtaining a copy\n" * 5
+
+
+@pytest.mark.parametrize("hash_name", ["fast", "sha256"])
+def test_deduplicate_files(hash_name: str) -> None:
+    """
+    Test that repeats of a file become references to its first occurrence.
+
+    Args:
+        hash_name (str): The content hash to deduplicate with.
+    """
+    files = [
+        {"path": "a/LICENSE", "content": LICENSE},
+        {"path": "b/LICENSE", "content": LICENSE},
+        {"path": "c/LICENSE", "content": LICENSE + "extra"},
+        {"path": "d/LICENSE", "content": LICENSE},
+        {"path": "e/empty.py", "content": ""},
+        {"path": "f/empty.py", "content": ""},
+    ]
+    config = merge_configs({}, {"dedup": {"enabled": True, "hash": hash_name}})
+    stats = {}
+
+    result = list(deduplicate_files(files, config, stats))
+
+    reference = DUPLICATE_REFERENCE.format(path="a/LICENSE")
+    assert [file["content"] for file in result] == [
+        LICENSE,
+        reference,
+        LICENSE + "extra",
+        reference,
+        "",
+        "",
+    ]
+    assert stats["duplicate_files"] == {"b/LICENSE": "a/LICENSE", "d/LICENSE": "a/LICENSE"}
+    assert stats["dedup_bytes_saved"] == 2 * (len(LICENSE) - len(reference))
+    assert files[1]["content"] == LICENSE
+
+
+def test_deduplicate_files_unknown_hash() -> None:
+    """
+    Test that an unknown hash name is a configuration error.
+    """
+    config = merge_configs({}, {"dedup": {"enabled": True, "hash": "md5"}})
+    with pytest.raises(ConfigurationError, match="md5"):
+        list(deduplicate_files([], config, {}))
+
+
+def test_pack_repository_dedup(tmp_path: Path) -> None:
+    """
+    Test that packing with dedup writes repeated files once and reports the savings.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    for name in ["a", "b"]:
+        (root / name).mkdir(parents=True)
+        (root / name / "LICENSE").write_text(LICENSE)
+    output = tmp_path / "output.txt"
+    config = merge_configs({}, {"cache": {"enabled": False}, "dedup": {"enabled": True}})
+
+    result = pack_repository(str(root), config, str(output))
+
+    text = output.read_text()
+    first, repeat = [record.path for record in result]
+    reference = DUPLICATE_REFERENCE.format(path=first)
+    assert text.count(LICENSE.strip()) == 1
+    assert reference in text
+    records = {record.path: record for record in result}
+    assert records[repeat].duplicate_of == first
+    assert records[repeat].read() == reference
+    assert result.to_dict()["duplicate_files"] == {repeat: first}
+    assert result.to_dict()["dedup_bytes_saved"] > 0
@@ -1,6 +1,17 @@
+import mmap
+import pytest
+from pathlib import Path
 from unittest.mock import patch, mock_open
-from typing import Dict, Any
-from repopack.utils.file_handler import is_binary, sanitize_file
+from typing import Dict, Any, List
+from repopack.exceptions import FileProcessingError
+from repopack.utils.file_handler import (
+    DEFAULT_MMAP_THRESHOLD,
+    is_binary,
+    open_file_content,
+    read_file,
+    sanitize_file,
+    sanitize_files,
+)
 
 
 def test_is_binary() -> None:
@@ -35,3 +46,178 @@ def test_sanitize_file() -> None:
         result: str = sanitize_file("fake_file.txt", config)
 
     assert result == expected
+
+
+def test_sanitize_files_parallel_keeps_order(tmp_path: Path) -> None:
+    """
+    Test that files sanitized on a worker pool are returned in input order.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    file_paths: List[str] = [f"file{i}.txt" for i in range(20)]
+    for i, file_path in enumerate(file_paths):
+        (tmp_path / file_path).write_text(f"Content {i}")
+    (tmp_path / "binary.bin").write_bytes(b"\x00\x01")
+    config: Dict[str, Any] = {
+        "output": {
+            "remove_comments": False,
+            "remove_empty_lines": False,
+            "show_line_numbers": False,
+        },
+        "processing": {"jobs": 4, "executor": "thread"},
+    }
+
+    result = list(sanitize_files(file_paths + ["binary.bin"], str(tmp_path), config))
+
+    assert [file["path"] for file in result] == file_paths
+    assert result[3]["content"] == "Content 3"
+
+
+def test_sanitize_files_reports_failing_path(tmp_path: Path) -> None:
+    """
+    Test that an error in a worker surfaces as a FileProcessingError naming the file.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    (tmp_path / "ok.txt").write_text("ok")
+    config: Dict[str, Any] = {
+        "output": {
+            "remove_comments": False,
+            "remove_empty_lines": False,
+            "show_line_numbers": False,
+        },
+        "processing": {"jobs": 2, "executor": "thread"},
+    }
+
+    with pytest.raises(FileProcessingError) as excinfo:
+        list(sanitize_files(["ok.txt", "missing.txt"], str(tmp_path), config))
+
+    assert excinfo.value.file_path == "missing.txt"
+
+
+def test_open_file_content_reads_binary_head_only(tmp_path: Path) -> None:
+    """
+    Test that binary files are detected from the first chunk and not read further.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(b"\x00" + b"x" * 10000)
+
+    with open_file_content(str(file_path), DEFAULT_MMAP_THRESHOLD) as raw_content:
+        assert raw_content is None
+
+
+def test_read_file_uses_mmap_for_large_files(tmp_path: Path) -> None:
+    """
+    Test that files above the mmap threshold are decoded from a memory map.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    file_path = tmp_path / "large.txt"
+    text = "línea de texto\n" * 1000
+    file_path.write_text(text, encoding="utf-8")
+    config: Dict[str, Any] = {"processing": {"mmap_threshold": 4096}}
+
+    with patch("repopack.utils.file_handler.mmap.mmap", wraps=mmap.mmap) as mock_mmap:
+        result = read_file(str(file_path), config)
+
+    assert result == (text, "utf-8")
+    mock_mmap.assert_called_once()
+
+
+def test_sanitize_files_applies_size_limits(tmp_path: Path) -> None:
+    """
+    Test that oversized files are skipped and files past the total budget are left out.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    sizes = {"a.txt": 10, "huge.txt": 100, "b.txt": 20, "c.txt": 30, "d.txt": 5}
+    for name, size in sizes.items():
+        (tmp_path / name).write_text("x" * size)
+    config: Dict[str, Any] = {
+        "output": {
+            "remove_comments": False,
+            "remove_empty_lines": False,
+            "show_line_numbers": False,
+        },
+        "processing": {"jobs": 1, "max_file_size": 50, "max_total_size": "40"},
+    }
+    stats: Dict[str, Any] = {}
+
+    result = list(sanitize_files(list(sizes), str(tmp_path), config, stats=stats))
+
+    assert [file["path"] for file in result] == ["a.txt", "b.txt", "d.txt"]
+    assert stats == {
+        "skipped_files": ["huge.txt"],
+        "truncated_files": ["c.txt"],
+        "comment_bytes_removed": {},
+    }
+
+
+def test_sanitize_files_total_size_ignores_binary_files(tmp_path: Path) -> None:
+    """
+    Test that a large binary file listed first does not use up the total size budget.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    (tmp_path / "image.bin").write_bytes(b"\0" * 1000)
+    (tmp_path / "a.txt").write_text("x" * 10)
+    (tmp_path / "b.txt").write_text("x" * 20)
+    config: Dict[str, Any] = {
+        "output": {
+            "remove_comments": False,
+            "remove_empty_lines": False,
+            "show_line_numbers": False,
+        },
+        "processing": {"jobs": 1, "max_total_size": 40},
+    }
+    stats: Dict[str, Any] = {}
+
+    # Binary files are recognized by the read itself, without opening files beforehand
+    with patch("repopack.utils.file_handler.is_binary") as mock_is_binary:
+        result = list(
+            sanitize_files(["image.bin", "a.txt", "b.txt"], str(tmp_path), config, stats=stats)
+        )
+
+    assert [file["path"] for file in result] == ["a.txt", "b.txt"]
+    assert stats["truncated_files"] == []
+    mock_is_binary.assert_not_called()
+
+
+def test_sanitize_files_removes_comments(tmp_path: Path) -> None:
+    """
+    Test that comments are removed in the workers and the bytes removed are reported.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    (tmp_path / "main.py").write_text("# comment\nprint('#')  # note\n")
+    (tmp_path / "style.css").write_text("/* comment */\na { color: red; }\n")
+    (tmp_path / "notes.txt").write_text("# not a comment\n")
+    config: Dict[str, Any] = {
+        "output": {
+            "remove_comments": True,
+            "remove_empty_lines": False,
+            "show_line_numbers": False,
+        },
+        "processing": {"jobs": 2, "executor": "thread"},
+    }
+    stats: Dict[str, Any] = {}
+
+    result = list(
+        sanitize_files(["main.py", "style.css", "notes.txt"], str(tmp_path), config, stats=stats)
+    )
+
+    assert [file["content"] for file in result] == [
+        "print('#')",
+        "a { color: red; }",
+        "# not a comment",
+    ]
+    assert stats["comment_bytes_removed"] == {"Python": 18, "CSS": 14}
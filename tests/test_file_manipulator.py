@@ -0,0 +1,110 @@
+import pytest
+from repopack.utils.file_manipulator import FileManipulator
+
+
+def test_remove_python_comments() -> None:
+    """
+    Test that Python comments and docstrings are removed but strings are kept.
+    """
+    content = (
+        "#!/usr/bin/env python\n"
+        '"""Module docstring."""\n'
+        "import re  # trailing\n"
+        'URL = "http://host/#anchor"\n'
+        "def f(a):\n"
+        '    """Doc\n'
+        "    # not a comment\n"
+        '    """\n'
+        "    # full line\n"
+        "    x = (\n"
+        '        "kept"\n'
+        "    )\n"
+        '    return f"{a}#{a}"\n'
+    )
+
+    assert FileManipulator.remove_comments(content, ".py") == (
+        "#!/usr/bin/env python\n"
+        "import re\n"
+        'URL = "http://host/#anchor"\n'
+        "def f(a):\n"
+        "    x = (\n"
+        '        "kept"\n'
+        "    )\n"
+        '    return f"{a}#{a}"\n'
+    )
+
+
+def test_remove_js_comments() -> None:
+    """
+    Test that JavaScript comments are removed outside strings and regular expressions.
+    """
+    content = (
+        "// header\n"
+        "const re = /\\/\\/x/g; // note\n"
+        "const d = a / b / c; /* inline */ const e = 1;\n"
+        "const t = `multi\n"
+        "// line`;\n"
+        "/* block\n"
+        "   comment */\n"
+        "let k = a/**/b;\n"
+    )
+
+    assert FileManipulator.remove_comments(content, ".js") == (
+        "const re = /\\/\\/x/g;\n"
+        "const d = a / b / c;  const e = 1;\n"
+        "const t = `multi\n"
+        "// line`;\n"
+        "let k = a b;\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "extension, content, expected",
+    [
+        (
+            ".c",
+            'char *s = "/* no */"; // yes\nint x; /* a\nb */ int y;',
+            'char *s = "/* no */";\nint x;\n int y;',
+        ),
+        (".c", "#define Q `\nint y; // d\n", "#define Q `\nint y;\n"),
+        (".go", "p := `C:\\` // c\nx := 1 // d\n", "p := `C:\\`\nx := 1\n"),
+        (".go", "s := `multi\n// line` // c\n", "s := `multi\n// line`\n"),
+        (".html", "<p>a<!-- c -->b</p>\n<!--\nx\n-->\n<i>", "<p>a b</p>\n<i>"),
+        (".css", 'a { content: "/* no */"; } /* yes */\n', 'a { content: "/* no */"; }\n'),
+        (".md", "# Title\n<!-- kept -->", "# Title\n<!-- kept -->"),
+    ],
+)
+def test_remove_comments_by_extension(extension: str, content: str, expected: str) -> None:
+    """
+    Test comment removal for the other supported languages and unknown file types.
+
+    Args:
+        extension (str): The file extension.
+        content (str): The content to remove comments from.
+        expected (str): The expected content.
+    """
+    assert FileManipulator.remove_comments(content, extension) == expected
+
+
+def test_remove_comments_unterminated_is_linear() -> None:
+    """
+    Test that unterminated strings and comments are consumed without rescanning.
+    """
+    content = "x = 1\n" + '"""' * 2000 + "'" * 2000 + "\n/*" * 2000
+
+    assert FileManipulator.remove_comments(content, ".py").startswith("x = 1\n")
+    assert FileManipulator.remove_comments(content, ".js").startswith("x = 1\n")
+
+
+def test_remove_comments_keeps_unterminated_block() -> None:
+    """
+    Test that a block comment that is never closed does not remove the rest of the file.
+    """
+    content = "if (x) /re\\/*/.test(s) // c\nfoo(); // d\n"
+
+    result = FileManipulator.remove_comments(content, ".js")
+
+    assert result.endswith("/.test(s) // c\nfoo(); // d\n")
+    assert FileManipulator.remove_comments("a; // c\nb; /* open\nc;", ".c") == (
+        "a;\nb; /* open\nc;"
+    )
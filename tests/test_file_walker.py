@@ -0,0 +1,96 @@
+from pathlib import Path
+from typing import List
+from repopack.utils.file_walker import walk_directory
+from repopack.utils.ignore_utils import IgnoreMatcher
+
+
+def _make_tree(root: Path, files: List[str]) -> None:
+    for file in files:
+        path = root / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("content")
+
+
+def test_walk_directory_prunes_ignored_directories(tmp_path: Path) -> None:
+    """
+    Test that ignored directories are pruned and counted, and their files never listed.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    _make_tree(
+        tmp_path,
+        ["src/main.py", "node_modules/pkg/index.js", "node_modules/pkg/lib/a.js", "app.log"],
+    )
+    matcher = IgnoreMatcher(str(tmp_path), ["node_modules", "*.log"])
+
+    file_paths, stats = walk_directory(str(tmp_path), matcher)
+
+    assert file_paths == ["src/main.py"]
+    assert stats == {"pruned_directories": 1, "ignored_files": 1}
+
+
+def test_walk_directory_honours_negation(tmp_path: Path) -> None:
+    """
+    Test that a negation pattern matching a directory re-includes it, while files inside
+    an excluded directory stay excluded as in git.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    _make_tree(tmp_path, ["build/out.o", "build/keep/notes.txt", "dist/bundle.js"])
+    matcher = IgnoreMatcher(str(tmp_path), ["build/*", "!build/keep/", "dist", "!dist/bundle.js"])
+
+    file_paths, stats = walk_directory(str(tmp_path), matcher)
+
+    assert sorted(file_paths) == ["build/keep/notes.txt"]
+    assert stats["pruned_directories"] == 1
+    assert stats["ignored_files"] == 1
+
+
+def test_walk_directory_applies_nested_ignore_files(tmp_path: Path) -> None:
+    """
+    Test that a nested .gitignore applies relative to its own directory and overrides
+    the patterns of its parents.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    _make_tree(
+        tmp_path,
+        ["a.txt", "src/a.txt", "src/b.log", "src/gen/out.py", "lib/gen/out.py", "lib/c.log"],
+    )
+    (tmp_path / ".gitignore").write_text("*.log\n")
+    (tmp_path / "src" / ".gitignore").write_text("/a.txt\ngen/\n!b.log\n")
+    matcher = IgnoreMatcher(str(tmp_path), [], [".gitignore"])
+
+    file_paths, stats = walk_directory(str(tmp_path), matcher)
+
+    assert sorted(file_paths) == [
+        ".gitignore",
+        "a.txt",
+        "lib/gen/out.py",
+        "src/.gitignore",
+        "src/b.log",
+    ]
+    assert stats == {"pruned_directories": 1, "ignored_files": 2}
+
+
+def test_ignore_files_stop_at_repository_root(tmp_path: Path) -> None:
+    """
+    Test that ignore files above the packed directory are honoured up to the repository
+    root, and not beyond it.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    repo = tmp_path / "repo"
+    _make_tree(tmp_path, ["repo/pkg/keep.py", "repo/pkg/skip.tmp", "repo/pkg/outer.md"])
+    (repo / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("*.md\n")
+    (repo / ".gitignore").write_text("pkg/*.tmp\n")
+    matcher = IgnoreMatcher(str(repo / "pkg"), [], [".gitignore"])
+
+    file_paths, _ = walk_directory(str(repo / "pkg"), matcher)
+
+    assert sorted(file_paths) == ["keep.py", "outer.md"]
@@ -0,0 +1,226 @@
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List
+import pytest
+from repopack.config import merge_configs
+from repopack.exceptions import GitError
+from repopack.utils.file_handler import sanitize_files
+from repopack.utils.file_walker import filter_git_files
+from repopack.utils.git_reader import (
+    find_changed_files,
+    list_git_files,
+    read_git_blob,
+    resolve_ref,
+)
+from repopack.utils.ignore_utils import IgnoreMatcher
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(repo), *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    """
+    Create a git repository with two commits, an annotated tag and packed history.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+
+    Returns:
+        Path: The repository root.
+    """
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "test@example.com")
+    _git(tmp_path, "config", "user.name", "Test")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    for i in range(10):
+        (tmp_path / "src" / f"module{i}.py").write_text("\n".join(str(n) for n in range(i * 100)))
+    (tmp_path / "src" / "pkg" / "data.bin").write_bytes(b"\0\1\2")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "first")
+    _git(tmp_path, "tag", "-a", "v1", "-m", "v1")
+    for i in range(10):
+        with open(tmp_path / "src" / f"module{i}.py", "a") as f:
+            f.write("\nchanged")
+    _git(tmp_path, "commit", "-q", "-a", "-m", "second")
+    _git(tmp_path, "gc", "-q", "--aggressive")  # Pack objects, with deltas
+    (tmp_path / "src" / "new.py").write_text("new")
+    _git(tmp_path, "add", "src/new.py")
+    return tmp_path
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_list_git_files_matches_ls_files(repo: Path, version: str) -> None:
+    """
+    Test that every supported index version lists the same files as git.
+
+    Args:
+        repo (Path): The test repository.
+        version (str): The index version to write.
+    """
+    _git(repo, "update-index", "--index-version", version)
+
+    assert list_git_files(str(repo)) == _git(repo, "ls-files").split()
+    assert list_git_files(str(repo / "src" / "pkg")) == ["data.bin"]
+
+
+@pytest.mark.parametrize(
+    "commands",
+    [
+        [["update-index", "--split-index"]],
+        [["commit", "-q", "-m", "third"], ["sparse-checkout", "set", "--sparse-index", "src/pkg"]],
+    ],
+)
+def test_list_git_files_rejects_incomplete_index(repo: Path, commands: List[List[str]]) -> None:
+    """
+    Test that split and sparse indexes are reported instead of listing part of the files.
+
+    Args:
+        repo (Path): The test repository.
+        commands (List[List[str]]): The git commands making the index incomplete.
+    """
+    for command in commands:
+        _git(repo, *command)
+
+    with pytest.raises(GitError, match="index"):
+        list_git_files(str(repo))
+
+
+def test_read_git_blob_from_packed_refs(repo: Path) -> None:
+    """
+    Test that files at a tag and a branch are listed and read from the packed object store.
+
+    Args:
+        repo (Path): The test repository.
+    """
+    for ref in ("v1", "HEAD"):
+        files = list_git_files(str(repo), ref)
+        assert files == _git(repo, "ls-tree", "-r", "--name-only", ref).split()
+        for file_path in files:
+            expected = subprocess.run(
+                ["git", "-C", str(repo), "show", f"{ref}:{file_path}"],
+                check=True,
+                capture_output=True,
+            ).stdout
+            assert read_git_blob(str(repo), ref, file_path) == expected
+
+
+def test_read_git_blob_after_commit_and_repack(repo: Path) -> None:
+    """
+    Test that a moved branch is listed at its new commit and objects in new packs are found.
+
+    Args:
+        repo (Path): The test repository.
+    """
+    assert "later.py" not in list_git_files(str(repo), "HEAD")
+
+    (repo / "later.py").write_text("print('later')\n")
+    _git(repo, "add", "later.py")
+    _git(repo, "commit", "-q", "-m", "later")
+    _git(repo, "gc", "-q")  # Moves the new objects from loose files into a new pack
+
+    assert "later.py" in list_git_files(str(repo), "HEAD")
+    assert read_git_blob(str(repo), "HEAD", "later.py") == b"print('later')\n"
+
+
+def test_size_limits_use_blob_sizes_at_ref(repo: Path) -> None:
+    """
+    Test that size limits apply to the files at a ref, not to the working tree.
+
+    Args:
+        repo (Path): The test repository.
+    """
+    (repo / "src" / "module1.py").write_text("x" * 10000)
+    (repo / "src" / "module2.py").unlink()
+    config = merge_configs(
+        {},
+        {
+            "git": {"ref": "v1"},
+            "processing": {"jobs": 1, "max_file_size": 1000},
+            "cache": {"enabled": False},
+        },
+    )
+    file_paths = ["src/module1.py", "src/module2.py", "src/module9.py"]
+    stats = {}
+
+    files = list(sanitize_files(file_paths, str(repo), config, stats=stats))
+
+    assert [file["path"] for file in files] == ["src/module1.py", "src/module2.py"]
+    assert files[0]["size"] == len(read_git_blob(str(repo), "v1", "src/module1.py"))
+    assert stats["skipped_files"] == ["src/module9.py"]
+
+
+def test_filter_git_files_skips_untracked_files(repo: Path) -> None:
+    """
+    Test that untracked files are never listed and ignore patterns still apply.
+
+    Args:
+        repo (Path): The test repository.
+    """
+    (repo / "build").mkdir()
+    (repo / "build" / "output.py").write_text("untracked")
+    matcher = IgnoreMatcher(str(repo), ["*.bin", "src/pkg/"])
+
+    file_paths, stats = filter_git_files(str(repo), matcher)
+
+    assert file_paths == [f"src/module{i}.py" for i in range(10)] + ["src/new.py"]
+    assert stats == {"pruned_directories": 1, "ignored_files": 0}
+
+
+def test_find_changed_files_since_ref(repo: Path) -> None:
+    """
+    Test that modified, added and renamed files are found against a ref, while files
+    whose stat data is unchanged are not reported.
+
+    Args:
+        repo (Path): The test repository.
+    """
+    _git(repo, "commit", "-q", "-m", "third")
+    (repo / "src" / "module1.py").write_text("rewritten")
+    _git(repo, "mv", "src/module2.py", "src/renamed.py")
+    (repo / "src" / "untracked.py").write_text("untracked")
+    file_paths = list_git_files(str(repo)) + ["src/untracked.py"]
+
+    changed = find_changed_files(str(repo), file_paths, "HEAD")
+
+    assert changed == {
+        "src/module1.py": "modified",
+        "src/renamed.py": "renamed",
+        "src/untracked.py": "added",
+    }
+    expected = {f"src/module{i}.py": "modified" for i in range(10)}
+    expected["src/new.py"] = "added"
+    assert (
+        find_changed_files(str(repo), list_git_files(str(repo), "HEAD"), "v1", "HEAD") == expected
+    )
+
+
+def test_resolve_ref_with_ancestry_suffixes(repo: Path) -> None:
+    """
+    Test that '~N' and '^N' suffixes resolve to the same commits as git rev-parse.
+
+    Args:
+        repo (Path): The test repository.
+    """
+    git_dir = str(repo / ".git")
+    for ref in ("HEAD", "HEAD~1", "HEAD^", "v1^0", "HEAD~1^0"):
+        assert resolve_ref(git_dir, ref) == _git(repo, "rev-parse", ref).strip()
+
+
+@pytest.mark.parametrize("ref", ["config", "index", "description"])
+def test_resolve_ref_ignores_non_ref_files(repo: Path, ref: str) -> None:
+    """
+    Test that files in the git directory other than HEAD-style refs are not read as refs.
+
+    Args:
+        repo (Path): The test repository.
+        ref (str): The name of a file in the git directory.
+    """
+    with pytest.raises(GitError, match="Unknown revision"):
+        resolve_ref(str(repo / ".git"), ref)
@@ -1,10 +1,16 @@
+import random
 from unittest.mock import patch
 from pathlib import Path
 from typing import List, Dict, Any, Callable
+import pytest
 from repopack.utils.ignore_utils import (
+    DEFAULT_IGNORE_LIST,
+    compile_patterns,
+    create_ignore_spec,
     get_ignore_patterns,
     get_all_ignore_patterns,
     create_ignore_filter,
+    match_patterns,
 )
 
 
@@ -51,3 +57,102 @@ def test_create_ignore_filter() -> None:
     assert not ignore_filter("test.log")  # Should be ignored
     assert not ignore_filter("node_modules/package.json")  # Should be ignored
     assert ignore_filter("src/main.py")  # Should not be ignored
+
+
+# Path components that random patterns and paths are built from
+CORPUS_NAMES = [
+    "src",
+    "lib",
+    "build",
+    "node_modules",
+    "a.log",
+    "b.tar.gz",
+    ".env",
+    "x.py",
+    "Release",
+]
+CORPUS_SUFFIXES = [".log", ".py", ".gz", ".tar.gz", ".env", "."]
+
+
+def make_random_pattern(rng: random.Random) -> str:
+    """
+    Generate a random gitignore pattern, mostly literal with some wildcards.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The pattern.
+    """
+    kind = rng.randrange(8)
+    if kind == 0:
+        pattern = rng.choice(CORPUS_NAMES)
+    elif kind == 1:
+        pattern = "*" + rng.choice(CORPUS_SUFFIXES)
+    elif kind == 2:
+        depth = rng.randint(1, 3)
+        pattern = "/".join(rng.choice(CORPUS_NAMES) for _ in range(depth))
+        if depth == 1 or rng.random() < 0.5:
+            pattern = "/" + pattern
+    elif kind == 3:
+        pattern = rng.choice(["**/", "", "src/"]) + rng.choice(CORPUS_NAMES)[:2] + "*"
+    elif kind == 4:
+        pattern = rng.choice(["*", "**", "src/*", "?.py", "[ab].log", "lib/**/x.py", "\\#x"])
+    elif kind == 5:
+        # Comments, blank lines and trailing whitespace are left as they are
+        return rng.choice(["# comment", "", "  ", rng.choice(CORPUS_NAMES) + " "])
+    else:
+        pattern = rng.choice(DEFAULT_IGNORE_LIST)
+    if rng.random() < 0.3 and not pattern.endswith("/"):
+        pattern += "/"
+    if rng.random() < 0.2:
+        pattern = "!" + pattern
+    return pattern
+
+
+def make_random_path(rng: random.Random) -> str:
+    """
+    Generate a random relative path, with a trailing '/' for directories.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The path.
+    """
+    names = CORPUS_NAMES + [".DS_Store", "yarn.lock", "dist", "repopackpy-output.txt", ".yarn"]
+    path = "/".join(rng.choice(names) for _ in range(rng.randint(1, 4)))
+    return path + "/" if rng.random() < 0.3 else path
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compiled_patterns_match_pathspec(seed: int) -> None:
+    """
+    Test that compiled patterns decide like pathspec on a random corpus, negations included.
+
+    Args:
+        seed (int): The random seed.
+    """
+    rng = random.Random(seed)
+    for _ in range(40):
+        patterns = [make_random_pattern(rng) for _ in range(rng.randint(1, 30))]
+        compiled = compile_patterns(patterns)
+        spec = create_ignore_spec(patterns)
+        for _ in range(100):
+            path = make_random_path(rng)
+            expected = None
+            for pattern in reversed(spec.patterns):
+                if pattern.include is not None and pattern.match_file(path):
+                    expected = bool(pattern.include)
+                    break
+
+            assert match_patterns(compiled, path) is expected, (patterns, path)
+            assert bool(expected) == spec.match_file(path)
+
+
+def test_compiled_patterns_are_shared() -> None:
+    """Test that identical pattern lists are only compiled once."""
+    first = compile_patterns(list(DEFAULT_IGNORE_LIST))
+    second = compile_patterns(list(DEFAULT_IGNORE_LIST))
+
+    assert first is second
@@ -1,6 +1,15 @@
+import io
+import json
 import pytest
-from repopack.output_generator import generate_output, generate_plain_output, generate_xml_output
-from repopack.exceptions import OutputGenerationError
+from repopack.output_generator import (
+    StrippedWriter,
+    generate_output,
+    generate_plain_output,
+    generate_sharded_output,
+    generate_xml_output,
+    render_output,
+)
+from repopack.exceptions import ConfigurationError, FileProcessingError, OutputGenerationError
 
 
 @pytest.fixture
@@ -76,3 +85,96 @@ def test_generate_output_xml(sample_data, tmp_path):
 def test_generate_output_error():
     with pytest.raises(OutputGenerationError):
         generate_output("root", {}, [], [], "/nonexistent/path/output.txt")
+
+
+def test_stripped_writer_matches_strip():
+    chunks = ["\n  header\n", "", "body", "  \n\n", "\t", "tail\n\n  "]
+    buffer = io.StringIO()
+    writer = StrippedWriter(buffer)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+    assert buffer.getvalue() == "".join(chunks).strip() + "\n"
+
+
+def test_generate_output_streams_iterator(sample_data, tmp_path):
+    output_path = tmp_path / "output.txt"
+    generate_output(
+        "root",
+        sample_data["config"],
+        iter(sample_data["sanitizedFiles"]),
+        ["file1.txt", "file2.py"],
+        str(output_path),
+    )
+    content = output_path.read_text()
+    assert content.endswith("Content of file2\n")
+    assert list(tmp_path.iterdir()) == [output_path]
+
+
+def test_generate_output_file_error_leaves_no_output(sample_data, tmp_path):
+    def failing_files():
+        yield sample_data["sanitizedFiles"][0]
+        raise FileProcessingError("file2.py", "Test error")
+
+    output_path = tmp_path / "output.txt"
+    with pytest.raises(FileProcessingError):
+        generate_output("root", sample_data["config"], failing_files(), [], str(output_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def _split_config(sample_data, file_paths, files_size):
+    config = dict(sample_data["config"], split={"unit": "chars"})
+    empty = io.StringIO()
+    render_output(config, [], file_paths, empty)
+    config["split"]["max_size"] = len(empty.getvalue()) + files_size
+    return config
+
+
+def test_generate_sharded_output_keeps_directories_together(sample_data, tmp_path):
+    files = [
+        {"path": f"{directory}/file{i}.py", "content": f"{directory}{i}" * 20}
+        for directory in ("a", "b", "c")
+        for i in range(2)
+    ]
+    file_paths = [file["path"] for file in files]
+    # Room for about three files, so each directory's pair must start a new shard
+    config = _split_config(sample_data, file_paths, 3 * 80)
+    output_path = tmp_path / "output.txt"
+    (tmp_path / "output-4.txt").write_text("stale")
+
+    manifest = generate_sharded_output(config, iter(files), file_paths, str(output_path))
+
+    assert [shard["path"] for shard in manifest["shards"]] == [
+        "output-1.txt",
+        "output-2.txt",
+        "output-3.txt",
+    ]
+    assert manifest["files"] == {path: "abc".index(path[0]) + 1 for path in file_paths}
+    assert json.loads((tmp_path / "output-manifest.json").read_text()) == manifest
+    for index, shard in enumerate(manifest["shards"], 1):
+        content = (tmp_path / shard["path"]).read_text()
+        assert len(content) <= config["split"]["max_size"]
+        assert "a0" * 20 in content if index == 1 else "a0" not in content
+    assert not (tmp_path / "output-4.txt").exists()
+    assert not output_path.exists()
+
+
+def test_generate_sharded_output_places_oversized_files_alone(sample_data, tmp_path):
+    files = [
+        {"path": "small.py", "content": "small"},
+        {"path": "large.py", "content": "x" * 500},
+        {"path": "tail.py", "content": "tail"},
+    ]
+    file_paths = [file["path"] for file in files]
+    config = _split_config(sample_data, file_paths, 100)
+
+    manifest = generate_sharded_output(config, iter(files), file_paths, str(tmp_path / "o.txt"))
+
+    assert manifest["files"] == {"small.py": 1, "large.py": 2, "tail.py": 3}
+    assert [shard["oversized"] for shard in manifest["shards"]] == [False, True, False]
+
+
+def test_generate_sharded_output_rejects_size_below_header(sample_data, tmp_path):
+    config = dict(sample_data["config"], split={"max_size": 100, "unit": "chars"})
+    with pytest.raises(ConfigurationError):
+        generate_sharded_output(config, iter([]), [], str(tmp_path / "o.txt"))
@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+from repopack.config import merge_configs
+from repopack.packager import pack
+from repopack.utils.profiler import NULL_STAGE, Profiler, profiler, write_stats_json
+
+
+def test_disabled_profiler_records_nothing() -> None:
+    """
+    Test that a disabled profiler hands out the shared no-op stage and ignores counts.
+    """
+    disabled = Profiler()
+
+    with disabled.stage("walk") as stage:
+        disabled.count("bytes_read", 10)
+
+    assert disabled.stage("walk") is NULL_STAGE
+    assert stage is None
+    assert disabled.to_stats() == {"stages": {}, "counters": {}}
+
+
+def test_profile_pack(tmp_path: Path) -> None:
+    """
+    Test that profiling a pack records stages, counters and a valid trace.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "main.py").write_text("print('main')\n")
+    (root / "latin.txt").write_bytes("café crème brûlée\n".encode("latin-1") * 20)
+    (root / "logo.png").write_bytes(b"\x89PNG\0\0")
+    (root / "empty.txt").write_text("")
+    config = merge_configs({}, {"cache": {"enabled": False}, "processing": {"jobs": 2}})
+
+    profiler.enable()
+    try:
+        result = pack(str(root), config, str(tmp_path / "output.txt"))
+    finally:
+        profiler.disable()
+
+    stats = profiler.to_stats()
+    for stage in ["pack", "ignore_matcher", "walk", "read_decode", "tree_render", "output_write"]:
+        assert stats["stages"][stage]["calls"] >= 1
+    assert stats["stages"]["read_decode"]["calls"] == 4
+    counters = stats["counters"]
+    assert counters["bytes_read"] == 14 + 360
+    assert counters["chardet_calls"] == 1
+    assert counters["files_skipped.binary"] == 1
+    assert counters["files_skipped.empty"] == 1
+    assert counters["files_packed"] == 2
+    assert counters["bytes_written"] == (tmp_path / "output.txt").stat().st_size
+
+    trace_path = tmp_path / "trace.json"
+    profiler.write_trace(str(trace_path))
+    trace = json.loads(trace_path.read_text())
+    spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert {"name", "ts", "dur", "pid", "tid"} <= set(spans[0])
+    assert any(event["ph"] == "M" for event in trace["traceEvents"])
+
+    stats_path = tmp_path / "stats.json"
+    write_stats_json(str(stats_path), result)
+    written = json.loads(stats_path.read_text())
+    assert written["pack"]["total_files"] == 2
+    assert written["counters"] == counters
+
+
+def test_profile_counters_from_worker_processes(tmp_path: Path) -> None:
+    """
+    Test that counters recorded in worker processes reach the profiler.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    for i in range(4):
+        (tmp_path / f"file{i}.txt").write_text("x" * 10)
+    config = merge_configs(
+        {}, {"cache": {"enabled": False}, "processing": {"jobs": 2, "executor": "process"}}
+    )
+
+    profiler.enable()
+    try:
+        pack(str(tmp_path), config, str(tmp_path / "output.txt"))
+    finally:
+        profiler.disable()
+
+    assert profiler.to_stats()["counters"]["bytes_read"] == 40
@@ -0,0 +1,68 @@
+import io
+import re
+from pathlib import Path
+from repopack import PackResult, pack_repository
+from repopack.config import merge_configs
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\d{4}-\d\d-\d\dT[\d:.]+", "DATE", text)
+
+
+def _make_repo(root: Path) -> None:
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "main.py").write_text("print('main')\n")
+    (root / "README.md").write_text("# Title\n")
+    (root / "logo.png").write_bytes(b"\x89PNG\0\0")
+
+
+def test_pack_repository_without_writing(tmp_path: Path) -> None:
+    """
+    Test that a pack result can be inspected and rendered without an output file.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    _make_repo(tmp_path)
+    config = merge_configs({}, {"cache": {"enabled": False}})
+
+    result = pack_repository(str(tmp_path), config)
+
+    assert isinstance(result, PackResult)
+    assert sorted(tmp_path.iterdir()) == [
+        tmp_path / "README.md",
+        tmp_path / "logo.png",
+        tmp_path / "src",
+    ]
+    records = {record.path: record for record in result}
+    assert sorted(records) == ["README.md", "src/main.py"]
+    assert records["src/main.py"].size == 14
+    assert records["src/main.py"].char_count == 13
+    assert records["src/main.py"].encoding == "utf-8"
+    assert records["src/main.py"].content is None
+    assert records["src/main.py"].read() == "print('main')"
+    assert result.total_characters == 20
+
+    stream = io.StringIO()
+    result.render(stream)
+    assert _normalize(result.to_bytes().decode("utf-8")) == _normalize(stream.getvalue())
+    assert "print('main')" in stream.getvalue()
+
+
+def test_pack_result_matches_written_output(tmp_path: Path) -> None:
+    """
+    Test that rendering a result produces the same document as the output file.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    _make_repo(root)
+    config = merge_configs({}, {"cache": {"enabled": False}, "output": {"style": "xml"}})
+    output = tmp_path / "output.xml"
+
+    result = pack_repository(str(root), config, str(output), keep_content=True)
+    (root / "src" / "main.py").write_text("changed after packing")
+
+    assert _normalize(result.to_bytes().decode("utf-8")) == _normalize(output.read_text())
+    assert result.to_dict()["file_char_counts"] == {"README.md": 7, "src/main.py": 13}
@@ -0,0 +1,229 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from unittest.mock import patch
+import pytest
+from repopack.output_generator import generate_output
+from repopack.server import PackServer, create_server
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def server_url() -> Iterator[Tuple[str, PackServer]]:
+    """
+    Run a pack server on a free local port for the duration of a test.
+
+    Yields:
+        Tuple[str, PackServer]: The server's base URL and its state.
+    """
+    pack_server = PackServer({"cache": {"enabled": False}, "processing": {"jobs": 1}})
+    server = create_server(pack_server, token=TOKEN)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}", pack_server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def _post(url: str, request: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> bytes:
+    data = json.dumps(request).encode("utf-8")
+    all_headers = {"Content-Type": "application/json", "Authorization": f"Bearer {TOKEN}"}
+    all_headers.update(headers or {})
+    http_request = urllib.request.Request(url + "/pack", data, all_headers)
+    with urllib.request.urlopen(http_request) as response:
+        return response.read()
+
+
+def test_pack_request_reflects_changes(server_url: Tuple[str, PackServer], tmp_path: Path) -> None:
+    """
+    Test that repeated requests reuse the warm session and pick up changed files.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    url, pack_server = server_url
+    (tmp_path / "a.py").write_text("a = 1")
+    (tmp_path / "b.py").write_text("b = 2")
+
+    stats = json.loads(_post(url, {"root": str(tmp_path)}))
+    assert stats["total_files"] == 2
+    assert (tmp_path / "repopackpy-output.txt").exists()
+
+    (tmp_path / "a.py").write_text("a = 'changed'")
+    (tmp_path / "c.py").write_text("c = 3")
+    output = _post(url, {"root": str(tmp_path), "response": "output"}).decode("utf-8")
+
+    assert "a = 'changed'" in output
+    assert "c = 3" in output
+    assert "repopackpy-output.txt" not in output
+    assert len(pack_server.sessions) == 1
+
+
+def test_concurrent_requests(server_url: Tuple[str, PackServer], tmp_path: Path) -> None:
+    """
+    Test that concurrent requests for the same root all get complete answers.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    url, _ = server_url
+    for i in range(20):
+        (tmp_path / f"module{i}.py").write_text(f"value = {i}")
+    results = []
+
+    def request() -> None:
+        results.append(json.loads(_post(url, {"root": str(tmp_path), "config": {}})))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [result["total_files"] for result in results] == [20] * 8
+
+
+def test_overlapping_requests_keep_newest_output(
+    server_url: Tuple[str, PackServer], tmp_path: Path
+) -> None:
+    """
+    Test that a slow write of an older state never replaces the output of a newer request.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    url, _ = server_url
+    (tmp_path / "a.py").write_text("a = 'old'")
+    writing = threading.Event()
+    second_done = threading.Event()
+    calls = []
+
+    def slow_generate_output(*args: Any, **kwargs: Any) -> None:
+        calls.append(args)
+        if len(calls) == 1:
+            writing.set()
+            # Give the second request the chance to overtake this write
+            second_done.wait(1)
+        generate_output(*args, **kwargs)
+
+    def second_request() -> None:
+        _post(url, {"root": str(tmp_path)})
+        second_done.set()
+
+    with patch("repopack.session.generate_output", side_effect=slow_generate_output):
+        first = threading.Thread(target=_post, args=(url, {"root": str(tmp_path)}))
+        first.start()
+        assert writing.wait(5)
+        (tmp_path / "a.py").write_text("a = 'newer'")
+        second = threading.Thread(target=second_request)
+        second.start()
+        first.join()
+        second.join()
+
+    output = (tmp_path / "repopackpy-output.txt").read_text()
+    assert "a = 'newer'" in output
+    assert "a = 'old'" not in output
+
+
+def test_split_output_request(server_url: Tuple[str, PackServer], tmp_path: Path) -> None:
+    """
+    Test that requests with a split size write shards instead of a single output file.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    url, _ = server_url
+    for i in range(6):
+        (tmp_path / f"module{i}.py").write_text(f"value = {i}\n" * 40)
+
+    stats = json.loads(_post(url, {"root": str(tmp_path), "config": {"split": {"max_size": 3000}}}))
+
+    assert len(stats["shards"]) > 1
+    assert all(Path(shard).exists() for shard in stats["shards"])
+    assert (tmp_path / "repopackpy-output-manifest.json").exists()
+    assert not (tmp_path / "repopackpy-output.txt").exists()
+
+
+def test_invalid_requests(server_url: Tuple[str, PackServer], tmp_path: Path) -> None:
+    """
+    Test that malformed requests and unknown roots are rejected with an error.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    url, _ = server_url
+    for request in ({}, {"root": str(tmp_path / "missing")}):
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(url, request)
+        assert excinfo.value.code == 400
+        assert "error" in json.loads(excinfo.value.read())
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        ({"Authorization": ""}, 401),
+        ({"Authorization": "Bearer wrong"}, 401),
+        ({"Content-Type": "text/plain"}, 415),
+        ({"Origin": "http://example.com"}, 403),
+        ({"Host": "attacker.example:8765"}, 403),
+    ],
+)
+def test_unauthorized_requests(
+    server_url: Tuple[str, PackServer], tmp_path: Path, headers: Dict[str, str], status: int
+) -> None:
+    """
+    Test that requests without the token, not sent as JSON or from a web page are rejected.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+        headers (Dict[str, str]): Headers replacing those of a valid request.
+        status (int): The expected HTTP status.
+    """
+    url, pack_server = server_url
+    (tmp_path / "a.py").write_text("a = 1")
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        _post(url, {"root": str(tmp_path)}, headers)
+
+    assert excinfo.value.code == status
+    assert not (tmp_path / "repopackpy-output.txt").exists()
+    assert len(pack_server.sessions) == 0
+
+
+def test_output_outside_root_rejected(server_url: Tuple[str, PackServer], tmp_path: Path) -> None:
+    """
+    Test that requests cannot write the output file outside the packed directory.
+
+    Args:
+        server_url (Tuple[str, PackServer]): The running server.
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    url, _ = server_url
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1")
+    for file_path in (str(tmp_path / "stolen.txt"), "../stolen.txt"):
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _post(url, {"root": str(root), "config": {"output": {"file_path": file_path}}})
+        assert excinfo.value.code == 400
+    assert not (tmp_path / "stolen.txt").exists()
+
+    stats = json.loads(
+        _post(url, {"root": str(root), "config": {"output": {"file_path": "packed.txt"}}})
+    )
+    assert stats["total_files"] == 1
@@ -0,0 +1,142 @@
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Set
+from repopack.config import merge_configs
+from repopack.packager import pack
+from repopack.session import PackSession
+
+
+def _config() -> Dict[str, Any]:
+    config = merge_configs({}, {"cache": {"enabled": False}, "processing": {"jobs": 1}})
+    config["watch"].update({"backend": "poll", "poll_interval": 0.05, "debounce": 0.05})
+    return config
+
+
+def _read_output(path: Path) -> str:
+    return re.sub(r"\d{4}-\d\d-\d\dT[\d:.]+", "DATE", path.read_text())
+
+
+def _assert_matches_pack(root: Path, session_output: Path, tmp_path: Path) -> None:
+    expected = tmp_path / "expected.txt"
+    pack(str(root), _config(), str(expected))
+    assert _read_output(session_output) == _read_output(expected)
+
+
+def test_session_updates_match_full_pack(tmp_path: Path) -> None:
+    """
+    Test that incremental updates produce the same output as packing from scratch.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    (root / "src" / "old").mkdir(parents=True)
+    (root / "a.py").write_text("a = 1")
+    (root / "src" / "b.py").write_text("b = 2")
+    (root / "src" / "old" / "c.py").write_text("c = 3")
+    output = tmp_path / "output.txt"
+    session = PackSession(str(root), _config(), str(output))
+    session.pack()
+    _assert_matches_pack(root, output, tmp_path)
+
+    (root / "a.py").write_text("a = 'changed'")
+    (root / "src" / "new.py").write_text("new = 4")
+    (root / "src" / "old" / "c.py").unlink()
+    (root / "src" / "old").rmdir()
+    changes: Set[str] = {"a.py", "src", "src/new.py", "src/old"}
+    result = session.pack(changes)
+    _assert_matches_pack(root, output, tmp_path)
+    assert result["total_files"] == 3
+
+    (root / ".repopackpyignore").write_text("src/\n")
+    session.pack({""})
+    _assert_matches_pack(root, output, tmp_path)
+    assert sorted(session.entries) == [".repopackpyignore", "a.py"]
+
+
+def test_session_stats_match_full_pack(tmp_path: Path) -> None:
+    """
+    Test that a session reports the same statistics as a full pack with every stage enabled.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.py").write_text("# comment\nprint('a')\n" * 20)
+    (root / "b.py").write_text("# comment\nprint('a')\n" * 20)
+    (root / "big.py").write_text("x = 1\n" * 400)
+    (root / "huge.txt").write_text("x" * 5000)
+    config = _config()
+    config["output"]["remove_comments"] = True
+    config["processing"]["max_file_size"] = 4000
+    config["tokens"]["budget"] = 500
+    config["dedup"]["enabled"] = True
+
+    session_stats = PackSession(str(root), config, str(tmp_path / "session.txt")).pack()
+    pack_stats = pack(str(root), config, str(tmp_path / "pack.txt"))
+
+    for key, value in session_stats.items():
+        assert pack_stats[key] == value, key
+    assert session_stats["skipped_files"] == ["huge.txt"]
+    assert session_stats["token_excluded_files"] == ["big.py"]
+    assert session_stats["duplicate_files"] == {"b.py": "a.py"}
+
+
+def test_session_writes_split_output(tmp_path: Path) -> None:
+    """
+    Test that a session splits its output into the same shards as a full pack.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    root.mkdir()
+    for i in range(6):
+        (root / f"module{i}.py").write_text(f"value = {i}\n" * 40)
+    config = _config()
+    config["split"]["max_size"] = 3000
+
+    session_dir = tmp_path / "session"
+    pack_dir = tmp_path / "pack"
+    session_dir.mkdir()
+    pack_dir.mkdir()
+    result = PackSession(str(root), config, str(session_dir / "out.txt")).pack()
+    expected = pack(str(root), config, str(pack_dir / "out.txt"))
+
+    assert len(result["shards"]) == len(expected["shards"]) > 1
+    assert not (session_dir / "out.txt").exists()
+    assert (session_dir / "out-manifest.json").exists()
+    for shard, expected_shard in zip(result["shards"], expected["shards"]):
+        assert _read_output(Path(shard)) == _read_output(Path(expected_shard))
+
+
+def test_session_watch_rewrites_on_change(tmp_path: Path) -> None:
+    """
+    Test that watch mode picks up a change by polling and rewrites the output.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "main.py").write_text("print('before')")
+    output = tmp_path / "output.txt"
+    session = PackSession(str(root), _config(), str(output))
+    session.pack()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=session.watch, args=(stop_event,))
+    thread.start()
+    try:
+        time.sleep(0.1)
+        (root / "main.py").write_text("print('after, with a different size')")
+        deadline = time.time() + 5
+        while "after" not in output.read_text() and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_event.set()
+        thread.join()
+
+    assert "print('after, with a different size')" in output.read_text()
@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+import pytest
+
+# Dependencies that only the commands using them should import
+DEFERRED_MODULES = ["chardet", "pathspec", "halo", "colorama", "http.server", "multiprocessing"]
+
+
+def get_imported_modules(code: str) -> set:
+    """
+    Get the modules imported by running code in a fresh interpreter.
+
+    Args:
+        code (str): The code to run.
+
+    Returns:
+        set: The names of the imported modules.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport json, sys\nprint(json.dumps(list(sys.modules)))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(json.loads(completed.stdout))
+
+
+@pytest.mark.parametrize("code", ["import repopack", "import repopack.cli"])
+def test_startup_defers_heavy_imports(code: str) -> None:
+    """
+    Test that importing the package or its CLI leaves heavy dependencies unloaded.
+
+    Args:
+        code (str): The import statement to run.
+    """
+    imported = get_imported_modules(code)
+
+    assert "repopack" in imported
+    assert [name for name in DEFERRED_MODULES if name in imported] == []
+    assert "repopack.packager" not in imported
+
+
+def test_lazy_public_api() -> None:
+    """
+    Test that the package's public names are still importable from it.
+    """
+    imported = get_imported_modules(
+        "from repopack import FileRecord, PackResult, pack, pack_batch, pack_repository, run_cli"
+    )
+
+    assert "repopack.packager" in imported
+    assert "repopack.cli" in imported
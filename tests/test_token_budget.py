@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+import pytest
+from repopack.exceptions import ConfigurationError
+from repopack.utils.token_budget import select_within_budget
+
+
+def _files() -> List[Dict[str, Any]]:
+    return [
+        {"path": "README.md", "content": "", "tokens": 40},
+        {"path": "src/big.py", "content": "", "tokens": 70},
+        {"path": "src/small.py", "content": "", "tokens": 20},
+        {"path": "tests/test_small.py", "content": "", "tokens": 30},
+    ]
+
+
+def test_select_within_budget_prefers_small_files(tmp_path: Path) -> None:
+    """
+    Test that the greedy packer fills the budget with the smallest files by default.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    config: Dict[str, Any] = {"tokens": {"budget": 100}}
+    selected, excluded = select_within_budget(_files(), str(tmp_path), config)
+
+    assert [file["path"] for file in selected] == [
+        "README.md",
+        "src/small.py",
+        "tests/test_small.py",
+    ]
+    assert excluded == ["src/big.py"]
+
+
+def test_select_within_budget_honours_priority_globs(tmp_path: Path) -> None:
+    """
+    Test that files matching priority globs are packed first, keeping the original order.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    config: Dict[str, Any] = {"tokens": {"budget": 100, "priority": ["src/**"]}}
+    selected, excluded = select_within_budget(_files(), str(tmp_path), config)
+
+    assert [file["path"] for file in selected] == ["src/big.py", "src/small.py"]
+    assert excluded == ["README.md", "tests/test_small.py"]
+
+
+def test_select_within_budget_by_recency(tmp_path: Path) -> None:
+    """
+    Test that recency ranking prefers recently modified files and ranks removed files last.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    (tmp_path / "src").mkdir()
+    (tmp_path / "tests").mkdir()
+    for mtime, name in enumerate(["tests/test_small.py", "src/small.py", "src/big.py"]):
+        (tmp_path / name).write_text("")
+        os.utime(tmp_path / name, (mtime, mtime))
+    config: Dict[str, Any] = {"tokens": {"budget": 100, "rank_by": "recency"}}
+
+    # README.md does not exist anymore
+    selected, excluded = select_within_budget(_files(), str(tmp_path), config)
+
+    assert [file["path"] for file in selected] == ["src/big.py", "src/small.py"]
+    assert excluded == ["README.md", "tests/test_small.py"]
+
+
+def test_recency_rejected_for_git_ref(tmp_path: Path) -> None:
+    """
+    Test that recency ranking is rejected when packing a git ref.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    config: Dict[str, Any] = {"tokens": {"budget": 100, "rank_by": "recency"}, "git": {"ref": "v1"}}
+
+    with pytest.raises(ConfigurationError, match="recency"):
+        select_within_budget(_files(), str(tmp_path), config)
@@ -0,0 +1,44 @@
+import base64
+import pytest
+from pathlib import Path
+from repopack.exceptions import ConfigurationError
+from repopack.utils.tokenizer import BPETokenizer, EstimateTokenizer, create_tokenizer
+
+
+def test_estimate_tokenizer() -> None:
+    """
+    Test that the estimator counts word chunks and punctuation.
+    """
+    tokenizer = EstimateTokenizer()
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("def main():") == 5  # def, main, (, ), :
+    assert tokenizer.count("internationalization") == 5
+
+
+def test_bpe_tokenizer(tmp_path: Path) -> None:
+    """
+    Test BPE merging with a small local vocab file.
+
+    Args:
+        tmp_path (Path): Pytest fixture providing a temporary directory path.
+    """
+    tokens = [b"a", b"b", b"c", b" ", b"ab", b"abc", b" a"]
+    vocab_file = tmp_path / "vocab.tiktoken"
+    vocab_file.write_text(
+        "\n".join(f"{base64.b64encode(token).decode()} {rank}" for rank, token in enumerate(tokens))
+    )
+    tokenizer = BPETokenizer(str(vocab_file))
+
+    assert tokenizer.count("abc") == 1
+    assert tokenizer.count("abcb") == 2
+    assert tokenizer.count("abc cab") == 4  # "abc" + " cab" merged as " ", "c", "ab"
+
+
+def test_create_tokenizer_errors() -> None:
+    """
+    Test that unknown or misconfigured tokenizers raise ConfigurationError.
+    """
+    with pytest.raises(ConfigurationError):
+        create_tokenizer("unknown")
+    with pytest.raises(ConfigurationError):
+        create_tokenizer("bpe", None)
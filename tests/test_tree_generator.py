@@ -1,5 +1,6 @@
+import sys
 from typing import List
-from repopack.utils.tree_generator import generate_tree_string
+from repopack.utils.tree_generator import TreeNode, generate_file_tree, generate_tree_string
 
 
 def test_generate_tree_string() -> None:
@@ -26,3 +27,31 @@ def test_generate_tree_string() -> None:
 
     # Assert that the generated string matches the expected output
     assert result == expected, "The generated tree string does not match the expected output"
+
+
+def test_generate_file_tree_indexes_children_by_name() -> None:
+    """
+    Test that children are indexed by name and shared path components are merged.
+    """
+    files: List[str] = [f"generated/file_{i}.py" for i in range(1000)] + ["generated/sub/a.py"]
+
+    root: TreeNode = generate_file_tree(files)
+
+    generated = root.children["generated"]
+    assert generated.is_directory
+    assert len(generated.children) == 1001
+    assert not generated.children["file_999.py"].is_directory
+    assert generated.children["sub"].children["a.py"].name == "a.py"
+
+
+def test_generate_tree_string_deep_tree() -> None:
+    """
+    Test that trees deeper than the recursion limit render without recursion errors.
+    """
+    depth: int = sys.getrecursionlimit() + 100
+    files: List[str] = ["/".join(["d"] * depth) + "/leaf.txt"]
+
+    lines: List[str] = generate_tree_string(files).split("\n")
+
+    assert len(lines) == depth + 1
+    assert lines[-1] == "  " * depth + "leaf.txt"